@@ -39,8 +39,9 @@ for k in range(len(nu)):
 # have direct access:
 print("Data for the machine: ", wdg.machinedata.keys())
 
-# ... and all results:
-print("Data for the machine: ", wdg.results.keys())
+# ... and all results (they are calculated on first access, keys()
+# returns the results which are already calculated):
+print("Results: ", wdg.results.available())
 
 # Use the get_* methods for the results:
 print("\nDETAILLED RESULTS: ")
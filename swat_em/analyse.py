@@ -3,33 +3,29 @@
 Provides functions for analysing windings
 """
 import numpy as np
-import fractions
 import math
-from collections import Counter, deque
+
+from swat_em import numbertheory
+from swat_em.layout import WindingLayout
 
 
 def calc_q(Q, p, m):
-    return fractions.Fraction(Q / (m * 2 * p)).limit_denominator(100)
+    return numbertheory.calc_q(Q, 2 * p, m)
 
 
 def get_basic_characteristics(Q, P, m, S, turns=1, Qes=0):
-    q = fractions.Fraction((Q - Qes) / (m * P)).limit_denominator(100)
+    q = numbertheory.calc_q(Q, P, m, Qes)
 
-    S2 = _flatten(S)
-    if hasattr(turns, "__iter__"):
-        turns = _flatten(turns)
-    for k in range(len(S2)):
-        idx = np.argsort(np.abs(S2[k]))
-        S2[k] = np.array(S2[k])[idx]
-        if hasattr(turns, "__iter__"):
-            turns[k] = np.array(turns[k])[idx]
-    Ei, kw = calc_star(Q, S2, turns, P / 2, 1)
+    layout = pad_layout(S, turns)
+    Ei, kw = calc_star_batch(Q, layout, P / 2, [1])
+    Ei = unpad(Ei, layout)[0]
+    kw = list(kw[0])
 
     a = wdg_get_periodic([Ei], S)
     a = a[0]  # phase 1
     sym = wdg_is_symmetric([Ei], m)
-    t = math.gcd(int(Q), int(P / 2))
-    lcmQP = int(np.lcm(int(Q), int(P)))
+    t = numbertheory.gcd(Q, P / 2)
+    lcmQP = numbertheory.lcm(Q, P)
     valid, error = check_number_of_coilsides(S)
     if not valid:
         sym = False
@@ -37,6 +33,101 @@ def get_basic_characteristics(Q, P, m, S, turns=1, Qes=0):
     return bc
 
 
+def screen_winding(Q, P, m, S, Qes=0, num_modes=4, N_nu=1800):
+    """
+    Calculates only the characteristics which are needed to compare
+    many windings (for example in the combination sniffer). The results
+    are the same as the ones of datamodel.get_basic_characteristics(),
+    but the cheapest exact method is used for each of them:
+
+    - kw1, sym and a from the slot voltage vectors of the fundamental
+    - t from the periodicity of the slot matrix
+    - sigma_d from the steps of the MMF (Parseval's theorem)
+    - r1 from the spectrum of the squared MMF, which is a piecewise
+      constant function as well (see MMF.square_harmonics)
+
+    Parameters
+    ----------
+    Q :         integer
+                number of slots
+    P :         integer
+                number of poles
+    m :         integer
+                number of phases
+    S :         list of lists or WindingLayout
+                winding layout
+    Qes :       integer
+                number of empty slots
+    num_modes : integer
+                number of radial force modes which are considered
+                (see calc_radial_force_modes_from_harmonics)
+    N_nu :      integer
+                number of MMF harmonics of the full analysis; the
+                spectrum of the squared MMF is evaluated up to N_nu/2
+
+    Returns
+    -------
+    return : dict
+             "q", "kw1" (fundamental winding factor of phase 1), "a",
+             "sym", "t", "lcmQP", "r1" (first radial force mode, 0 if
+             there is none) and "sigma_d"
+    """
+    if not isinstance(S, WindingLayout):
+        S = WindingLayout.from_phases(S)
+    layout = pad_layout(S)
+    Ei, kw = calc_star_batch(Q, layout, P / 2, [1])
+    Ei = unpad(Ei, layout)
+    sym = wdg_is_symmetric(Ei, m) and check_number_of_coilsides(S)[0]
+
+    layers = S.slot_matrix(Q)[: 2 if np.any(S.layer > 0) else 1]
+    layers[np.abs(layers) > m] = 0
+
+    p = P // 2
+    mmf = MMF(Q, calc_slot_currents(Q, m, S, layout=layout))
+    C1 = np.abs(mmf.harmonics(p + 1)[p])
+    if np.sum(layout[1]) == 0 or C1 == 0:
+        sigma_d = -1
+    else:
+        sigma_d = 2 * np.mean(mmf.levels**2) / C1**2 - 1
+    A = np.abs(mmf.square_harmonics(N_nu // 2 + 1))
+    modes = _select_radial_force_modes(A, m, num_modes)
+
+    return {
+        "q": numbertheory.calc_q(Q, P, m, Qes),
+        "kw1": float(kw[0][0]),
+        "a": wdg_get_periodic(Ei, S)[0],
+        "sym": sym,
+        "t": calc_num_basic_windings_t(layers),
+        "lcmQP": numbertheory.lcm(Q, P),
+        "r1": modes[0] if len(modes) > 0 else 0,
+        "sigma_d": sigma_d,
+    }
+
+
+def calc_num_basic_windings_t(layers):
+    """
+    Calculates the number of basic windings 't' of a winding layout
+
+    Parameters
+    ----------
+    layers : 2D ndarray
+             signed phase number for every layer and every slot (see
+             datamodel.get_layers)
+
+    Returns
+    -------
+    return : integer
+             periodicity of the winding layout
+    """
+    Q = layers.shape[1]
+    # The layout is built of t equal basic windings if it is periodic
+    # with Q/t slots. The smallest period gives the largest t.
+    for length in numbertheory.divisors(Q)[1:-1]:
+        if np.array_equal(layers[:, : Q - length], layers[:, length:]):
+            return Q // length
+    return 1
+
+
 def double_linked_leakage(kw, nu, p):
     """
     Returns the coefficient of the double linkead leakage flux.
@@ -75,7 +166,7 @@ def wdg_get_periodic(Ei, S):
     Ei :     list of lists of lists
              voltage vectors for every phase and every slot
              Ei[nu][phase][slot]
-    S :      list of lists
+    S :      list of lists or WindingLayout
              winding layout
 
     Returns
@@ -90,37 +181,42 @@ def wdg_get_periodic(Ei, S):
     if len(Ei[0]) == 0:
         return 1
 
-    periodic = []
-    # for each phase
+    # group the phases by the number of coil sides, so that all
+    # rotations of all phases of a group are checked at once
+    S = _flatten(S)
+    periodic = [1] * len(S)
+    groups = {}
     for km in range(len(S)):
-        ei = Ei[0][km]  # only for fundamental
-        S2 = S[km]
-        S2 = [item for sublist in S2 for item in sublist]  # flatten layers
-        ei_pos = []
-        ei_neg = []
-        for i, s in enumerate(S2):
-            if s > 0:
-                ei_pos.append(ei[i])  # phasors of pos. coil sides
-            else:
-                ei_neg.append(ei[i])
+        ei = np.asarray(Ei[0][km]).ravel()  # only for fundamental
+        S2 = np.asarray(S[km])
+        ei_pos = ei[S2 > 0]  # phasors of pos. coil sides
+        ei_neg = ei[S2 <= 0]
         if len(ei_pos) != len(ei_neg):
-            periodic.append(1)
+            continue
+        if len(ei_pos) == 0:
+            periodic[km] = 0
         else:
-            a_max = 0
-            #  a_list = [1]
-            for k in range(
-                len(ei_pos)
-            ):  # all combinations of connections of coil sides
-                #                angles = np.angle(ei_pos + np.roll(ei_neg, k))
-                d = deque(ei_neg)
-                d.rotate(k)
-                angles = np.angle(ei_pos + np.array(d))
-                angles = np.round(angles, 4)
-                c = Counter(angles)
-                a = min(c.values())
-                if a > a_max:
-                    a_max = a
-            periodic.append(a_max)
+            groups.setdefault(len(ei_pos), []).append((km, ei_pos, ei_neg))
+
+    for n, group in groups.items():
+        km = [g[0] for g in group]
+        ei_pos = np.array([g[1] for g in group])
+        ei_neg = np.array([g[2] for g in group])
+        # all combinations of connections of coil sides:
+        # rotation k connects ei_pos[i] with ei_neg[(i-k) % n]
+        idx = (np.arange(n)[None, :] - np.arange(n)[:, None]) % n
+        angles = np.angle(ei_pos[:, None, :] + ei_neg[:, idx])
+        angles = np.sort(np.round(angles, 4), axis=2).reshape(-1, n)
+        # smallest number of equal angles for each rotation (length of
+        # the shortest run in each sorted row)
+        start = np.ones(angles.shape, dtype=bool)
+        start[:, 1:] = angles[:, 1:] != angles[:, :-1]
+        start = np.flatnonzero(start)
+        runs = np.diff(np.append(start, angles.size))
+        a = np.minimum.reduceat(runs, np.flatnonzero(start % n == 0))
+        a = a.reshape(len(group), n).max(axis=1)
+        for k, val in zip(km, a):
+            periodic[k] = int(val)
     return periodic
 
 
@@ -199,7 +295,7 @@ def check_number_of_coilsides(S):
     l = [len(s) for s in S2]
     if len(set(l)) != 1:
         error = "Not all phases have the same number of coil sides:<br>"
-        for k in range(len(S)):
+        for k in range(len(S2)):
             error += "Phase {} hat {} coilsides<br>".format(k + 1, l[k])
     return valid, error
 
@@ -222,48 +318,138 @@ def calc_phaseangle_starvoltage(Ei):
     return seqeunce:   list
                        sequence of the flux wave: 1 or -1
     """
-    sequence = []
-    phaseangle = []
-    for knu in Ei:  # for every nu
-        phaseangle.append([])
-        kmSum = [sum(km) for km in knu] # get the sum phasor for every phase
-        angle = [np.angle(kPhase) * 180 / np.pi for kPhase in kmSum] # calculate the phasor angle for every phase
-        if len(angle) > 1:
-            # if phasor of w(=kmSum[2]) nearly equals phasor of u shifted by 120deg (=kmSum[0]*np.exp(1j*2*np.pi/3); 
-            # mathematically positive), then the phase order is inverted (uwv instead of uvw) and 
-            # the rotation direction is clockwise
-            if np.abs(kmSum[2]-kmSum[0]*np.exp(1j*2*np.pi/3))<1e-9: 
-                sequence.append(-1) # math. negative
-            else:
-            # otherwise its counter clockwise
-                sequence.append(1) # math. positive
-        else:
-            sequence.append(0)
-        for a in angle:
-            while a < 0:
-                a += 360.0
-            phaseangle[-1].append(a)
+    if len(Ei) == 0:
+        return [], []
+    # get the sum phasor for every phase
+    if isinstance(Ei, np.ndarray):
+        kmSum = np.sum(Ei, axis=2)
+    else:
+        kmSum = np.array([[sum(km) for km in knu] for knu in Ei], dtype=complex)
+    angle = np.angle(kmSum) * 180 / np.pi  # phasor angle for every phase
+    if kmSum.shape[1] > 1:
+        # if phasor of w(=kmSum[2]) nearly equals phasor of u shifted by 120deg (=kmSum[0]*np.exp(1j*2*np.pi/3);
+        # mathematically positive), then the phase order is inverted (uwv instead of uvw) and
+        # the rotation direction is clockwise (math. negative),
+        # otherwise its counter clockwise (math. positive)
+        inverted = np.abs(kmSum[:, 2] - kmSum[:, 0] * np.exp(1j * 2 * np.pi / 3)) < 1e-9
+        sequence = [-1 if inv else 1 for inv in inverted]
+    else:
+        sequence = [0] * len(kmSum)
+    angle[angle < 0] += 360.0
+    phaseangle = [list(a) for a in angle]
     return phaseangle, sequence
 
 
-def calc_kw(Q, S, turns, p, N_nu, config):
+def calc_winding_spectrum(Q, S, turns=1, layout=None):
     """
-    Calculates the windingfactor, the slot voltage vectors. The
-    harmonic numbers are generated automatically.
+    Calculates the spectrum of the conductor distribution of every phase.
+    For a given harmonic number the sum of the slot voltage vectors of a
+    phase is a discrete fourier transform of the signed number of turns
+    over the Q slots. So one FFT per phase provides the sum phasors for
+    all harmonic numbers.
 
     Parameters
     ----------
     Q :      integer
              number of slots
-    S :      list of lists
+    S :      list of lists or WindingLayout
              winding layout
     turns :  number or list of lists (shape of 'S')
              number of turns. If turns is a list of lists, for each
              coil side a specific number of turns is used
-    p :      integer
-             number of pole pairs
-    N_nu:    integer
-             length of the harmonic number vector
+    layout : tuple
+             padded array layout of 'S' and 'turns' (see pad_layout).
+             Calculated if not given.
+
+    Returns
+    -------
+    return C:    2D complex ndarray
+                 sum phasor for every phase and every spatial order
+                 k = nu*p (periodic with Q): C[phase][k % Q]
+    return norm: 1D ndarray
+                 sum of the absolute number of turns for every phase
+    """
+    if layout is None:
+        layout = pad_layout(S, turns)
+    slots, turn, mask = layout
+    m = slots.shape[0]
+    c = np.zeros((m, Q))
+    # padded coil sides have zero turns
+    rows = np.repeat(np.arange(m), slots.shape[1])
+    np.add.at(c, (rows, np.abs(slots).ravel() % Q), np.where(slots < 0, -turn, turn).ravel())
+    norm = np.sum(np.abs(turn), axis=1)
+    # sum(c * exp(+j*2*pi*k*s/Q)) is the conjugate of the FFT for real c
+    C = np.conj(np.fft.fft(c, axis=1))
+    return C, norm
+
+
+def calc_kw_spectrum(Q, spectrum, p, nu):
+    """
+    Returns the sum phasors and the winding factors for the given
+    harmonic numbers from the spectrum of the conductor distribution
+    (see calc_winding_spectrum)
+
+    Parameters
+    ----------
+    Q :        integer
+               number of slots
+    spectrum : tuple
+               return value of calc_winding_spectrum()
+    p :        integer
+               number of pole pairs
+    nu:        array_like
+               harmonic numbers
+
+    Returns
+    -------
+    return E:  2D complex ndarray
+               sum phasor for every harmonic number and every phase
+               E[nu][phase]
+    return kw: 2D ndarray
+               winding factor (absolute value) for every harmonic number
+               and every phase; kw[nu][phase]
+    """
+    C, norm = spectrum
+    k = np.asarray(nu) * p
+    if np.all(k == np.round(k)):
+        E = C[:, np.round(k).astype(int) % Q].T
+    else:
+        # fractional orders aren't periodic with Q -> evaluate directly
+        c = np.real(np.fft.ifft(np.conj(C), axis=1))
+        pos = np.arange(Q)
+        pos[0] = Q
+        E = np.exp(2j * np.pi / Q * np.outer(k, pos)) @ c.T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        kw = np.where(norm > 0, np.abs(E) / norm, 0.0)
+    return E, kw
+
+
+def calc_kw(Q, S, turns, p, N_nu, config, spectrum=None, layout=None):
+    """
+    Calculates the windingfactor, the slot voltage vectors. The
+    harmonic numbers are generated automatically.
+
+    Parameters
+    ----------
+    Q :        integer
+               number of slots
+    S :        list of lists or WindingLayout
+               winding layout
+    turns :    number or list of lists (shape of 'S')
+               number of turns. If turns is a list of lists, for each
+               coil side a specific number of turns is used
+    p :        integer
+               number of pole pairs
+    N_nu:      integer
+               length of the harmonic number vector
+    spectrum : tuple
+               spectrum of the conductor distribution (see
+               calc_winding_spectrum). The spectrum does not depend on
+               'p', so the same one can be used for the electrical and
+               the mechanical winding factor. Calculated if not given.
+    layout :   tuple
+               padded array layout of 'S' and 'turns' (see pad_layout).
+               Calculated if not given.
 
     Returns
     -------
@@ -276,40 +462,130 @@ def calc_kw(Q, S, turns, p, N_nu, config):
                winding factor for every phase. The sign defines the
                direction of the flux wave
                wf[nu][phase]
+    return phaseangle: list of lists
+               phaseangle for every harmonic number and every phase
+               phaseangle[nu][phase]
     """
-    #  S = [item for sublist in S for item in sublist]  # flatten layers
-    nu = []  # order
-    wf = []  # winding factor
-    Ei = []  # slot voltage vectors
+    return calc_windingfactors(
+        Q, S, turns, p, N_nu, config, spectrum=spectrum, layout=layout
+    ).to_lists()
 
-    S2 = _flatten(S)
-    if hasattr(turns, "__iter__"):
-        turns = _flatten(turns)
-    for k in range(len(S2)):
-        idx = np.argsort(np.abs(S2[k]))
-        S2[k] = np.array(S2[k])[idx]
-        if hasattr(turns, "__iter__"):
-            turns[k] = np.array(turns[k])[idx]
-
-    k = 1
-    while len(wf) < N_nu:
-        a, b = calc_star(Q, S2, turns, p, k)
-        if np.all(np.abs(b) > config["kw_min"]):
-            nu.append(k)
-            wf.append(b)
-            Ei.append(a)
-        k += 1
-        if k > 10000:  # break infinity loop if there is no relevant
-            break  # windingfactor of the actual winding layout
 
-    phase, sequence = calc_phaseangle_starvoltage(Ei)
-    for k in range(len(sequence)):
-        wf[k] = [sequence[k] * s if sequence[k] != 0 else s for s in wf[k]]
+class WindingFactors:
+    """
+    Winding factors, slot voltage vectors and phase angles of the
+    relevant harmonic numbers as dense arrays (see calc_windingfactors)
+
+    Attributes
+    ----------
+    nu :         1D ndarray (int)
+                 harmonic numbers, nu[k]
+    Ei :         3D ndarray (complex)
+                 voltage vectors of every coil side, Ei[k][phase][side]
+                 (0 for padding)
+    kw :         2D ndarray (float)
+                 winding factor for every phase, kw[k][phase]. The sign
+                 defines the direction of the flux wave
+    phaseangle : 2D ndarray (float)
+                 phase angle for every phase in degree,
+                 phaseangle[k][phase]
+    mask :       2D ndarray (bool)
+                 True for a coil side, False for padding,
+                 mask[phase][side]
+    """
+
+    __slots__ = ("nu", "Ei", "kw", "phaseangle", "mask")
 
-    return nu, Ei, wf, phase
+    def __init__(self, nu, Ei, kw, phaseangle, mask):
+        self.nu = np.asarray(nu, dtype=int)
+        self.Ei = np.asarray(Ei, dtype=complex)
+        self.mask = np.asarray(mask, dtype=bool)
+        m = self.mask.shape[0]
+        self.kw = np.asarray(kw, dtype=float).reshape(len(self.nu), m)
+        self.phaseangle = np.asarray(phaseangle, dtype=float).reshape(len(self.nu), m)
 
+    def get_Ei(self):
+        """
+        Returns the slot voltage vectors in the nested list format
+        Ei[nu][phase][slot] without padding
+        """
+        return unpad(self.Ei, (None, None, self.mask))
 
-def calc_kw_by_nu(Q, S, turns, p, nu):
+    def to_lists(self):
+        """
+        Returns the results in the list format of calc_kw:
+        nu, Ei, wf, phaseangle
+        """
+        return (
+            self.nu.tolist(),
+            self.get_Ei(),
+            self.kw.tolist(),
+            self.phaseangle.tolist(),
+        )
+
+    def __len__(self):
+        return len(self.nu)
+
+    def __eq__(self, other):
+        if not isinstance(other, WindingFactors):
+            return NotImplemented
+        return (
+            self.Ei.shape == other.Ei.shape
+            and np.array_equal(self.nu, other.nu)
+            and np.array_equal(self.mask, other.mask)
+            and np.allclose(self.kw, other.kw)
+            and np.allclose(self.Ei, other.Ei)
+            and np.allclose(self.phaseangle, other.phaseangle)
+        )
+
+    def __repr__(self):
+        return "WindingFactors(nu={})".format(self.nu.tolist())
+
+
+def calc_windingfactors(Q, S, turns, p, N_nu, config, spectrum=None, layout=None):
+    """
+    Calculates the windingfactor, the slot voltage vectors and the
+    phase angles like calc_kw, but returns dense arrays
+
+    Parameters
+    ----------
+    see calc_kw
+
+    Returns
+    -------
+    return : WindingFactors
+    """
+    if layout is None:
+        layout = pad_layout(S, turns)
+    if spectrum is None:
+        spectrum = calc_winding_spectrum(Q, S, turns, layout=layout)
+
+    # harmonic numbers up to 10000 (break if there is no relevant
+    # windingfactor of the actual winding layout)
+    if p == int(p):
+        # nu and nu + Q/gcd(Q, p) have the same winding factor
+        period = Q // numbertheory.gcd(Q, p)
+        _, kw_all = calc_kw_spectrum(Q, spectrum, p, np.arange(1, period + 1))
+        res = np.nonzero(np.all(kw_all > config["kw_min"], axis=1))[0] + 1
+        reps = -(-N_nu // len(res)) if len(res) > 0 else 0
+        nu = (res + period * np.arange(reps)[:, np.newaxis]).ravel()[:N_nu]
+        nu = nu[nu <= 10000]
+        idx = (nu - 1) % period
+    else:
+        nu = np.arange(1, 10001)
+        _, kw_all = calc_kw_spectrum(Q, spectrum, p, nu)
+        idx = np.nonzero(np.all(kw_all > config["kw_min"], axis=1))[0][:N_nu]
+        nu = nu[idx]
+
+    # slot voltage vectors only for the relevant harmonic numbers
+    Ei, _ = calc_star_batch(Q, layout, p, nu)
+    phase, sequence = calc_phaseangle_starvoltage(Ei)
+    sequence = np.array(sequence, dtype=float).reshape(-1, 1)
+    kw = kw_all[idx] * np.where(sequence != 0, sequence, 1.0)
+    return WindingFactors(nu, Ei, kw, phase, layout[2])
+
+
+def calc_kw_by_nu(Q, S, turns, p, nu, layout=None):
     """
     Calculates the windingfactor for the given harmonic number
 
@@ -317,7 +593,7 @@ def calc_kw_by_nu(Q, S, turns, p, nu):
     ----------
     Q :      integer
              number of slots
-    S :      list of lists
+    S :      list of lists or WindingLayout
              winding layout
     turns :  number or list of lists (shape of 'S')
              number of turns. If turns is a list of lists, for each
@@ -326,6 +602,9 @@ def calc_kw_by_nu(Q, S, turns, p, nu):
              number of pole pairs
     nu:      integer
              harmonic number
+    layout : tuple
+             padded array layout of 'S' and 'turns' (see pad_layout).
+             Calculated if not given.
 
     Returns
     -------
@@ -339,23 +618,13 @@ def calc_kw_by_nu(Q, S, turns, p, nu):
                direction of the flux wave
                wf[nu][phase]
     """
-    wf = []  # winding factor
-    Ei = []  # slot voltage vectors
     if not test_phases(S):
         return None
+    if layout is None:
+        layout = pad_layout(S, turns)
 
-    S2 = _flatten(S)
-    if hasattr(turns, "__iter__"):
-        turns = _flatten(turns)
-    for k in range(len(S2)):
-        idx = np.argsort(np.abs(S2[k]))
-        S2[k] = np.array(S2[k])[idx]
-        if hasattr(turns, "__iter__"):
-            turns[k] = np.array(turns[k])[idx]
-
-    a, b = calc_star(Q, S2, turns, p, nu)
-    wf.append(b)
-    Ei.append(a)
+    Ei, kw = calc_star_batch(Q, layout, p, [nu])
+    wf = [list(kw[0])]  # winding factor
 
     phase, sequence = calc_phaseangle_starvoltage(Ei)
     for k in range(len(sequence)):
@@ -370,6 +639,8 @@ def test_phases(S):
     """
     if S is None:
         return None
+    if isinstance(S, WindingLayout):
+        S = S.to_phases()
     valid = True
     for km in range(len(S)):
         if len(S[km][0]) == 0 and len(S[km][0]) == 0:
@@ -377,6 +648,104 @@ def test_phases(S):
     return valid
 
 
+def pad_layout(S, turns=1):
+    """
+    Converts the winding layout into a padded array layout. The coil
+    sides of every phase are flattened over all layers and sorted by
+    the slot number. Phases with less coil sides are filled up with
+    zeros.
+
+    Parameters
+    ----------
+    S :      list of lists or WindingLayout
+             winding layout
+    turns :  number or list of lists (shape of 'S')
+             number of turns. If turns is a list of lists, for each
+             coil side a specific number of turns is used. Not used if
+             'S' is a WindingLayout.
+
+    Returns
+    -------
+    return slots: 2D ndarray (int)
+                  signed slot number of every coil side, slots[phase][side]
+                  (0 for padding)
+    return turns: 2D ndarray (float)
+                  number of turns of every coil side (0 for padding)
+    return mask:  2D ndarray (bool)
+                  True for a coil side, False for padding
+    """
+    S2 = _flatten(S)
+    if isinstance(S, WindingLayout):
+        turns = [S.get_turns(km) for km in range(S.num_phases)]
+        turns2 = turns
+    elif hasattr(turns, "__iter__"):
+        turns2 = _flatten(turns)
+    m = len(S2)
+    n = max([len(s) for s in S2] + [0])
+    slots = np.zeros((m, n), dtype=int)
+    turns_arr = np.zeros((m, n))
+    mask = np.zeros((m, n), dtype=bool)
+    for km in range(m):
+        s = np.asarray(S2[km], dtype=int)
+        if hasattr(turns, "__iter__"):
+            t = np.asarray(turns2[km], dtype=float)
+        else:
+            t = np.full(len(s), turns, dtype=float)
+        idx = np.argsort(np.abs(s))
+        slots[km, : len(s)] = s[idx]
+        turns_arr[km, : len(s)] = t[idx]
+        mask[km, : len(s)] = True
+    return slots, turns_arr, mask
+
+
+def unpad(Ei, layout):
+    """
+    Converts slot voltage vectors from calc_star_batch() into the
+    nested list format Ei[nu][phase][slot] without padding.
+    """
+    mask = layout[2]
+    if np.all(mask):
+        return [list(E) for E in Ei]
+    return [[E[km, mask[km]] for km in range(len(mask))] for E in Ei]
+
+
+def calc_star_batch(Q, layout, p, nu):
+    """
+    Calculates the slot voltage vectors for all phases and all given
+    harmonic numbers at once
+
+    Parameters
+    ----------
+    Q :      integer
+             number of slots
+    layout : tuple
+             padded array layout of the winding (see pad_layout)
+    p :      integer
+             number of pole pairs
+    nu:      list or array
+             harmonic numbers for calculation
+
+    Returns
+    -------
+    return Ei: 3D ndarray
+               voltage vectors for every harmonic number, every phase
+               and every coil side, Ei[nu][phase][side] (0 for padding)
+    return kw: 2D ndarray
+               winding factor (absolute value) for every harmonic
+               number and every phase, kw[nu][phase]
+    """
+    slots, turns, mask = layout
+    nu = np.asarray(nu, dtype=float)[:, np.newaxis, np.newaxis]
+    alpha = 2.0 * nu * p * np.pi / Q * np.abs(slots)
+    alpha += np.pi * (slots < 0)
+    Ei = turns * np.exp(1j * alpha)
+    E = np.sum(Ei, axis=2)
+    norm = np.sum(np.abs(Ei), axis=2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        kw = np.where(E != 0.0, np.abs(E) / norm, 0.0)
+    return Ei, kw
+
+
 def calc_star(Q, S, turns, p, nu):
     """
     Calculates the slot voltage vectors for the given winding layout
@@ -385,7 +754,7 @@ def calc_star(Q, S, turns, p, nu):
     ----------
     Q :      integer
              number of slots
-    S :      list of lists
+    S :      list of lists or WindingLayout
              winding layout
     turns :  number or list of lists (shape of 'S')
              number of turns. If turns is a list of lists, for each
@@ -404,6 +773,9 @@ def calc_star(Q, S, turns, p, nu):
                winding factor (absolute value) for every phase
                kw[phase]
     """
+    if isinstance(S, WindingLayout):
+        turns = [S.get_turns(km) for km in range(S.num_phases)]
+        S = [S.get_slots(km) for km in range(S.num_phases)]
     S2 = S
     Ei = []
     kw = []
@@ -419,6 +791,162 @@ def calc_star(Q, S, turns, p, nu):
     return Ei, kw
 
 
+def calc_slot_currents(Q, m, S, turns=1, angle=0, layout=None):
+    """
+    Calculates the current linkage (effective current) in every slot
+    for a symmetric current system
+
+    Parameters
+    ----------
+    Q :      integer
+             number of slots
+    m :      integer
+             number of phases
+    S :      list of lists or WindingLayout
+             winding layout
+    turns :  number or list of lists (shape of 'S')
+             number of turns. If turns is a list of lists, for each
+             coil side a specific number of turns is used
+    angle:   float
+             actual phase of the current system in deg
+    layout : tuple
+             padded array layout of 'S' and 'turns' (see pad_layout).
+             Calculated if not given.
+
+    Returns
+    -------
+    return theta: 1D ndarray
+                  effective current for each slot
+    """
+    if layout is None:
+        layout = pad_layout(S, turns)
+    slots, turn, mask = [a[:m] for a in layout]
+
+    km = 2 if m % 2 == 0 else 1
+    I = np.cos(2 * np.pi / (m * km) * np.arange(m) - angle / 180 * np.pi)
+    I = np.broadcast_to(I[: len(slots), np.newaxis], slots.shape)
+    theta = np.zeros(Q)
+    idx = np.abs(slots[mask])
+    idx[idx > Q] -= Q
+    VZ = np.sign(slots[mask])
+    np.add.at(theta, idx - 1, VZ * I[mask] * turn[mask])
+    return theta
+
+
+class MMF:
+    def __init__(self, Q, theta):
+        """
+        Magneto-motive force (MMF) of a winding. The MMF is a piecewise
+        constant function with a step at every slot, so only the
+        Q slot positions and the cumulative slot currents are stored.
+        Samples are created on demand.
+
+        Parameters
+        ----------
+        Q :      integer
+                 number of slots
+        theta :  array_like
+                 effective current for each slot (see calc_slot_currents)
+        """
+        self.Q = Q
+        self.theta = np.asarray(theta, dtype=float)
+        # MMF between slot k and slot k+1 (mean value free)
+        self.levels = np.cumsum(self.theta)
+        self.levels -= np.mean(self.levels)
+
+    def sample(self, N=3601):
+        """
+        Returns the MMF at N equidistant points of the circumference
+
+        Parameters
+        ----------
+        N :      integer
+                 number of values for the MMF curve
+
+        Returns
+        -------
+        return phi: 1D ndarray
+                    circumferential position in slots (0...Q)
+        return MMK: 1D ndarray
+                    MMF curve
+        """
+        phi = np.linspace(0, 2 * np.pi, N)
+        breakpoints = 2 * np.pi / self.Q * np.arange(self.Q)
+        idx = np.searchsorted(breakpoints, phi, side="right") - 1
+        MMK = self.levels[idx]
+        phi = phi / np.max(phi) * self.Q
+        return phi, MMK
+
+    def steps(self):
+        """
+        Returns the corner points of the MMF curve. This is an exact
+        representation of the MMF with 2*Q points (for plotting).
+
+        Returns
+        -------
+        return x: 1D ndarray
+                  circumferential position in slots (0...Q)
+        return y: 1D ndarray
+                  MMF
+        """
+        x = np.repeat(np.arange(self.Q + 1), 2)[1:-1]
+        y = np.repeat(self.levels, 2)
+        return x, y
+
+    def harmonics(self, N_nu):
+        """
+        Returns the complex Fourier coefficients of the MMF for the
+        ordinal numbers 0...N_nu-1 (mechanical). The coefficients are
+        calculated analytically from the steps of the MMF curve, so
+        there is no sampling error and no aliasing for high orders.
+        The scaling is the same as for DFT().
+
+        Parameters
+        ----------
+        N_nu :   integer
+                 number of harmonics
+
+        Returns
+        -------
+        return HA: 1D ndarray (complex)
+                   Fourier coefficients, HA[nu] belongs to the
+                   ordinal number nu
+        """
+        nu = np.arange(1, N_nu)
+        # step of theta[k] at position 2*pi*k/Q:
+        # HA(nu) = 1/(j*pi*nu) * sum(theta_k * (exp(-j*nu*2*pi*k/Q) - 1))
+        T = np.fft.fft(self.theta)
+        HA = np.zeros(max(N_nu, 0), dtype=complex)
+        HA[1:] = (T[nu % self.Q] - T[0]) / (1j * np.pi * nu)
+        return HA
+
+    def square_harmonics(self, N_nu):
+        """
+        Returns the complex Fourier coefficients of the squared MMF
+        (which is proportional to the radial force density) for the
+        ordinal numbers 0...N_nu-1. The squared MMF is a piecewise
+        constant function with the same steps, so the coefficients are
+        exact (see calc_radial_force_spectrum for the spectrum from the
+        MMF harmonics).
+
+        Parameters
+        ----------
+        N_nu :   integer
+                 number of harmonics
+
+        Returns
+        -------
+        return HA: 1D ndarray (complex)
+                   Fourier coefficients (same scaling as DFT()), HA[0]
+                   is the mean value of the squared MMF
+        """
+        square = self.levels**2
+        HA = MMF(self.Q, square - np.roll(square, 1)).harmonics(N_nu)
+        if len(HA) > 0:
+            HA[0] = np.mean(square)
+        return HA
+
+
 def calc_MMK(Q, m, S, turns=1, N=3601, angle=0):
     """
     Calculates the magneto-motoric force (MMK)
@@ -429,7 +957,7 @@ def calc_MMK(Q, m, S, turns=1, N=3601, angle=0):
              number of slots
     m :      integer
              number of phases
-    S :      list of lists
+    S :      list of lists or WindingLayout
              winding layout
     turns :  number or list of lists (shape of 'S')
              number of turns. If turns is a list of lists, for each
@@ -446,43 +974,67 @@ def calc_MMK(Q, m, S, turns=1, N=3601, angle=0):
     return theta: list
                   effective current for each slot
     """
-    S2 = _flatten(S)
-    if hasattr(turns, "__iter__"):
-        turns2 = _flatten(turns)
-    for k in range(len(S)):
-        idx = np.argsort(np.abs(S2[k]))
-        S2[k] = np.array(S2[k])[idx]
-        if hasattr(turns, "__iter__"):
-            turns2[k] = np.array(turns2[k])[idx]
+    theta = calc_slot_currents(Q, m, S, turns, angle=angle)
+    phi, MMK = MMF(Q, theta).sample(N)
+    return phi, MMK, theta
 
-    def h(x):
-        """step function"""
-        return np.where(x < 0.0, 0.0, 1.0)
 
-    phi = np.linspace(0, 2 * np.pi, N)
-    I = []
-    km = 2 if m % 2 == 0 else 1
-    for k in range(m):
-        I.append(np.cos(2 * np.pi / (m * km) * k - angle / 180 * np.pi))
-    theta = np.zeros(Q)
-    for k1 in range(m):
-        phase = S2[k1]
+def calc_MMF_harmonics(Q, theta, N_nu):
+    """
+    Calculates the harmonics of the magneto-motoric force (MMK) exactly
+    from the slot currents.
 
-        for k2 in range(len(phase)):
-            if hasattr(turns, "__iter__"):
-                turn = turns2[k1][k2]
-            else:
-                turn = turns
-            idx = np.abs(phase[k2])
-            idx = idx - Q if idx > Q else idx
-            VZ = np.sign(phase[k2])
-            theta[idx - 1] += VZ * I[k1] * turn
-    MMK = np.zeros(phi.shape)
-    for k in range(Q):
-        MMK += theta[k] * h(phi - 2 * np.pi / Q * k)
-    MMK -= np.mean(MMK[:-1])
-    phi = phi / np.max(phi) * Q
-    return phi, MMK, theta
+    Parameters
+    ----------
+    Q :      integer
+             number of slots
+    theta :  array_like
+             effective current for each slot (see calc_slot_currents)
+    N_nu :   integer
+             number of harmonics (ordinal numbers 0...N_nu-1)
+
+    Returns
+    -------
+    return nu:    1D ndarray
+                  ordinal number (mechanical)
+    return A:     1D ndarray
+                  amplitude corresponding to nu
+    return phase: 1D ndarray
+                  phaseangle corresponding to nu in range -pi...+pi
+    """
+    HA = MMF(Q, theta).harmonics(N_nu)
+    return np.arange(len(HA)), np.abs(HA), np.angle(HA)
+
+
+def calc_MMF_harmonic_curves(phi, nu, A, phase, greater_than):
+    """
+    Calculates the curves of the MMF harmonics for plotting
+
+    Parameters
+    ----------
+    phi :          1D ndarray
+                   circumferential position in slots (0...Q, see
+                   MMF.sample)
+    nu :           array_like
+                   ordinal numbers of the harmonics
+    A :            array_like
+                   amplitudes of the harmonics
+    phase :        array_like
+                   phaseangles of the harmonics
+    greater_than : float
+                   only the harmonics with an amplitude greater than
+                   greater_than * max(A) are returned
+
+    Returns
+    -------
+    return : list
+             tuples (nu, curve) with the curve of the harmonic at phi
+    """
+    curves = []
+    for n, a, p in zip(nu, A, phase):
+        if 1 / max(A) * a > greater_than:
+            curves.append((n, a * np.cos(n * phi / phi[-1] * 2 * np.pi + p)))
+    return curves
 
 
 def calc_radial_force_modes(MMK, m, num_modes=4):
@@ -505,7 +1057,15 @@ def calc_radial_force_modes(MMK, m, num_modes=4):
                   radial force modes
     """
     HA = np.abs(DFT(np.array(MMK[:-1]) ** 2))
+    return _select_radial_force_modes(HA, m, num_modes)
 
+
+def _select_radial_force_modes(HA, m, num_modes):
+    """
+    Returns the first 'num_modes' orders of the spectrum of the squared
+    MMF 'HA' (HA[0]: mean value) with an amplitude > 1% of the maximum
+    and the modes with a multiple of the phase-number
+    """
     HA_max = np.max(HA)
     modes = []
     for k in range(1, len(HA)):
@@ -527,6 +1087,94 @@ def calc_radial_force_modes(MMK, m, num_modes=4):
     return modes
 
 
+def calc_radial_force_spectrum(HA, threshold=0.001, mean_square=None):
+    """
+    Calculates the spectrum of the squared MMF (which is proportional
+    to the radial force density in the airgap) from the MMF harmonics.
+    The orders of the squared MMF are the sums and differences of the
+    orders of the MMF harmonics, so the spectrum is a convolution of
+    the MMF spectrum with itself. Only the harmonics above the
+    threshold are used (sparse convolution).
+
+    Parameters
+    ----------
+    HA :          array_like (complex)
+                  harmonics of the MMF, HA[nu] belongs to the ordinal
+                  number nu (see MMF.harmonics)
+    threshold :   float
+                  MMF harmonics with an amplitude smaller than
+                  threshold * max(abs(HA)) are neglected
+    mean_square : float
+                  mean value of the squared MMF. If not given it is
+                  calculated from the harmonics.
+
+    Returns
+    -------
+    return r:  1D ndarray
+               ordinal numbers of the squared MMF (0 is the mean
+               value) up to len(HA)/2
+    return A:  1D ndarray
+               amplitude corresponding to r (same scale as DFT())
+    """
+    HA = np.asarray(HA)
+    amp = np.abs(HA)
+    amp[0] = 0.0  # the MMF is mean value free
+    # (numerical noise only if the MMF vanishes)
+    nu = np.flatnonzero((amp > threshold * np.max(amp)) & (amp > 1e-10))
+    # two sided spectrum: c[nu] and conj(c[nu]) for -nu
+    c = HA[nu] / 2
+    d = np.zeros(max(2 * np.max(nu, initial=0), len(HA) // 2) + 1, dtype=complex)
+    # sum of the orders: c_a * c_b
+    np.add.at(d, np.add.outer(nu, nu).ravel(), np.outer(c, c).ravel())
+    # difference of the orders: c_a * conj(c_b) and conj(c_a) * c_b
+    diff = np.subtract.outer(nu, nu)
+    idx = diff > 0
+    np.add.at(d, diff[idx], 2 * np.outer(c, np.conj(c))[idx])
+    # for higher orders the harmonics above len(HA) are missing in the
+    # difference of the orders
+    A = 2 * np.abs(d[: len(HA) // 2 + 1])
+    A[0] = np.sum(np.abs(c) ** 2) * 2 if mean_square is None else mean_square
+    return np.arange(len(A)), A
+
+
+def calc_radial_force_modes_from_harmonics(
+    HA, m, num_modes=4, threshold=0.001, mean_square=None
+):
+    """
+    Calculates the radial force modes and their amplitudes from the
+    harmonics of the MMF (see calc_radial_force_spectrum). The results
+    includes also the modes with a multiple of the phase-number (which
+    aren't there if the machine is star-connected).
+
+    Parameters
+    ----------
+    HA :          array_like (complex)
+                  harmonics of the MMF, HA[nu] belongs to the ordinal
+                  number nu (see MMF.harmonics)
+    m :           integer
+                  number of phases
+    num_modes :   integer
+                  max. number of modes
+    threshold :   float
+                  relative threshold for the MMF harmonics
+    mean_square : float
+                  mean value of the squared MMF
+
+    Returns
+    -------
+    return modes:      list
+                       radial force modes
+    return amplitudes: list
+                       amplitude of each mode relative to the largest
+                       amplitude of the squared MMF (incl. mean value)
+    """
+    _, A = calc_radial_force_spectrum(HA, threshold, mean_square)
+    modes = _select_radial_force_modes(A, m, num_modes)
+    A_max = np.max(A)
+    amplitudes = [float(A[k] / A_max) if k < len(A) else 0.0 for k in modes]
+    return modes, amplitudes
+
+
 def DFT(vect):
     """
     Harmonic Analyses
@@ -570,23 +1218,58 @@ def _get_float(txt):
 
 
 def _flatten(l):
+    if isinstance(l, WindingLayout):
+        return [l.get_slots(km).tolist() for km in range(l.num_phases)]
     l2 = []
     for kl in l:
         l2.append([item for sublist in kl for item in sublist])
     return l2
 
 
-def Divisors(n):
+class _CircularSlotSet:
     """
-    returns a list of all divisors of the integer n
+    Set of slots (0...Q-1) on the circumference with fast search for
+    the next/previous slot of the set. Slots can only be removed.
+    (union-find with path compression)
     """
-    divisors = []
-    i = 1
-    while i <= n:
-        if n % i == 0:
-            divisors.append(i)
-        i = i + 1
-    return divisors
+
+    def __init__(self, Q, slots):
+        self.Q = Q
+        # _nxt[x] -> next candidate >= x, Q is the end
+        # _prv[x+1] -> previous candidate <= x, 0 is the end
+        self._nxt = list(range(Q + 1))
+        self._prv = list(range(Q + 1))
+        slots = set(slots)
+        for x in range(Q):
+            if x not in slots:
+                self.remove(x)
+
+    @staticmethod
+    def _find(parent, x):
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def remove(self, x):
+        self._nxt[x] = x + 1
+        self._prv[x + 1] = x
+
+    def next(self, x):
+        """first slot of the set in positive direction from x (incl. x)"""
+        y = self._find(self._nxt, x)
+        if y == self.Q:
+            y = self._find(self._nxt, 0)
+        return y
+
+    def prev(self, x):
+        """first slot of the set in negative direction from x (incl. x)"""
+        y = self._find(self._prv, x + 1) - 1
+        if y < 0:
+            y = self._find(self._prv, self.Q) - 1
+        return y
 
 
 class create_wdg_overhang:
@@ -596,13 +1279,15 @@ class create_wdg_overhang:
 
         Parameters
         ----------
-        S :                     list of lists
+        S :                     list of lists or WindingLayout
                                 winding layout
         Q :                     integer
                                 number of slots
         num_layers :            integer
                                 number winding layers
         """
+        if isinstance(S, WindingLayout):
+            S = S.to_phases()
         self.S = S
         self.Q = Q
         self.num_layers = num_layers
@@ -723,12 +1408,17 @@ class create_wdg_overhang:
                  layer: tuple of the layer of 'from_slot' and 'to_slot'
         """
         self.w = w
+        steps = []
         if w is not None:
             if hasattr(self.w, "__iter__"):
                 self.w = list(self.w)
             else:
                 self.w = list([self.w])
             self.w.sort()
+            # only integer steps up to Q/2 are possible coil spans
+            steps = sorted(
+                {int(d) for d in self.w if d == int(d) and 0 <= d <= self.Q / 2}
+            )
 
         def get_connection(Sp, Sn, layer):
             """
@@ -740,50 +1430,139 @@ class create_wdg_overhang:
                 print("Number of positive and negative coils sides must be equal")
                 return []
 
+            Q = self.Q
+            # remaining negative coil sides for each slot (0...Q-1)
+            free = {}
+            for i, s in enumerate(Sn):
+                free.setdefault((s - 1) % Q, []).append(i)
+            slots = _CircularSlotSet(Q, free.keys())
+
             con = []
             for kp in range(len(Sp)):
-                dist_slots, direct = self.get_dist_in_slots(Sp[kp], Sn)
-                dist_min = np.argsort(dist_slots)  # idx
-
-                idx = -1
-                if w is None:
-                    idx = dist_min[0]
-
-                    # prefer positive direction
-                    if direct[idx] < 0:
-                        for i in range(1, len(dist_min)):
-                            if dist_min[i] == dist_min[0] and direct[i] > 0:
-                                idx = i
-                                break
-                else:
+                s = (Sp[kp] - 1) % Q
+                cand = []
+                if w is not None:
                     # shortest step
-                    for i in dist_min:
-                        if dist_slots[i] in self.w:
-                            idx = i
+                    for d in steps:
+                        cand = [x for x in {(s + d) % Q, (s - d) % Q} if x in free]
+                        if cand:
                             break
 
                     # is there a step available in positive direction?
                     # this is not applicable for tooth coil windin
                     if self.num_layers == 1 and self.w != [1]:
-                        dist_min2 = []
-                        for i in dist_min:
-                            if dist_slots[i] in self.w:
-                                dist_min2.append(i)
-                        for i in dist_min2:
-                            if direct[i] > 0:
-                                idx = i
+                        for d in steps:
+                            if d > 0 and (s + d) % Q in free:
+                                cand = [(s + d) % Q]
                                 break
 
-                if idx == -1:
-                    idx = dist_min[0]  # fallback
-                    #  print('fallback')
+                if not cand:
+                    # nearest coil side in both directions (or fallback)
+                    nxt, prv = slots.next(s), slots.prev(s)
+                    dist = [min((x - s) % Q, (s - x) % Q) for x in (nxt, prv)]
+                    cand = [x for x, d in zip((nxt, prv), dist) if d == min(dist)]
+
+                # equal distance: first remaining coil side (same as a
+                # stable sort of the distances)
+                x = min(cand, key=lambda x: free[x][0])
+                idx = free[x].pop(0)
+                if not free[x]:
+                    del free[x]
+                    slots.remove(x)
 
                 start, end = Sp[kp], Sn[idx]
                 diff, direct = self.diff_and_direct(start, end)
                 con.append([(start, end), diff, direct, layer])
-                Sn = np.delete(Sn, idx)
             return con
 
+        return self._connect_phases(get_connection)
+
+    def get_optimal_overhang(self):
+        """
+        Returns the winding overhang with the minimum total length of
+        the end windings (sum of all coil spans) for each phase and
+        each pair of layers.
+
+        The positive and negative coil sides are on a circle. b(x) is
+        the number of positive minus the number of negative coil sides
+        up to slot x. If c coils pass the gap between the last and the
+        first slot in positive direction, b(x) - c coils pass the gap
+        after slot x, so the total length is sum(|b(x) - c|). This is
+        minimal for the median c of b(x). The circle is cut at a gap
+        without any coil and the coil sides are connected along the
+        line with a stack (nearest open coil side of opposite sign).
+
+        Returns
+        -------
+        return : list
+                 Winding connections for all phases (same format as
+                 get_overhang())
+
+        Raises
+        ------
+        ValueError
+            if the number of positive and negative coil sides of a
+            phase and pair of layers is different (there is no complete
+            connection)
+        """
+
+        def get_connection(Sp, Sn, layer):
+            if len(Sp) != len(Sn):
+                raise ValueError(
+                    "Number of positive and negative coil sides must be equal "
+                    "(layers {}: {} positive, {} negative)".format(
+                        layer, len(Sp), len(Sn)
+                    )
+                )
+            if len(Sp) == 0:
+                return []
+
+            Q = self.Q
+            b = np.zeros(Q, dtype=int)
+            np.add.at(b, (Sp - 1) % Q, 1)
+            np.add.at(b, (Sn - 1) % Q, -1)
+            b = np.cumsum(b)
+            c = np.sort(b)[(Q - 1) // 2]
+            cut = np.flatnonzero(b == c)[0]
+
+            # coil sides for each slot: (+1, index in Sp), (-1, index in Sn)
+            sides = [[] for k in range(Q)]
+            for i, s in enumerate(Sp):
+                sides[(s - 1) % Q].append((1, i))
+            for i, s in enumerate(Sn):
+                sides[(s - 1) % Q].append((-1, i))
+
+            partner = [0] * len(Sp)
+            stack = []
+            for k in range(cut + 1, cut + 1 + Q):
+                cs = sides[k % Q]
+                # first close the open coils, then open new ones
+                if stack:
+                    cs = sorted(cs, key=lambda x: x[0] == stack[-1][0])
+                for sign, i in cs:
+                    if stack and stack[-1][0] != sign:
+                        _, j = stack.pop()
+                        if sign > 0:
+                            partner[i] = j
+                        else:
+                            partner[j] = i
+                    else:
+                        stack.append((sign, i))
+
+            con = []
+            for kp in range(len(Sp)):
+                start, end = Sp[kp], Sn[partner[kp]]
+                diff, direct = self.diff_and_direct(start, end)
+                con.append([(start, end), diff, direct, layer])
+            return con
+
+        return self._connect_phases(get_connection)
+
+    def _connect_phases(self, get_connection):
+        """
+        Applies 'get_connection(Sp, Sn, layer)' to the positive and
+        negative coil sides of all phases and layers
+        """
         head = []
         if self.num_layers == 1:
             for km in range(len(self.S)):
@@ -802,3 +1581,24 @@ class create_wdg_overhang:
             raise Exception("Number of layers >2 not implemented yet")
 
         return head
+
+
+def calc_overhang_length(head):
+    """
+    Returns the length of the winding overhang as sum of the coil spans
+
+    Parameters
+    ----------
+    head :   list
+             Winding connections for all phases
+             (see create_wdg_overhang.get_overhang())
+
+    Returns
+    -------
+    return length:       integer
+                         total length in slot pitches
+    return length_phase: list
+                         length for each phase in slot pitches
+    """
+    length_phase = [int(sum(con[1] for con in phase)) for phase in head]
+    return sum(length_phase), length_phase
@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+"""
+Provides a process-wide cache for analysis results. The results are
+stored by a hash of the input data (winding layout, machine data and
+the relevant config values), so identical windings in different
+datamodel objects share the results. Optionally the results are
+stored persistently in a SQLite database in the config directory.
+"""
+import collections
+import fractions
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+from swat_em import __version__
+from swat_em.config import config, get_config_dir
+
+# increase if the analysis changes the results, so the results of the
+# persistent cache are calculated again
+ANALYSIS_VERSION = 1
+
+
+def _json_default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, fractions.Fraction):
+        return str(obj)
+    raise TypeError("can't hash object of type {}".format(type(obj).__name__))
+
+
+def get_hash(*data):
+    """
+    Returns a stable hash of the data (independent of the process and
+    the python session)
+
+    Parameters
+    ----------
+    data :   json serializable objects (numpy arrays and Fractions are
+             allowed as well)
+
+    Returns
+    -------
+    return : string
+             hex digest
+    """
+    txt = json.dumps(data, sort_keys=True, default=_json_default)
+    return hashlib.sha1(txt.encode("utf-8")).hexdigest()
+
+
+def get_size(obj, _seen=None):
+    """
+    Returns the estimated memory size of an object in bytes including
+    the objects it contains (numpy arrays, lists, dicts, ...)
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (obj.nbytes if obj.base is None else 0)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += get_size(key, _seen) + get_size(value, _seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for value in obj:
+            size += get_size(value, _seen)
+    elif hasattr(obj, "__dict__"):
+        size += get_size(vars(obj), _seen)
+    elif hasattr(obj, "__slots__"):
+        for name in obj.__slots__:
+            if hasattr(obj, name):
+                size += get_size(getattr(obj, name), _seen)
+    return size
+
+
+class AnalysisCache:
+    """
+    Least recently used (LRU) cache with a memory bound. The stored
+    values are shared between all users of the cache, so they must not
+    be modified.
+    """
+
+    def __init__(self, max_size=None):
+        """
+        Parameters
+        ----------
+        max_size : integer
+                   maximum memory size of the stored values in bytes.
+                   If None, the size of config["cache"] is used.
+        """
+        self._data = collections.OrderedDict()
+        self._max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_size(self):
+        if self._max_size is not None:
+            return self._max_size
+        return int(config["cache"]["max_memory_MB"] * 1024**2)
+
+    @property
+    def enabled(self):
+        return config["cache"]["enabled"] and self.max_size > 0
+
+    def get(self, key, default=None):
+        """
+        Returns the value for the key (or 'default' if the key isn't
+        in the cache) and counts the hits and misses
+        """
+        if key in self._data:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key][0]
+        self.misses += 1
+        return default
+
+    def put(self, key, value):
+        """
+        Stores a value. The least recently used values are removed if
+        the memory bound is exceeded.
+        """
+        if key in self._data:
+            self.size -= self._data.pop(key)[1]
+        size = get_size(value)
+        if size > self.max_size:
+            return
+        self._data[key] = (value, size)
+        self.size += size
+        self._evict()
+
+    def _evict(self):
+        while self.size > self.max_size and self._data:
+            _, (_, size) = self._data.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Removes all values and resets the counters
+        """
+        self._data.clear()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_stats(self):
+        """
+        Returns the statistics of the cache
+
+        Returns
+        -------
+        return : dict
+                 number of hits, misses, evictions and entries and
+                 the memory size in bytes
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._data),
+            "size": self.size,
+            "max_size": self.max_size,
+        }
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DiskCache:
+    """
+    Persistent cache for analysis results in a SQLite database. The
+    values are stored pickled together with the version of the
+    analysis code; values of other versions are removed when the
+    database is opened. If the size limit is exceeded the least
+    recently used values are removed. The access times of the hits are
+    collected in memory and written together with the next change of
+    the database (or by close), so reading doesn't lock the database.
+    """
+
+    def __init__(self, fname, max_size=None):
+        """
+        Parameters
+        ----------
+        fname :    string
+                   file name of the database
+        max_size : integer
+                   maximum size of the stored values in bytes. If None,
+                   the size of config["cache"] is used.
+        """
+        self.fname = fname
+        self._max_size = max_size
+        self.version = "{}-{}".format(__version__, ANALYSIS_VERSION)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._accessed = {}  # key -> access time, not written yet
+        dirname = os.path.dirname(os.path.abspath(fname))
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        self._con = sqlite3.connect(fname, timeout=30)
+        with self._con:
+            self._con.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, "
+                "version TEXT, value BLOB, size INTEGER, last_access REAL)"
+            )
+            self._con.execute(
+                "CREATE INDEX IF NOT EXISTS idx_access ON results (last_access)"
+            )
+            self._con.execute("DELETE FROM results WHERE version != ?", (self.version,))
+
+    @property
+    def max_size(self):
+        if self._max_size is not None:
+            return self._max_size
+        return int(config["cache"]["disk_max_MB"] * 1024**2)
+
+    def get(self, key, default=None):
+        """
+        Returns the value for the key (or 'default' if the key isn't
+        in the cache) and counts the hits and misses
+        """
+        row = self._con.execute(
+            "SELECT value FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return default
+        self._accessed[key] = time.time()
+        self.hits += 1
+        return pickle.loads(row[0])
+
+    def _flush_access(self):
+        """writes the collected access times (in the current transaction)"""
+        if self._accessed:
+            self._con.executemany(
+                "UPDATE results SET last_access = ? WHERE key = ?",
+                [(t, key) for key, t in self._accessed.items()],
+            )
+            self._accessed = {}
+
+    def put(self, key, value):
+        """
+        Stores a value. The least recently used values are removed if
+        the size limit is exceeded.
+        """
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_size:
+            return
+        with self._con:
+            self._flush_access()
+            self._con.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (key, self.version, blob, len(blob), time.time()),
+            )
+        self._evict()
+
+    def _evict(self):
+        size = self.get_size()
+        if size <= self.max_size:
+            return
+        rows = self._con.execute(
+            "SELECT key, size FROM results ORDER BY last_access, rowid"
+        ).fetchall()
+        remove = []
+        for key, s in rows:
+            if size <= self.max_size:
+                break
+            remove.append((key,))
+            size -= s
+        with self._con:
+            self._con.executemany("DELETE FROM results WHERE key = ?", remove)
+        self.evictions += len(remove)
+
+    def get_size(self):
+        """
+        Returns the size of all stored values in bytes
+        """
+        row = self._con.execute("SELECT COALESCE(SUM(size), 0) FROM results")
+        return row.fetchone()[0]
+
+    def clear(self):
+        """
+        Removes all values and resets the counters
+        """
+        with self._con:
+            self._con.execute("DELETE FROM results")
+        self._accessed = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_stats(self):
+        """
+        Returns the statistics of the cache
+
+        Returns
+        -------
+        return : dict
+                 number of hits, misses, evictions and entries and
+                 the size in bytes
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self),
+            "size": self.get_size(),
+            "max_size": self.max_size,
+        }
+
+    def close(self):
+        with self._con:
+            self._flush_access()
+        self._con.close()
+
+    def __contains__(self, key):
+        row = self._con.execute("SELECT 1 FROM results WHERE key = ?", (key,))
+        return row.fetchone() is not None
+
+    def __len__(self):
+        return self._con.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+# process-wide cache for the results of all datamodel objects
+results_cache = AnalysisCache()
+_disk_cache = None
+
+
+def get_disk_cache():
+    """
+    Returns the persistent cache in the config directory or None if
+    it is disabled (config["cache"]["disk_enabled"])
+    """
+    global _disk_cache
+    if not config["cache"]["disk_enabled"]:
+        return None
+    if _disk_cache is None:
+        fname = os.path.join(get_config_dir(), "results_cache.sqlite")
+        _disk_cache = DiskCache(fname)
+    return _disk_cache
+
+
+def set_disk_cache(fname):
+    """
+    Uses the database 'fname' for the persistent cache instead of the
+    one in the config directory (for example for batch scripts)
+    """
+    global _disk_cache
+    if _disk_cache is not None:
+        _disk_cache.close()
+    _disk_cache = DiskCache(fname) if fname is not None else None
@@ -66,8 +66,20 @@ def get_init_config():
     }
     config["report"] = {}
 
-    config["radial_force"] = {"num_modes": 3}
+    # threshold: MMF harmonics smaller than threshold*max are neglected
+    config["radial_force"] = {"num_modes": 3, "threshold": 0.001}
     config["report_txt"] = {"font": "Monospace", "fontsize": 10}
+    # process-wide cache for the analysis results (see cache.py) and
+    # optional persistent cache in the config directory
+    config["cache"] = {
+        "enabled": True,
+        "max_memory_MB": 256,
+        "disk_enabled": False,
+        "disk_max_MB": 512,
+    }
+    # memory limit for the undo/redo states of the project; the oldest
+    # states are removed if it is exceeded
+    config["undo"] = {"max_memory_MB": 64}
     config["view"] = {
         "plot_tabs": [
             "tab_slot",
@@ -82,6 +94,35 @@ def get_init_config():
     return copy.deepcopy(config)
 
 
+def get_value(config, key):
+    """
+    Returns the value of a config key. The keys of nested dicts are
+    separated by a dot, e.g. "radial_force.num_modes". None if the key
+    doesn't exist.
+    """
+    value = config
+    for k in key.split("."):
+        if not isinstance(value, dict) or k not in value:
+            return None
+        value = value[k]
+    return value
+
+
+def get_changed_keys(old, new, _prefix=""):
+    """
+    Returns the keys of all values which are different in the configs
+    'old' and 'new'. The keys of nested dicts are separated by a dot.
+    """
+    changed = []
+    for key in sorted(set(old) | set(new)):
+        a, b = old.get(key), new.get(key)
+        if isinstance(a, dict) and isinstance(b, dict):
+            changed += get_changed_keys(a, b, _prefix + key + ".")
+        elif a != b:
+            changed.append(_prefix + key)
+    return changed
+
+
 def get_phase_color(num):
     cols = config["plt"]["phase_colors"]
     while num >= len(cols):
@@ -159,9 +200,11 @@ def load_config():
             for key, value in config_init.items():
                 if key not in config.keys():
                     config[key] = value
-            for key, value in config_init["plt"].items():
-                if key not in config["plt"].keys():
-                    config["plt"][key] = value
+                elif isinstance(value, dict) and isinstance(config[key], dict):
+                    # new sub-keys of a section
+                    for subkey, subvalue in value.items():
+                        if subkey not in config[key].keys():
+                            config[key][subkey] = subvalue
     else:
         return get_init_config()
     return config
@@ -7,18 +7,273 @@ import os
 import fractions
 import math
 import copy
+import functools
 import string
 import gzip
-import gc
+import pickle
+import time
 import numpy as np
 
 from swat_em import analyse
+from swat_em import numbertheory
 from swat_em import report as rep
 from swat_em import wdggenerator
-from swat_em.config import config, get_phase_color
+from swat_em.cache import results_cache, get_disk_cache, get_hash, get_size
+from swat_em.layout import WindingLayout
+from swat_em.config import config, get_phase_color, get_value
 #from swat_em import plots
 
 
+class _LazyResults(dict):
+    """
+    Results of a datamodel which are calculated on first access. Every
+    result is a node of datamodel.result_nodes with its dependencies.
+    A result is removed if one of its inputs changes (see invalidate)
+    and recalculated if one of the config values it depends on has
+    changed since it was calculated. Calculated results are shared
+    with other datamodel objects by the process-wide results_cache
+    (key: hash of the inputs and the config values of the result).
+    The results of datamodel.persistent_results are stored in the
+    persistent cache too, if it is enabled. The arrays of the results
+    are read-only, because they are shared with the cache and with
+    copies of the datamodel (see datamodel.copy). Every datamodel gets
+    its own lists and dicts of a result, so changing them doesn't
+    affect other datamodels.
+    """
+
+    def __init__(self, data):
+        super().__init__()
+        self.data = data
+        self.config_state = {}
+
+    def __getitem__(self, key):
+        if dict.__contains__(self, key) and key in self.config_state:
+            if self.config_state[key] != _get_config_state(key):
+                self.invalidate(key)
+        if not dict.__contains__(self, key):
+            node = datamodel.result_nodes.get(key)
+            if node is None:
+                raise KeyError(key)
+            keys, method, _ = node
+            disk_cache = None
+            if set(keys) & set(datamodel.persistent_results):
+                disk_cache = get_disk_cache()
+            shared = results_cache.enabled or disk_cache is not None
+            if shared:
+                cache_key = self._get_cache_key(key)
+                values = None
+                if results_cache.enabled:
+                    values = results_cache.get(cache_key)
+                if values is None and disk_cache is not None:
+                    values = disk_cache.get(cache_key)
+                    if values is not None and results_cache.enabled:
+                        results_cache.put(cache_key, values)
+                if values is None:
+                    values = getattr(self.data, method)()
+                    if results_cache.enabled:
+                        results_cache.put(cache_key, values)
+                    if disk_cache is not None:
+                        disk_cache.put(cache_key, values)
+            else:
+                values = getattr(self.data, method)()
+            if len(keys) == 1:
+                values = [values]
+            for k, v in zip(keys, values):
+                _set_readonly(v)
+                if shared:
+                    # the cached object belongs to other datamodels too
+                    v = _copy_containers(v)
+                dict.__setitem__(self, k, v)
+                self.config_state[k] = _get_config_state(k)
+        return dict.__getitem__(self, key)
+
+    def _get_cache_key(self, key):
+        deps = _get_dependencies(key)
+        inputs = {
+            d: self.data.machinedata.get(d)
+            for d in sorted(deps)
+            if d not in datamodel.result_nodes and not d.startswith("config:")
+        }
+        return get_hash(datamodel.result_nodes[key][0], inputs, _get_config_state(key))
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def put(self, key, value):
+        """
+        Stores a result which is calculated outside of the nodes
+        """
+        _set_readonly(value)
+        dict.__setitem__(self, key, value)
+        self.config_state[key] = _get_config_state(key)
+
+    def copy_to(self, data):
+        """
+        Returns the results for the datamodel 'data' (a copy of the
+        datamodel of these results). The (read-only) arrays are shared,
+        only the lists and dicts are copied. If an input of one
+        datamodel changes only its own results are removed.
+        """
+        res = _LazyResults(data)
+        for key, value in dict.items(self):
+            dict.__setitem__(res, key, _copy_containers(value))
+        res.config_state = dict(self.config_state)
+        return res
+
+    def invalidate(self, *names):
+        """
+        Removes all results which depend on the given inputs
+        (machinedata keys, config keys or results)
+        """
+        for key in _get_dependent_results(names):
+            self.pop(key, None)
+            self.config_state.pop(key, None)
+
+    def available(self):
+        """
+        Returns the names of all results: the calculated ones and the
+        ones which are calculated on access
+        """
+        names = list(datamodel.result_nodes)
+        return names + [key for key in dict.keys(self) if key not in names]
+
+    def __eq__(self, other):
+        """
+        Compares the results which are calculated in one of the objects
+        (missing results of the other object are calculated)
+        """
+        if not isinstance(other, _LazyResults):
+            return dict.__eq__(self, other)
+        missing = object()
+        for key in set(dict.keys(self)) | set(dict.keys(other)):
+            a, b = self.get(key, missing), other.get(key, missing)
+            if a is missing or b is missing or not _results_equal(a, b):
+                return False
+        return True
+
+    def __ne__(self, other):
+        return not self == other
+
+
+@functools.lru_cache(maxsize=None)
+def _get_dependencies(key):
+    """all (direct and indirect) inputs of the result 'key'"""
+    deps = set()
+    todo = [key]
+    while todo:
+        node = datamodel.result_nodes.get(todo.pop())
+        if node is None:
+            continue
+        for d in node[2]:
+            if d not in deps:
+                deps.add(d)
+                todo.append(d)
+    return frozenset(deps)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_dependent_results(names):
+    """all results which depend on one of the inputs 'names'"""
+    names = set(names)
+    return [
+        key
+        for key in datamodel.result_nodes
+        if key in names or names & _get_dependencies(key)
+    ]
+
+
+def _results_equal(a, b):
+    """compares two results which may contain numpy arrays"""
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return np.shape(a) == np.shape(b) and np.array_equal(a, b)
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) == len(b) and all(_results_equal(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_results_equal(a[k], b[k]) for k in a)
+    if type(a) is not type(b):
+        return bool(a == b)
+    if hasattr(a, "__slots__") and not hasattr(a, "__dict__"):
+        return all(
+            _results_equal(getattr(a, k, None), getattr(b, k, None))
+            for k in a.__slots__
+        )
+    return bool(a == b)
+
+
+# types which can't contain arrays (see _set_readonly)
+_SCALAR_TYPES = (bool, int, float, complex, str, fractions.Fraction, np.generic)
+
+
+def _copy_containers(value):
+    """
+    copies the lists, tuples and dicts of a result; the (read-only)
+    arrays and other objects are shared
+    """
+    if isinstance(value, list):
+        return [
+            v if isinstance(v, _SCALAR_TYPES) else _copy_containers(v) for v in value
+        ]
+    if isinstance(value, tuple):
+        return tuple(_copy_containers(v) for v in value)
+    if isinstance(value, dict):
+        return {k: _copy_containers(v) for k, v in value.items()}
+    return value
+
+
+def _set_readonly(value):
+    """marks all numpy arrays of a result as read-only"""
+    if isinstance(value, _SCALAR_TYPES):
+        return
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            if not isinstance(v, _SCALAR_TYPES):
+                _set_readonly(v)
+    elif isinstance(value, dict):
+        for v in value.values():
+            if not isinstance(v, _SCALAR_TYPES):
+                _set_readonly(v)
+    elif hasattr(value, "__dict__"):
+        _set_readonly(vars(value))
+    elif hasattr(value, "__slots__"):
+        for name in value.__slots__:
+            _set_readonly(getattr(value, name, None))
+
+
+def _get_config_state(key):
+    """values of the config the result 'key' depends on"""
+    return {
+        d: copy.deepcopy(get_value(config, d[7:]))
+        for d in _get_dependencies(key)
+        if d.startswith("config:")
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _get_config_dependencies(keys):
+    """
+    config dependencies of the results which are affected by a change
+    of the config keys 'keys' (including parent and child keys)
+    """
+    deps = set()
+    for node in datamodel.result_nodes.values():
+        deps.update(d for d in node[2] if d.startswith("config:"))
+    return tuple(
+        sorted(
+            d
+            for d in deps
+            if any(
+                d[7:] == k or d[7:].startswith(k + ".") or k.startswith(d[7:] + ".")
+                for k in keys
+            )
+        )
+    )
+
+
 class datamodel:
     """
     Provides a central place for all data. All analysis functions are
@@ -27,19 +282,68 @@ class datamodel:
 
     file_format = 1
     machinedata_keys = ["Q", "p", "m", "phases", "wstep", "Qes"]
-    results_keys = [
-        "q",
-        "nu_el",
-        "Ei_el",
-        "kw_el",
-        "phaseangle_el",
-        "nu_mech",
-        "Ei_mech",
-        "kw_mech",
-        "phaseangle_mech",
-        "valid",
-        "error",
-    ]
+    results_keys = ["q", "wf_el", "wf_mech"]
+    # Results are calculated on first access (see _LazyResults):
+    # result -> (results calculated together, method, dependencies).
+    # Dependencies are machinedata keys, other results and config keys
+    # ("config:key", nested keys separated by a dot)
+    result_nodes = {}
+    # results for the persistent cache (see cache.get_disk_cache)
+    persistent_results = ["wf_el", "wf_mech", "MMK", "basic_char"]
+    for _node in [
+        (("q",), "_calc_q", ("Q", "p", "m", "Qes")),
+        (("layout",), "get_layout", ("phases", "turns")),
+        (("padded_layout",), "_calc_padded_layout", ("layout",)),
+        (("spectrum",), "_calc_spectrum", ("Q", "layout", "padded_layout")),
+        (
+            ("wf_el",),
+            "_calc_kw_el",
+            ("p", "spectrum", "config:N_nu_el", "config:kw_min"),
+        ),
+        (
+            ("wf_mech",),
+            "_calc_kw_mech",
+            ("spectrum", "config:N_nu_mech", "config:kw_min"),
+        ),
+        # list format of the winding factors (for compatibility)
+        (
+            ("nu_el", "Ei_el", "kw_el", "phaseangle_el"),
+            "_get_kw_el_lists",
+            ("wf_el",),
+        ),
+        (
+            ("nu_mech", "Ei_mech", "kw_mech", "phaseangle_mech"),
+            "_get_kw_mech_lists",
+            ("wf_mech",),
+        ),
+        (("wdg_is_symmetric",), "_calc_is_symmetric", ("m", "wf_el")),
+        (("wdg_periodic",), "_calc_periodic", ("wf_el", "layout")),
+        (("a", "lcmQP"), "_calc_parallel", ("Q", "p", "padded_layout")),
+        (("layers",), "_calc_layers", ("Q", "m", "layout")),
+        (
+            ("layers_str", "layers_col"),
+            "_calc_layers_str",
+            ("m", "layers", "config:plt.phase_colors"),
+        ),
+        (("t",), "_calc_t", ("layers",)),
+        (("MMK",), "_calc_MMK", ("Q", "m", "layout", "config:num_MMF_points")),
+        (
+            ("basic_char",),
+            "_calc_basic_characteristics",
+            (
+                "q",
+                "Qes",
+                "layout",
+                "t",
+                "MMK",
+                "config:radial_force.num_modes",
+                "config:radial_force.threshold",
+            ),
+        ),
+    ]:
+        for _key in _node[0]:
+            result_nodes[_key] = _node
+    del _node, _key
 
     def __init__(self):
         self.reset_data()
@@ -50,7 +354,7 @@ class datamodel:
         txt.append("WINDING DATAMODEL")
         txt.append("=================")
         txt.append("")
-        if self.results["kw_el"] != None:
+        if self.machinedata["phases"] is not None:
             txt.append("Title: " + self.get_title())
             txt.append("Number of slots:  {}".format(self.get_num_slots()))
             txt.append("Number of poles:  {}".format(2 * self.get_num_polepairs()))
@@ -69,10 +373,10 @@ class datamodel:
         ret = []
         ret.append(self.machinedata == other.machinedata)
         for rk in self.results_keys:
-            if type(self.results[rk]) == type([]):  # lists are filled with numpy arrays
-                ret.append(np.allclose(self.results[rk], other.results[rk]))
-            else:
-                ret.append(self.results[rk] == other.results[rk])
+            # compare only the results which are already calculated
+            if rk not in self.results.keys() and rk not in other.results.keys():
+                continue
+            ret.append(self.results[rk] == other.results[rk])
         return np.all(ret)
 
     def reset_data(self):
@@ -92,15 +396,55 @@ class datamodel:
         """
         Remove all existing results
         """
-        self.results = {}
-        for key in self.results_keys:
-            self.results[key] = None
+        self.results = _LazyResults(self)
 
-    def copy(self):
+    def _invalidate_results(self, *names):
+        """
+        Remove the results which depend on the given machinedata keys
+        """
+        if "results" in self.__dict__:
+            self.results.invalidate(*names)
+
+    def invalidate_config(self, *keys):
+        """
+        Removes the results which depend on the given config keys. They
+        are recalculated on the next access.
+
+        Parameters
+        ----------
+        keys :   strings
+                 changed config keys, nested keys separated by a dot
+                 (e.g. "radial_force.num_modes", see
+                 config.get_changed_keys)
+        """
+        deps = _get_config_dependencies(tuple(sorted(keys)))
+        if deps:
+            self._invalidate_results(*deps)
+
+    def copy(self, deep=False):
         """
         Returns a copy of the winding
+
+        Parameters
+        ----------
+        deep :   bool
+                 If False, only the machine data is copied and the
+                 (read-only) results are shared with the copy until
+                 the winding of one of the datamodels changes. If True,
+                 all data is copied.
+
+        Returns
+        -------
+        return : datamodel
         """
-        return copy.deepcopy(self)
+        if deep:
+            return copy.deepcopy(self)
+        data = datamodel.__new__(datamodel)
+        data.__dict__.update(self.__dict__)
+        data.machinedata = copy.deepcopy(self.machinedata)
+        data.generator_info = copy.deepcopy(self.generator_info)
+        data.results = self.results.copy_to(data)
+        return data
 
     def set_title(self, title):
         """
@@ -177,17 +521,20 @@ class datamodel:
         
         Parameters
         ----------
-        S : list of lists
+        S : list of lists or WindingLayout
             winding layout for every phase, for example:
             S = [[1,-2], [3,-4], [5,-6]]. This means there are 3 phases
             with phase 1 in in slot 1 and in slot 2 with negativ winding direction. 
             For double layer windings there must be additional lists:
             S = [[[1, -4], [-3, 6]], [[3, -6], [-5, 2]], [[-2, 5], [4, -1]]]
             Hint: [[[first layer], [second layer]], ... ]
+            If S is a WindingLayout, the number of turns is taken from it.
                      
         w : integer
             coil span (slots as unit)
         """
+        if isinstance(S, WindingLayout):
+            S, turns = S.to_phases(), S.to_turns()
         if not hasattr(S[0][0], "__iter__"):
             for k in range(len(S)):
                 S[k] = [S[k], []]
@@ -197,6 +544,7 @@ class datamodel:
                     turns[k] = [turns[k], []]
 
         self.machinedata["phases"] = S
+        self._invalidate_results("phases")
         self.set_turns(turns)
         self.set_machinedata(m=len(S))
         self.machinedata["phasenames"] = [
@@ -265,24 +613,7 @@ class datamodel:
         Returns the basic charactericits of the winding as 
         dictionary and a html string
         """
-        if not "basic_char" in self.results.keys():
-            bc = analyse.get_basic_characteristics(
-                self.get_num_slots(),
-                2 * self.get_num_polepairs(),
-                self.get_num_phases(),
-                self.get_phases(),
-                self.get_turns(),
-                self.get_num_empty_slots(),
-            )
-            bc["r"] = self.get_radial_force_modes(
-                num_modes=config["radial_force"]["num_modes"]
-            )
-            bc["sigma_d"] = self.get_double_linked_leakage()
-            bc["t"] = self.get_periodicity_t()
-            bc["NL"] = self.get_num_layers()
-            self.results["basic_char"] = bc
-        else:
-            bc = self.results["basic_char"]
+        bc = self.results["basic_char"]
 
         dat = [
             ["Number of slots ", rep.italic("Q: "), str(self.get_num_slots())],
@@ -316,7 +647,7 @@ class datamodel:
         dat.append(["lcm(Q, P) ", "", str(bc["lcmQP"])])
         dat.append(["periodic base winding ", rep.italic("t: "), str(bc["t"])])
 
-        a_ = [str(i) for i in analyse.Divisors(bc["a"])]
+        a_ = [str(i) for i in numbertheory.divisors(bc["a"])]
         dat.append(["parallel connection ", rep.italic("a: "), ",".join(a_)])
         r_ = [str(i) for i in bc["r"]]
         dat.append(["radial force modes ", rep.italic("r: "), ",".join(r_) + ",.."])
@@ -342,6 +673,22 @@ class datamodel:
         txt = "".join(txt)
         return bc, txt
 
+    def _calc_basic_characteristics(self):
+        bc = analyse.get_basic_characteristics(
+            self.get_num_slots(),
+            2 * self.get_num_polepairs(),
+            self.get_num_phases(),
+            self.results["layout"],
+            Qes=self.get_num_empty_slots(),
+        )
+        bc["r"] = self.get_radial_force_modes(
+            num_modes=config["radial_force"]["num_modes"]
+        )
+        bc["sigma_d"] = self.get_double_linked_leakage()
+        bc["t"] = self.get_periodicity_t()
+        bc["NL"] = self.get_num_layers()
+        return bc
+
     def get_radial_force_modes(self, num_modes=None):
         """
         Returns the radial force modes caused by the winding.
@@ -359,12 +706,38 @@ class datamodel:
         MMK: list
              radial force modes
         """
+        modes, _ = self.get_radial_force(num_modes=num_modes)
+        return modes
+
+    def get_radial_force(self, num_modes=None):
+        """
+        Returns the radial force modes caused by the winding and their
+        amplitudes. The modes are calculated from the harmonics of the
+        MMF (see get_radial_force_modes).
+
+        Parameters
+        ----------
+        num_modes : integer
+                    Max. number of modes. If not given the default value
+                    from the config file is used
+
+        Returns
+        -------
+        modes: list
+               radial force modes
+        amplitudes: list
+                    amplitude of each mode relative to the largest
+                    amplitude of the squared MMF
+        """
         if num_modes == None:
             num_modes = config["radial_force"]["num_modes"]
-        if "MMK" not in self.results.keys():
-            self._calc_MMK()
-        return analyse.calc_radial_force_modes(
-            self.results["MMK"]["MMK"], self.get_num_phases(), num_modes=num_modes
+        mmf = self.results["MMK"]["mmf"]
+        return analyse.calc_radial_force_modes_from_harmonics(
+            self.results["MMK"]["HA"],
+            self.get_num_phases(),
+            num_modes=num_modes,
+            threshold=config["radial_force"]["threshold"],
+            mean_square=np.mean(mmf.levels**2),
         )
 
     def get_num_series_turns(self):
@@ -416,8 +789,6 @@ class datamodel:
                phaseangle of the harmonic corresponding to nu in
                range between -pi and +pi
         """
-        if "MMK" not in self.results.keys():
-            self._calc_MMK()
         nu = np.array(self.results["MMK"]["nu"])
         Cnu = np.abs(self.results["MMK"]["HA"])
         phase = np.angle(self.results["MMK"]["HA"])
@@ -440,18 +811,16 @@ class datamodel:
         sigma_d: float
                  coefficient of the double linkead leakage flux
         """
-        nu, Cnu, _ = self.get_MMF_harmonics()
-        if nu[0] == 0:
-            nu = nu[1:]
-            Cnu = Cnu[1:]
-        p = self.get_num_polepairs()
-        I = 1  # current for MMK
+        mmf = self.get_MMF()
+        p = int(self.get_num_polepairs())
         w = self.get_num_series_turns()
-        if w != 0:
-            kw = Cnu * np.pi * nu / (3 * np.sqrt(2) * I * w)
-            sigma_d = analyse.double_linked_leakage(kw, nu, p)
-        else:
-            sigma_d = -1
+        C1 = np.abs(mmf.harmonics(p + 1)[p])
+        if w == 0 or C1 == 0:
+            return -1
+        # The sum of the squared amplitudes of all (infinite) harmonics
+        # is given by Parseval's theorem: sum(Cnu**2) = 2*mean(MMF**2)
+        # (each level of the MMF covers the same width of one slot)
+        sigma_d = 2 * np.mean(mmf.levels**2) / C1**2 - 1
         return sigma_d
 
     def calc_num_basic_windings_t(self):
@@ -464,25 +833,7 @@ class datamodel:
         t: integer
            Periodicity for the winding layout
         """
-        l, ls, lcol = self.get_layers()
-        layers, Q = l.shape
-
-        t = 1
-        i = 2
-        while i <= Q // 2:
-            if Q % i == 0:
-                length = Q // i
-                is_t = True
-                for k in range(i - 1):
-                    if not np.all(
-                        l[:, k * length : (k + 1) * length]
-                        == l[:, (k + 1) * length : (k + 2) * length]
-                    ):
-                        is_t = False
-                if is_t:
-                    t = i
-            i += 1
-        return t
+        return analyse.calc_num_basic_windings_t(self.results["layers"])
 
     def get_num_slots(self):
         """
@@ -505,6 +856,7 @@ class datamodel:
             number of slots
         """
         self.machinedata["Q"] = Q
+        self._invalidate_results("Q")
 
     def get_num_polepairs(self):
         """
@@ -527,6 +879,7 @@ class datamodel:
             number of pole pairs
         """
         self.machinedata["p"] = p
+        self._invalidate_results("p")
 
     def get_num_phases(self):
         """
@@ -549,6 +902,7 @@ class datamodel:
             number of phases
         """
         self.machinedata["m"] = m
+        self._invalidate_results("m")
 
     def get_coilspan(self):
         """
@@ -574,6 +928,7 @@ class datamodel:
 
     def set_num_empty_slots(self, Qes):
         self.machinedata["Qes"] = Qes
+        self._invalidate_results("Qes")
 
     def get_num_empty_slots(self):
         if self.machinedata["Qes"] is not None:
@@ -602,6 +957,253 @@ class datamodel:
         else:
             return self.machinedata["phases"]
 
+    def get_layout(self):
+        """
+        Returns the winding layout and the number of turns as
+        array based WindingLayout (see get_phases and get_turns)
+
+        Returns
+        -------
+        layout: WindingLayout
+                winding layout
+        """
+        return WindingLayout.from_phases(self.get_phases(), self.get_turns())
+
+    def apply_delta(self, slot, layer, old, new, turns=None):
+        """
+        Changes a single coil side of the winding layout. The spectrum
+        of the conductor distribution (sum phasors of all harmonics)
+        and the MMF with its harmonics are updated by the change
+        instead of being recalculated; the other results are
+        recalculated on access (from the updated spectrum).
+
+        Parameters
+        ----------
+        slot :   integer
+                 slot number (starting with 1)
+        layer :  integer
+                 layer (starting with 0)
+        old :    integer
+                 actual phase of the coil side with the sign of the
+                 winding direction, 0 for no coil side (same as in
+                 get_layers), for example -2 for a negative coil side
+                 of the second phase
+        new :    integer
+                 new phase of the coil side with the sign of the
+                 winding direction, 0 for removing the coil side
+        turns :  number
+                 number of turns of the new coil side; if None, the
+                 turns of the old coil side (or the scalar number of
+                 turns) are used. Needed if a coil side is added to
+                 a winding with individual number of turns.
+        """
+        S = self.get_phases()
+        m = self.get_num_phases()
+        Q = self.get_num_slots()
+        old_turns = self.get_turns()
+        if max(abs(old), abs(new)) > len(S):
+            raise ValueError("phase {} doesn't exist".format(max(abs(old), abs(new))))
+        for km in range(len(S)):
+            if any(abs(s) == slot for s in S[km][layer] if km + 1 != abs(old)):
+                raise ValueError(
+                    "slot {} of layer {} is allocated by phase {}".format(
+                        slot, layer + 1, km + 1
+                    )
+                )
+        if old == new and turns is None:
+            return
+
+        # change the layout (and the turns)
+        t_old, t_new = 0.0, 0.0
+        if hasattr(old_turns, "__iter__"):
+            T = [[list(tl) for tl in tm] for tm in old_turns]
+        else:
+            T = None
+            if turns is not None and turns != old_turns:
+                # individual number of turns needed
+                T = [[[old_turns] * len(sl) for sl in sm] for sm in S]
+        S = [[list(sl) for sl in sm] for sm in S]
+        if old != 0:
+            sl = S[abs(old) - 1][layer]
+            if int(np.sign(old)) * slot not in sl:
+                raise ValueError(
+                    "slot {} of layer {} isn't allocated by phase {}".format(
+                        slot, layer + 1, old
+                    )
+                )
+            idx = sl.index(int(np.sign(old)) * slot)
+            del sl[idx]
+            if T is not None:
+                t_old = T[abs(old) - 1][layer].pop(idx)
+            else:
+                t_old = old_turns
+        if new != 0:
+            if turns is None and old == 0 and hasattr(old_turns, "__iter__"):
+                raise ValueError("number of turns needed for the new coil side")
+            if turns is None:
+                turns = t_old if old != 0 else old_turns
+            sl = S[abs(new) - 1][layer]
+            idx = sum(1 for s in sl if abs(s) < slot)  # sorted by the slot
+            sl.insert(idx, int(np.sign(new)) * slot)
+            if T is not None:
+                T[abs(new) - 1][layer].insert(idx, turns)
+            t_new = turns
+
+        # results which are updated by the change
+        spectrum, MMK = None, None
+        if {"spectrum", "wf_el", "wf_mech"} & set(self.results.keys()):
+            # (the winding factors may come from the cache without the
+            # spectrum)
+            spectrum = self.results["spectrum"]
+        if "MMK" in self.results.keys():
+            MMK = self.results["MMK"]
+        self.machinedata["phases"] = S
+        self.machinedata["turns"] = T if T is not None else old_turns
+        self._invalidate_results("phases", "turns")
+
+        # change of the spectrum of the conductor distribution:
+        # C[km][k] = sum(turns * sign * exp(j*2*pi*k*slot/Q))
+        if spectrum is not None:
+            C, norm = spectrum[0].copy(), spectrum[1].copy()
+            ek = np.exp(2j * np.pi / Q * np.arange(Q) * (slot % Q))
+            if old != 0:
+                C[abs(old) - 1] -= np.sign(old) * t_old * ek
+                norm[abs(old) - 1] -= abs(t_old)
+            if new != 0:
+                C[abs(new) - 1] += np.sign(new) * t_new * ek
+                norm[abs(new) - 1] += abs(t_new)
+            self.results.put("spectrum", (C, norm))
+
+        # change of the current linkage in the slot (see calc_slot_currents)
+        if MMK is not None:
+            kk = 2 if m % 2 == 0 else 1
+            I = np.cos(2 * np.pi / (m * kk) * np.arange(m))
+            dtheta = 0.0
+            if 0 < abs(old) <= m:
+                dtheta -= np.sign(old) * I[abs(old) - 1] * t_old
+            if 0 < abs(new) <= m:
+                dtheta += np.sign(new) * I[abs(new) - 1] * t_new
+            n = (slot - 1) % Q
+            theta = MMK["theta"].copy()
+            theta[n] += dtheta
+            # HA(nu) = 1/(j*pi*nu) * sum(theta_k * (exp(-j*nu*2*pi*k/Q) - 1))
+            nu = np.arange(1, len(MMK["HA"]))
+            HA = MMK["HA"].copy()
+            HA[1:] += dtheta * (np.exp(-2j * np.pi / Q * nu * n) - 1) / (1j * np.pi * nu)
+            mmf = analyse.MMF(Q, theta)
+            self.results.put(
+                "MMK", {"mmf": mmf, "theta": mmf.theta, "nu": MMK["nu"], "HA": HA}
+            )
+
+    def check_results(self, keys=("spectrum", "MMK", "wf_el", "wf_mech"), tol=1e-9):
+        """
+        Compares the results (for example after apply_delta) with a
+        full recalculation of the winding
+
+        Parameters
+        ----------
+        keys :   list
+                 results to compare
+        tol :    float
+                 absolute tolerance
+
+        Returns
+        -------
+        return : list
+                 results which are different
+        """
+        ref = datamodel()
+        ref.machinedata = copy.deepcopy(self.machinedata)
+        ref.reset_results()
+        diff = []
+        for key in keys:
+            method = self.result_nodes[key][1]
+            # calculate directly (not from the cache)
+            value = getattr(ref, method)()
+            if len(self.result_nodes[key][0]) > 1:
+                value = value[self.result_nodes[key][0].index(key)]
+            actual = self.results[key]
+            if key == "MMK":
+                actual = [actual["theta"], actual["HA"]]
+                value = [value["theta"], value["HA"]]
+            elif isinstance(actual, analyse.WindingFactors):
+                actual = [actual.nu, actual.kw]
+                value = [value.nu, value.kw]
+            try:
+                equal = all(
+                    np.allclose(a, b, rtol=0, atol=tol) for a, b in zip(actual, value)
+                )
+                equal = equal and len(actual) == len(value)
+            except ValueError:
+                equal = False
+            if not equal:
+                diff.append(key)
+        return diff
+
+    def screen(self):
+        """
+        Returns the characteristics for comparing many windings without
+        the full analysis (see analyse.screen_winding)
+
+        Returns
+        -------
+        return : dict
+                 "q", "kw1", "a", "sym", "t", "lcmQP", "r1", "sigma_d"
+        """
+        return analyse.screen_winding(
+            self.get_num_slots(),
+            2 * self.get_num_polepairs(),
+            self.get_num_phases(),
+            self.results["layout"],
+            Qes=self.get_num_empty_slots(),
+            num_modes=config["radial_force"]["num_modes"],
+            N_nu=(config["num_MMF_points"] - 1) // 2,
+        )
+
+    def check_screening(self, screening=None, tol=1e-9, r_tol=0.01):
+        """
+        Compares the characteristics of screen() with the full analysis
+        (see get_basic_characteristics). The full analysis calculates the
+        spectrum of the squared MMF from a limited number of MMF
+        harmonics, so the first radial force mode can be different if
+        its amplitude is close to the 1% limit.
+
+        Parameters
+        ----------
+        screening : dict
+                    result of screen() (calculated if not given)
+        tol :       float
+                    relative tolerance for kw1 and sigma_d
+        r_tol :     float
+                    tolerance for the amplitude of the first radial
+                    force mode (relative to the maximum amplitude) to
+                    the 1% limit
+
+        Returns
+        -------
+        return : list
+                 characteristics which are different
+        """
+        if screening is None:
+            screening = self.screen()
+        bc = self.results["basic_char"]
+        ref = dict(bc, kw1=bc["kw1"][0], r1=bc["r"][0] if len(bc["r"]) > 0 else 0)
+        diff = []
+        for key, value in screening.items():
+            if key in ("kw1", "sigma_d"):
+                equal = math.isclose(value, ref[key], rel_tol=tol, abs_tol=tol)
+            elif key == "r1" and value != ref[key]:
+                # the smaller mode is only found by one of the methods
+                r1 = min(r for r in (value, ref[key]) if r > 0)
+                N_nu = (config["num_MMF_points"] - 1) // 2
+                A = np.abs(self.get_MMF().square_harmonics(N_nu // 2 + 1))
+                equal = abs(A[r1] / np.max(A) - 0.01) <= r_tol
+            else:
+                equal = value == ref[key]
+            if not equal:
+                diff.append(key)
+        return diff
+
     def get_layers(self):
         """
         Returns the definition of the winding layout alternative to the
@@ -622,26 +1224,32 @@ class datamodel:
         layers_col: numpy array 
                     phase colors
         """
+        return (
+            self.results["layers"],
+            self.results["layers_str"],
+            self.results["layers_col"],
+        )
+
+    def _calc_layers(self):
         N = self.get_num_layers()
-        Q = self.get_num_slots()
-        layers = np.zeros([N, Q], dtype=int)
-        layers_s = np.array(layers, dtype=str)
-        layers_col = np.array(layers, dtype=str)
-        layers_col[:] = "#FFFFFF"
+        layers = self.results["layout"].slot_matrix(self.get_num_slots())[:N]
+        layers[np.abs(layers) > self.get_num_phases()] = 0
+        layers.setflags(write=False)  # shared by the results cache
+        return layers
+
+    def _calc_layers_str(self):
+        # the strings and colors are only needed for the GUI and the
+        # reports -> lookup tables indexed by the phase number
+        layers = self.results["layers"]
         m = self.get_num_phases()
-        for kl in range(N):
-            for km in range(m):
-                col = get_phase_color(km)
-                for kcs in range(len(self.machinedata["phases"][km][kl])):
-                    slot = self.machinedata["phases"][km][kl][kcs]
-                    if slot > 0:
-                        layers[kl, abs(slot) - 1] = km + 1
-                        layers_s[kl, abs(slot) - 1] = "+" + str(km + 1)
-                    elif slot < 0:
-                        layers[kl, abs(slot) - 1] = -(km + 1)
-                        layers_s[kl, abs(slot) - 1] = "-" + str(km + 1)
-                    layers_col[kl, abs(slot) - 1] = col
-        return layers, layers_s, layers_col
+        k = np.arange(1, m + 1).astype(str)
+        labels = np.concatenate([np.char.add("-", k[::-1]), ["0"], np.char.add("+", k)])
+        colors = np.array(["#FFFFFF"] + [get_phase_color(km) for km in range(m)])
+        layers_s = labels[layers + m]
+        layers_col = colors[np.abs(layers)]
+        layers_s.setflags(write=False)
+        layers_col.setflags(write=False)
+        return layers_s, layers_col
 
     def get_phasenames(self):
         """
@@ -673,7 +1281,7 @@ class datamodel:
         kw: 2D numpy array
             windings factors, (one column for each phase)
         """
-        return np.array(self.results["nu_el"]), np.array(self.results["kw_el"])
+        return self._get_windingfactors("wf_el")
 
     def get_windingfactor_el_by_nu(self, nu):
         """
@@ -711,7 +1319,7 @@ class datamodel:
         kw: 2D numpy array
             windings factors, (one column for each phase)
         """
-        return np.array(self.results["nu_mech"]), np.array(self.results["kw_mech"])
+        return self._get_windingfactors("wf_mech")
 
     def get_windingfactor_mech_by_nu(self, nu):
         """
@@ -786,13 +1394,14 @@ class datamodel:
         t: integer
            Number of periodic base windings
         """
-        if "t" not in self.results:
-            try:
-                self.results["t"] = self.calc_num_basic_windings_t()
-            except:
-                self.results["t"] = -1
         return self.results["t"]
 
+    def _calc_t(self):
+        try:
+            return self.calc_num_basic_windings_t()
+        except:
+            return -1
+
     def get_parallel_connections(self):
         """
         Returns all possible parallel connections of the winding.
@@ -802,7 +1411,7 @@ class datamodel:
         a: list
            Number of possible parallel connections
         """
-        return [i for i in analyse.Divisors(self.results["a"])]
+        return [i for i in numbertheory.divisors(self.results["a"])]
 
     def get_lcmQP(self):
         """
@@ -831,6 +1440,7 @@ class datamodel:
                number of turns 
         """
         self.machinedata["turns"] = turns
+        self._invalidate_results("turns")
 
     def get_q(self):
         """
@@ -841,14 +1451,16 @@ class datamodel:
         layers: Fraction
                 number of slots per pole per phase
         """
-        if "q" not in self.results.keys():
-            q = fractions.Fraction(
-                (self.get_num_slots() - self.get_num_empty_slots())
-                / (self.get_num_phases() * 2 * self.get_num_polepairs())
-            ).limit_denominator(100)
-            self.results["q"] = q
         return self.results["q"]
 
+    def _calc_q(self):
+        return numbertheory.calc_q(
+            self.get_num_slots(),
+            2 * self.get_num_polepairs(),
+            self.get_num_phases(),
+            self.get_num_empty_slots(),
+        )
+
     def _set_q(self, q):
         """
         Sets the number of slots per pole per phase q 
@@ -865,86 +1477,121 @@ class datamodel:
         Do a detailled analyses of the winding. This includes
         winding factors, detection of periodicity and symmetry, 
         radial force modes and so on. Use the get_* functions for 
-        getting the results.
+        getting the results. The results are calculated on first
+        access, so only the requested results are calculated.
         """
         self.reset_results()
 
-        # number of slots per pole and phase
-        q = fractions.Fraction(
-            (self.get_num_slots() - self.get_num_empty_slots())
-            / (self.get_num_phases() * 2 * self.get_num_polepairs())
-        ).limit_denominator(100)
-        self._set_q(q)
+    def _calc_padded_layout(self):
+        # the sorted layout and the spectrum of the conductor distribution
+        # are the same for the electrical and the mechanical winding factor
+        return analyse.pad_layout(self.results["layout"])
+
+    def _calc_spectrum(self):
+        return analyse.calc_winding_spectrum(
+            self.get_num_slots(),
+            self.results["layout"],
+            layout=self.results["padded_layout"],
+        )
 
-        # base winding
-        #  self.results['t'] = math.gcd(self.machinedata['Q'], self.machinedata['p'])
-        self.results["t"] = self.calc_num_basic_windings_t()
+    def _get_windingfactors(self, key):
+        wf = self.results[key]
+        if len(wf) == 0:
+            return np.array([]), np.array([])
+        return np.array(wf.nu), np.array(wf.kw)
 
+    def _calc_kw_el(self):
         # electrical winding factor
-        a, b, c, d = analyse.calc_kw(
-            self.machinedata["Q"],
-            self.machinedata["phases"],
-            self.machinedata["turns"],
-            self.machinedata["p"],
+        return analyse.calc_windingfactors(
+            self.get_num_slots(),
+            self.results["layout"],
+            None,
+            self.get_num_polepairs(),
             config["N_nu_el"],
             config,
+            spectrum=self.results["spectrum"],
+            layout=self.results["padded_layout"],
         )
-        self.results["nu_el"] = a
-        self.results["Ei_el"] = b
-        self.results["kw_el"] = c
-        self.results["phaseangle_el"] = d
 
+    def _calc_kw_mech(self):
         # mechanical winding factor
-        a, b, c, d = analyse.calc_kw(
-            self.machinedata["Q"],
-            self.machinedata["phases"],
-            self.machinedata["turns"],
+        return analyse.calc_windingfactors(
+            self.get_num_slots(),
+            self.results["layout"],
+            None,
             1.0,
             config["N_nu_mech"],
             config,
+            spectrum=self.results["spectrum"],
+            layout=self.results["padded_layout"],
         )
-        self.results["nu_mech"] = a
-        self.results["Ei_mech"] = b
-        self.results["kw_mech"] = c
-        self.results["phaseangle_mech"] = d
 
+    def _get_kw_el_lists(self):
+        return self.results["wf_el"].to_lists()
+
+    def _get_kw_mech_lists(self):
+        return self.results["wf_mech"].to_lists()
+
+    def _calc_is_symmetric(self):
         # winding symmetric?
-        self.results["wdg_is_symmetric"] = analyse.wdg_is_symmetric(
-            self.results["Ei_el"], self.machinedata["m"]
-        )
+        Ei = self.results["wf_el"].get_Ei()
+        return analyse.wdg_is_symmetric(Ei, self.get_num_phases())
 
+    def _calc_periodic(self):
         # periodicity of the winding (radial force, parallel connection)?
-        self.results["wdg_periodic"] = analyse.wdg_get_periodic(
-            self.results["Ei_el"], self.machinedata["phases"]
+        Ei = self.results["wf_el"].get_Ei()
+        return analyse.wdg_get_periodic(Ei, self.results["layout"])
+
+    def _calc_parallel(self):
+        # parallel connections by the periodicity of the fundamental
+        Q, P = self.get_num_slots(), 2 * self.get_num_polepairs()
+        layout = self.results["layout"]
+        padded = self.results["padded_layout"]
+        Ei, _ = analyse.calc_star_batch(Q, padded, P / 2, [1])
+        a = analyse.wdg_get_periodic(analyse.unpad(Ei, padded), layout)[0]
+        return a, numbertheory.lcm(Q, P)
+
+    def _calc_MMK(self):
+        theta = analyse.calc_slot_currents(
+            self.get_num_slots(), self.get_num_phases(), self.results["layout"]
         )
+        mmf = analyse.MMF(self.get_num_slots(), theta)
+        # same number of harmonics as a DFT of 'num_MMF_points' samples
+        HA = mmf.harmonics((config["num_MMF_points"] - 1) // 2)
+        nu = list(range(len(HA)))
 
-        # MMK
-        if "MMK" not in self.results.keys():
-            self._calc_MMK()
+        MMK = {}
+        MMK["mmf"] = mmf
+        MMK["theta"] = mmf.theta
+        MMK["nu"] = nu
+        MMK["HA"] = HA
+        return MMK
 
-        bc, bc_txt = self.get_basic_characteristics()
-        self.results["basic_char"] = bc
-        self.results["t"] = bc["t"]
-        self.results["a"] = bc["a"]
-        self.results["lcmQP"] = bc["lcmQP"]
+    def get_MMF(self, angle=0.0):
+        """
+        Returns the magneto-motive force (MMF) of the winding as a
+        piecewise constant function of the slot currents
 
-    def _calc_MMK(self):
-        phi, MMK, theta = analyse.calc_MMK(
+        Parameters
+        ----------
+        angle:   float
+                 phase angle of the current system in electrical degree
+
+        Returns
+        -------
+        mmf: analyse.MMF object
+             use mmf.sample() to get the MMF curve
+        """
+        if angle == 0.0:
+            return self.results["MMK"]["mmf"]
+        theta = analyse.calc_slot_currents(
             self.get_num_slots(),
             self.get_num_phases(),
             self.get_phases(),
             self.get_turns(),
-            N=config["num_MMF_points"],
+            angle=angle,
         )
-        HA = analyse.DFT(MMK[:-1])
-        nu = list(range(len(HA)))
-
-        self.results["MMK"] = {}
-        self.results["MMK"]["MMK"] = MMK
-        self.results["MMK"]["phi"] = phi
-        self.results["MMK"]["theta"] = theta
-        self.results["MMK"]["nu"] = nu
-        self.results["MMK"]["HA"] = HA
+        return analyse.MMF(self.get_num_slots(), theta)
 
     def plot_layout(self, filename, res=None, show=False):
         """
@@ -982,7 +1629,8 @@ class datamodel:
         show: Bool
               If true the window pops up for interactive usage
         optimize_overhang: Bool
-              If true swat-em tries to identify shorter winding overhangs
+              If true the winding overhang with the minimum total
+              length is used
         """
         if res == None:
             res = config["plt"]["res"]
@@ -1075,7 +1723,8 @@ class datamodel:
              Resolution for the figure in pixes for x and y direction
              example: res = [800, 600]
         optimize_overhang: Bool
-              If true swat-em tries to identify shorter winding overhangs
+              If true the winding overhang with the minimum total
+              length is used
         draw_poles: Bool
               If true the poles of the rotor are drawn
         show: Bool
@@ -1117,7 +1766,7 @@ class datamodel:
         else:
             data = data[idx_in_file]
             self.machinedata = data.machinedata
-            self.results = data.results
+            self.reset_results()
 
     def export_xlsx(self, fname):
         """
@@ -1180,7 +1829,8 @@ class datamodel:
         Parameters
         ----------
         optimize_overhang : Bool 
-                            Optimize for short winding connection (experimental!)
+                            Use the connection with the minimum total
+                            length of the end windings
                  
         Returns
         -------
@@ -1201,12 +1851,45 @@ class datamodel:
 
         ovh = analyse.create_wdg_overhang(S, Q, num_layers)
         if optimize_overhang:
-            head = ovh.get_overhang(w=None)
+            head = ovh.get_optimal_overhang()
         else:
             head = ovh.get_overhang(w=w)
 
         return head
 
+    def get_wdg_overhang_length(self, optimize_overhang=False):
+        """
+        Returns the length of the winding overhang as sum of the
+        coil spans (see get_wdg_overhang()).
+
+        Parameters
+        ----------
+        optimize_overhang : Bool 
+                            Use the connection with the minimum total
+                            length of the end windings
+
+        Returns
+        -------
+        length: integer
+                total length of the end windings in slot pitches
+        length_phase: list
+                      length of the end windings for each phase
+        runtime: float
+                 time for calculating the connections in seconds
+
+        Raises
+        ------
+        ValueError
+            if optimize_overhang is True and the number of positive and
+            negative coil sides of a phase is different (see
+            analyse.create_wdg_overhang.get_optimal_overhang)
+        """
+        t0 = time.perf_counter()
+        head = self.get_wdg_overhang(optimize_overhang=optimize_overhang)
+        runtime = time.perf_counter() - t0
+        length, length_phase = analyse.calc_overhang_length(head)
+        return length, length_phase, runtime
+
 
 class project:
     """
@@ -1230,12 +1913,57 @@ class project:
 
     def save_undo_state(self):
         """saves the actual state of the models for undo function"""
-        self.undo_state.append(copy.deepcopy([self.models, self._is_saved]))
+        self.undo_state.append(self._get_state(self.undo_state))
         self.set_save_state(False)
+        self._limit_undo_memory()
 
     def save_redo_state(self):
         """saves the actual state of the models for redo function"""
-        self.redo_state.append(copy.deepcopy([self.models, self._is_saved]))
+        self.redo_state.append(self._get_state(self.redo_state))
+
+    def _get_state(self, states):
+        """
+        Returns the state of all models for undo/redo: the machinedata
+        of every model as a pickled bytes object. Unchanged models share
+        the object with the previous state, so a state only needs memory
+        for the changed models.
+        """
+        known = {}
+        for other in (self.undo_state, self.redo_state):
+            if other:
+                known.update((s, s) for s in other[-1][0])
+        models = []
+        for data in self.models:
+            s = _dump_model_state(data)
+            models.append(known.get(s, s))
+        return [models, self._is_saved]
+
+    def _set_state(self, state):
+        """
+        Restores the models of a state. Models which are unchanged keep
+        their results, all others are recalculated on demand (or taken
+        from the results cache).
+        """
+        unchanged = {}
+        for data in self.models:
+            unchanged.setdefault(_dump_model_state(data), []).append(data)
+        models, self._is_saved = state
+        self.models = []
+        for s in models:
+            if unchanged.get(s):
+                self.models.append(unchanged[s].pop(0))
+            else:
+                self.models.append(_load_model_state(s))
+
+    def _limit_undo_memory(self):
+        """removes the oldest undo states if the memory limit is exceeded"""
+        max_size = config["undo"]["max_memory_MB"] * 1024**2
+        while len(self.undo_state) > 1 and self.get_undo_memory() > max_size:
+            self.undo_state.pop(0)
+
+    def get_undo_memory(self):
+        """returns the memory size of all undo and redo states in bytes"""
+        return get_size([self.undo_state, self.redo_state])
 
     def reset_undo_state(self):
         """delete all existings undo state saves - no undo possible any more"""
@@ -1263,14 +1991,12 @@ class project:
     def undo(self):
         """restores the last state"""
         if self.get_num_undo_state() > 0:
-            self.models, self._is_saved = self.undo_state.pop(-1)
-            gc.collect()  # force to free memory
+            self._set_state(self.undo_state.pop(-1))
 
     def redo(self):
         """restores the last state"""
         if self.get_num_redo_state() > 0:
-            self.models, self._is_saved = self.redo_state.pop(-1)
-            gc.collect()  # force to free memory
+            self._set_state(self.redo_state.pop(-1))
 
     def set_filename(self, filename):
         """saves the filename if a the data is load from file or
@@ -1326,7 +2052,7 @@ class project:
 
     def clone_by_index(self, idx):
         """duplicates the model with the index 'idx' """
-        data = copy.deepcopy(self.models[idx])
+        data = self.models[idx].copy()
         data.set_title(data.get_title() + "_copy")
         self.add_model(data)
 
@@ -1339,6 +2065,15 @@ class project:
         """replaces the model of index 'idx' with 'newmodel' """
         self.models[idx] = newmodel
 
+    def invalidate_config(self, *keys):
+        """
+        Removes the results of all models which depend on the given
+        config keys (see datamodel.invalidate_config). Results are only
+        recalculated for the models which are accessed afterwards.
+        """
+        for m in self.models:
+            m.invalidate_config(*keys)
+
     def analyse_all_models(self):
         """analyse/recalculate all existing models"""
         for m in self.models:
@@ -1379,6 +2114,24 @@ class project:
             self.set_save_state(True)
 
 
+def _dump_model_state(data):
+    """state of a datamodel for undo/redo (without the results)"""
+    return pickle.dumps(
+        (data.machinedata, data.title, data.notes, data.generator_info),
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+
+
+def _load_model_state(state):
+    """creates a datamodel from a state of _dump_model_state"""
+    data = datamodel()
+    data.machinedata, data.title, data.notes, data.generator_info = pickle.loads(
+        state
+    )
+    data.reset_results()
+    return data
+
+
 def save_models_to_file(models, fname, file_format=2):
     """
     Saves winding models to file. 
@@ -17,9 +17,8 @@ pg.setConfigOption("foreground", "k")
 pg.setConfigOptions(antialias=True)
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from swat_em import wdggenerator
-from swat_em import datamodel
-from swat_em.config import config, get_phase_color, get_line_color
+from swat_em import sniffer
+from swat_em.config import config, get_config_dir, get_phase_color, get_line_color
 from swat_em.report import num2str
 
 if getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS"):
@@ -128,88 +127,22 @@ class CombSniffer(QDialog):
         else:
             es = 0
 
-        Qlist = []
-        Plist = []
-        wlist = []
-        layerslist = []
-        for Q_ in Qrange:
-            for P_ in Prange:
-                for l_ in layers:
-                    if l_ == 2:
-                        w = Q_ / P_
-                        if w >= 2:
-                            for w_ in range(1, int(w) + 1):
-                                Qlist.append(Q_)
-                                Plist.append(P_)
-                                wlist.append(w_)
-                                layerslist.append(l_)
-                        else:
-                            Qlist.append(Q_)
-                            Plist.append(P_)
-                            wlist.append(-1)
-                            layerslist.append(l_)
-                    else:
-                        Qlist.append(Q_)
-                        Plist.append(P_)
-                        wlist.append(-1)
-                        layerslist.append(l_)
-
-        num_combinations = len(Qlist)
-        #  print('Num combinations:', num_combinations)
-        #  print('Qlist', Qlist)
-        #  print('Plist', Plist)
-        #  print('wlist', wlist)
-        #  print('layerslist', layerslist)
-
         self.progressBar.setValue(0)
-        self.wdg_list = []
-        self.bc_list = []
-        for k in range(num_combinations):
-            wdg = datamodel()
-            wdg.genwdg(
-                Qlist[k],
-                Plist[k],
-                m=m,
-                layers=layerslist[k],
-                w=wlist[k],
-                empty_slots=es,
-                analyse=False,
-            )
-            kw1 = wdg.get_fundamental_windingfactor()
-            #  print('Q', Qlist[k])
-            #  print('P', Plist[k])
-            #  print('w', wlist[k])
-            #  print('layers', layerslist[k])
-            #  print('kw1', kw1)
-
-            if kw1 is not None:
-                if kw1[0] > 0.01:
-                    bc, bc_str = wdg.get_basic_characteristics()
-                    if bc["sym"]:
-                        self.wdg_list.append(wdg)
-                        self.bc_list.append(bc)
-            self.progressBar.setValue(100 / num_combinations * (k + 1))
-
-        self.data = {}
-        self.data["idx"] = list(range(len(self.wdg_list)))
-        self.data["Q"] = [wdg.get_num_slots() for wdg in self.wdg_list]
-        self.data["P"] = [2 * wdg.get_num_polepairs() for wdg in self.wdg_list]
-        self.data["m"] = [wdg.get_num_phases() for wdg in self.wdg_list]
-        self.data["q"] = [bc["q"] for bc in self.bc_list]
-        self.data["w"] = []
-        for wdg in self.wdg_list:
-            w = wdg.get_coilspan()
-            if type(w) == type([]):
-                self.data["w"].append(np.mean(w))
-            else:
-                self.data["w"].append(w)
-
-        self.data["kw1"] = [bc["kw1"][0] for bc in self.bc_list]
-        self.data["sigma_d"] = [bc["sigma_d"] for bc in self.bc_list]
-        self.data["a"] = [bc["a"] for bc in self.bc_list]
-        self.data["t"] = [bc["t"] for bc in self.bc_list]
-        self.data["r1"] = [bc["r"][0] for bc in self.bc_list]
-        self.data["lcmQP"] = [bc["lcmQP"] for bc in self.bc_list]
+        # the results are written to the config directory, so an
+        # interrupted sweep is continued if it is started again
+        self.res = sniffer.sweep(
+            Qrange,
+            Prange,
+            m,
+            layers,
+            empty_slots=es,
+            callback=self.update_progress,
+            path=os.path.join(get_config_dir(), "sniffer"),
+            overwrite=True,
+        )
+        self.data = {key: self.res[key] for key in self.plot_keys}
+        self.num_analysed = self.res["num_combinations"]
+        self.num_pruned = self.res["num_pruned"]
 
         # make shure that keys for data are the same as the
         # items in the combo boxes of the axis to plot
@@ -220,13 +153,18 @@ class CombSniffer(QDialog):
         #  print('fertig')
         #  print('kw1:', kw1)
 
+    def update_progress(self, done, total):
+        self.progressBar.setValue(int(100 / total * done))
+        QApplication.processEvents()
+
     def update_data_in_gui(self):
         self.update_plot()
         self.fill_table()
         self.textBrowser_wdginfo.setHtml(
-            "{} valid windings found!<br><br>Click on a point in the \
-        graphic window to get more informations!".format(
-                len(self.wdg_list)
+            "{} valid windings found!<br>({} combinations analysed, {} not \
+        feasible)<br><br>Click on a point in the graphic window to get more \
+        informations!".format(
+                len(self.data["Q"]), self.num_analysed, self.num_pruned
             )
         )
 
@@ -235,6 +173,7 @@ class CombSniffer(QDialog):
         resetting all data before generating windings
         """
         self.data = {}
+        self.res = None
         self.fig.clear()
         self.indices_text = []
         self.scatter_marker_index = None
@@ -334,7 +273,7 @@ class CombSniffer(QDialog):
 
         # if there is one ore more points selected
         if len(idx) > 1:
-            DIALOG = select_index(self.wdg_list, idx)
+            DIALOG = select_index(self.res, idx)
             idx = DIALOG.run()
             if idx is None:
                 return
@@ -356,7 +295,7 @@ class CombSniffer(QDialog):
         """
         user selected a cell/winding combination
         """
-        d = self.wdg_list[sel]
+        d = sniffer.get_datamodel(self.res, sel)
         bc, bc_text = d.get_basic_characteristics()
         self.textBrowser_wdginfo.setHtml(bc_text)
 
@@ -447,7 +386,7 @@ class CombSniffer(QDialog):
                     overwrite = True
                 else:
                     overwrite = False
-                wdg = self.wdg_list[self.scatter_marker_index]
+                wdg = sniffer.get_datamodel(self.res, self.scatter_marker_index)
                 w = self.data["w"][self.scatter_marker_index]
                 if int(w) != w:
                     w = -1
@@ -470,10 +409,10 @@ class select_index(QDialog):
     than one point in the plot
     """
 
-    def __init__(self, wdg_list, indices):
+    def __init__(self, res, indices):
         super().__init__()
         uic.loadUi(os.path.join(__dir__, "ui", "CombSnifferSelIndix.ui"), self)
-        self.wdg_list = wdg_list
+        self.res = res
         self.indices = indices
         self.listWidget.currentRowChanged.connect(self.index_changed)
         self.fill_table()
@@ -494,7 +433,7 @@ class select_index(QDialog):
         """
         i = self.listWidget.currentRow()
         i = self.indices[i]
-        bc, bc_text = self.wdg_list[i].get_basic_characteristics()
+        bc, bc_text = sniffer.get_datamodel(self.res, i).get_basic_characteristics()
         self.textBrowser_wdginfo.setHtml(bc_text)
 
     def run(self):
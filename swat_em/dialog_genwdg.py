@@ -12,6 +12,7 @@ import sys
 import os
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from swat_em import analyse
 from swat_em import wdggenerator
 from swat_em import datamodel
 from swat_em.config import config, get_phase_color
@@ -227,29 +228,48 @@ class GenWindingCombinations(QDialog):
         #  self.Qlist = list(range(self.Q1, self.Q2+1, self.m))
         self.Plist = list(range(self.P1, self.P2 + 1, 2))
 
-        self.data = []
-        for iQ, kQ in enumerate(self.Qlist):
-            self.data.append([])
-            for iP, kP in enumerate(self.Plist):
-                d = datamodel()
-                d.set_machinedata(Q=kQ, m=self.m, p=kP / 2)
-                ret = wdggenerator.genwdg(
-                    kQ, kP, self.m, wstep, self.layers, empty_slots
-                )
-                if ret:
-                    if wstep == 1 and ret["wstep"] != 1:
-                        d.set_valid(False, "", "")
-                    else:
-                        d.set_phases(S=ret["phases"], w=ret["wstep"])
-                        d.set_valid(ret["valid"], ret["error"], ret["info"])
-                        d.set_num_empty_slots(ret["Qes"])
-                        bc, bc_str = d.get_basic_characteristics()
-
-                else:
-                    d.set_valid(False, "", "")
-                self.data[iQ].append(d)
+        # generate all combinations at once and calculate only the
+        # characteristics of the table (see analyse.screen_winding)
+        Q, P = [a.ravel() for a in np.meshgrid(self.Qlist, self.Plist, indexing="ij")]
+        self.batch = wdggenerator.genwdg_batch(
+            Q, P, self.m, wstep, self.layers, empty_slots
+        )
+        self.data = [[None] * len(self.Plist) for kQ in self.Qlist]
+        for k in range(len(Q)):
+            layout = wdggenerator.get_batch_layout(self.batch, k)
+            if layout is None or not self.batch["valid"][k]:
+                continue
+            w0, w1 = self.batch["wstep_offsets"][k : k + 2]
+            w = self.batch["wstep"][w0:w1].tolist()
+            w = w[0] if len(w) == 1 else w
+            if wstep == 1 and w != 1:
+                continue
+            Qes = int(self.batch["Qes"][k])
+            cell = analyse.screen_winding(
+                int(Q[k]),
+                int(P[k]),
+                self.m,
+                layout,
+                Qes,
+                num_modes=config["radial_force"]["num_modes"],
+                N_nu=(config["num_MMF_points"] - 1) // 2,
+            )
+            cell.update({"Q": int(Q[k]), "P": int(P[k]), "w": w, "Qes": Qes, "idx": k})
+            self.data[k // len(self.Plist)][k % len(self.Plist)] = cell
         self.update_table()
 
+    def get_datamodel(self, cell):
+        """
+        Returns the datamodel of a winding of the table
+        """
+        item = wdggenerator.get_batch_item(self.batch, cell["idx"])
+        d = datamodel()
+        d.set_machinedata(Q=cell["Q"], m=self.m, p=cell["P"] // 2)
+        d.set_phases(S=item["phases"], w=item["wstep"])
+        d.set_valid(item["valid"], item["error"], item["info"])
+        d.set_num_empty_slots(item["Qes"])
+        return d
+
     def update_table(self):
         self.table = self.tableCombinations
         self.table.clear()
@@ -272,52 +292,39 @@ class GenWindingCombinations(QDialog):
             self.table.setVerticalHeaderItem(i, table_header_item)
 
         for iQ, kQ in enumerate(self.Qlist):
-            self.data.append([])
             for iP, kP in enumerate(self.Plist):
-                if (
-                    self.data[iQ][iP].generator_info["valid"]
-                    and self.data[iQ][iP].results["basic_char"]["sym"]
-                ):
-                    bc = self.data[iQ][iP].results["basic_char"]
-                    if bc["kw1"][0] > 0.01:
-                        idx = self.comboBox_plotval.currentIndex()
-                        if idx == 0:
-                            txt = str(round(bc["kw1"][0], 3))
-                        elif idx == 1:
-                            txt = str(bc["q"])
-                        elif idx == 2:
-                            txt = str(bc["t"])
-                        elif idx == 3:
-                            txt = str(bc["a"])
-                        elif idx == 4:
-                            txt = str(bc["lcmQP"])
-                        elif idx == 5:
-                            txt = str(bc["r"][0])
-                        elif idx == 6:
-                            txt = str(round(bc["sigma_d"], 3))
-
-                        self.table.setItem(iQ, iP, QTableWidgetItem(txt))
-                        q = bc["q"]
-
-                        if self.data[iQ][iP].get_coilspan() == 1:
-                            self.table.item(iQ, iP).setBackground(
-                                QtGui.QColor("#ADD8E6")
-                            )
-                        elif q.denominator == 1:
-                            self.table.item(iQ, iP).setBackground(
-                                QtGui.QColor("#E6C3AD")
-                            )
-                        else:
-                            self.table.item(iQ, iP).setBackground(
-                                QtGui.QColor("#BCFFBC")
-                            )
-                        if self.data[iQ][iP].get_num_empty_slots() != 0:
-                            self.table.item(iQ, iP).setBackground(
-                                QtGui.QColor("#E9AEE2")
-                            )
-                        self.table.item(iQ, iP).setFlags(
-                            QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEnabled
-                        )  # note editable
+                bc = self.data[iQ][iP]
+                if bc is not None and bc["sym"] and bc["kw1"] > 0.01:
+                    idx = self.comboBox_plotval.currentIndex()
+                    if idx == 0:
+                        txt = str(round(bc["kw1"], 3))
+                    elif idx == 1:
+                        txt = str(bc["q"])
+                    elif idx == 2:
+                        txt = str(bc["t"])
+                    elif idx == 3:
+                        txt = str(bc["a"])
+                    elif idx == 4:
+                        txt = str(bc["lcmQP"])
+                    elif idx == 5:
+                        txt = str(bc["r1"])
+                    elif idx == 6:
+                        txt = str(round(bc["sigma_d"], 3))
+
+                    self.table.setItem(iQ, iP, QTableWidgetItem(txt))
+                    q = bc["q"]
+
+                    if bc["w"] == 1:
+                        self.table.item(iQ, iP).setBackground(QtGui.QColor("#ADD8E6"))
+                    elif q.denominator == 1:
+                        self.table.item(iQ, iP).setBackground(QtGui.QColor("#E6C3AD"))
+                    else:
+                        self.table.item(iQ, iP).setBackground(QtGui.QColor("#BCFFBC"))
+                    if bc["Qes"] != 0:
+                        self.table.item(iQ, iP).setBackground(QtGui.QColor("#E9AEE2"))
+                    self.table.item(iQ, iP).setFlags(
+                        QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEnabled
+                    )  # note editable
 
         self.table.resizeColumnsToContents()
 
@@ -335,12 +342,13 @@ class GenWindingCombinations(QDialog):
             sel = sel[0]
             row = sel.row()
             column = sel.column()
-            d = self.data[row][column]
+            cell = self.data[row][column]
 
-            if not d.generator_info["valid"]:
+            if cell is None:
                 self.tableWindingLayout.clear()
                 return None, None
 
+            d = self.get_datamodel(cell)
             bc, bc_text = d.get_basic_characteristics()
             self.textBrowser_wdginfo.setHtml(bc_text)
 
@@ -376,13 +384,14 @@ class GenWindingCombinations(QDialog):
                 overwrite = False
             row, column = self.combination_selected()
             if row is not None:
+                cell = self.data[row][column]
                 ret = {}
-                ret["Q"] = self.data[row][column].get_num_slots()
-                ret["P"] = 2 * self.data[row][column].get_num_polepairs()
-                ret["m"] = self.data[row][column].get_num_phases()
-                ret["w"] = self.data[row][column].get_coilspan()
+                ret["Q"] = cell["Q"]
+                ret["P"] = cell["P"]
+                ret["m"] = self.m
+                ret["w"] = cell["w"]
                 ret["layers"] = self.layers
-                ret["Qes"] = self.data[row][column].get_num_empty_slots()
+                ret["Qes"] = cell["Qes"]
                 ret["overwrite"] = overwrite
                 return ret
             else:
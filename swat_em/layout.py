@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+Provides an array based representation of the winding layout
+"""
+import numpy as np
+
+
+class WindingLayout:
+    """
+    Winding layout stored as parallel arrays with one entry per coil
+    side. The coil sides are ordered by phase, then by layer and then
+    in the order of the nested list (see from_phases), so all coil
+    sides of a phase and of a layer of a phase are contiguous and
+    views can be returned without copying.
+
+    Attributes
+    ----------
+    slot :        1D ndarray (int32)
+                  slot number (positive)
+    sign :        1D ndarray (int8)
+                  winding direction (1 or -1)
+    layer :       1D ndarray (int16)
+                  layer index (starting with 0)
+    phase :       1D ndarray (int16)
+                  phase index (starting with 0)
+    turns :       1D ndarray (float)
+                  number of turns
+    signed_slot : 1D ndarray (int32)
+                  slot * sign (the slot number of the nested list)
+    num_phases :  integer
+                  number of phases
+    num_layers :  integer
+                  number of layers
+    """
+
+    __slots__ = (
+        "slot",
+        "sign",
+        "layer",
+        "phase",
+        "turns",
+        "signed_slot",
+        "num_phases",
+        "num_layers",
+        "_offsets",
+        "_layers_per_phase",
+        "_scalar_turns",
+    )
+
+    def __init__(
+        self, slot, sign, layer, phase, turns=1, num_phases=None, num_layers=None
+    ):
+        """
+        Parameters
+        ----------
+        slot :       array_like
+                     slot number of every coil side (positive)
+        sign :       array_like
+                     winding direction of every coil side (1 or -1)
+        layer :      array_like
+                     layer index of every coil side
+        phase :      array_like
+                     phase index of every coil side
+        turns :      number or array_like
+                     number of turns of every coil side
+        num_phases : integer
+                     number of phases (for phases without coil sides)
+        num_layers : integer
+                     number of layers (for layers without coil sides)
+        """
+        slot = np.asarray(slot, dtype=np.int32).ravel()
+        phase = np.asarray(phase, dtype=np.int16).ravel()
+        layer = np.asarray(layer, dtype=np.int16).ravel()
+        # stable, so the order inside a layer is kept
+        idx = np.lexsort((layer, phase))
+        self.slot = np.abs(slot[idx])
+        self.sign = np.where(np.asarray(sign).ravel()[idx] < 0, -1, 1).astype(np.int8)
+        self.layer = layer[idx]
+        self.phase = phase[idx]
+        self.signed_slot = self.slot * self.sign
+        if np.ndim(turns) == 0:
+            self._scalar_turns = turns
+            self.turns = np.full(len(idx), turns, dtype=float)
+        else:
+            self._scalar_turns = None
+            self.turns = np.asarray(turns, dtype=float).ravel()[idx]
+
+        if num_phases is None:
+            num_phases = int(self.phase.max()) + 1 if len(idx) > 0 else 0
+        if num_layers is None:
+            num_layers = int(self.layer.max()) + 1 if len(idx) > 0 else 1
+        self.num_phases = int(num_phases)
+        self.num_layers = int(num_layers)
+        self._layers_per_phase = np.full(self.num_phases, self.num_layers)
+
+        # start of the coil sides of phase km and layer kl:
+        # _offsets[km * num_layers + kl]
+        count = np.bincount(
+            self.phase.astype(int) * self.num_layers + self.layer,
+            minlength=self.num_phases * self.num_layers,
+        )
+        self._offsets = np.concatenate([[0], np.cumsum(count)])
+
+    @classmethod
+    def from_phases(cls, S, turns=1):
+        """
+        Creates the layout from the nested list format of the datamodel
+
+        Parameters
+        ----------
+        S :      list of lists
+                 winding layout, S[phase][layer][coil side]
+        turns :  number or list of lists (shape of 'S')
+                 number of turns. If turns is a list of lists, for each
+                 coil side a specific number of turns is used
+
+        Returns
+        -------
+        return : WindingLayout
+        """
+        slot, phase, layer = [], [], []
+        layers_per_phase = [len(s) for s in S]
+        for km, s in enumerate(S):
+            for kl, sl in enumerate(s):
+                slot.extend(sl)
+                phase.extend([km] * len(sl))
+                layer.extend([kl] * len(sl))
+        if hasattr(turns, "__iter__"):
+            turns = [t for tm in turns for tl in tm for t in tl]
+        layout = cls(
+            slot,
+            np.sign(slot),
+            layer,
+            phase,
+            turns,
+            num_phases=len(S),
+            num_layers=max(layers_per_phase + [1]),
+        )
+        layout._layers_per_phase = np.array(layers_per_phase, dtype=int)
+        return layout
+
+    def to_phases(self):
+        """
+        Returns the winding layout in the nested list format of the
+        datamodel, S[phase][layer][coil side]
+        """
+        return [
+            [
+                self.signed_slot[self.get_slice(km, kl)].tolist()
+                for kl in range(self._layers_per_phase[km])
+            ]
+            for km in range(self.num_phases)
+        ]
+
+    def to_turns(self):
+        """
+        Returns the number of turns in the format of the datamodel:
+        a scalar if the layout was created with a scalar, otherwise
+        a nested list with the shape of to_phases()
+        """
+        if self._scalar_turns is not None:
+            return self._scalar_turns
+        return [
+            [
+                self.turns[self.get_slice(km, kl)].tolist()
+                for kl in range(self._layers_per_phase[km])
+            ]
+            for km in range(self.num_phases)
+        ]
+
+    def get_slice(self, km, kl=None):
+        """
+        Returns the slice of the coil sides of phase 'km' (all layers
+        if 'kl' is None) for indexing the arrays of the layout
+        """
+        if kl is None:
+            start = self._offsets[km * self.num_layers]
+            stop = self._offsets[(km + 1) * self.num_layers]
+        else:
+            start = self._offsets[km * self.num_layers + kl]
+            stop = self._offsets[km * self.num_layers + kl + 1]
+        return slice(int(start), int(stop))
+
+    def get_slots(self, km, kl=None):
+        """
+        Returns the signed slot numbers of phase 'km' (and layer 'kl')
+        as a view
+        """
+        return self.signed_slot[self.get_slice(km, kl)]
+
+    def get_turns(self, km, kl=None):
+        """
+        Returns the number of turns of the coil sides of phase 'km'
+        (and layer 'kl') as a view
+        """
+        return self.turns[self.get_slice(km, kl)]
+
+    def slot_matrix(self, Q):
+        """
+        Returns the layout in slot orientation (see datamodel.get_layers)
+
+        Parameters
+        ----------
+        Q :      integer
+                 number of slots
+
+        Returns
+        -------
+        return : 2D ndarray (int)
+                 signed phase number (starting with 1) for every layer
+                 and every slot, 0 for an empty position;
+                 M[layer][slot-1]
+        """
+        M = np.zeros((self.num_layers, Q), dtype=int)
+        # sorted by phase -> the last phase wins if a position is
+        # allocated twice
+        M[self.layer, (self.slot - 1) % Q] = self.sign * (self.phase.astype(int) + 1)
+        return M
+
+    def __len__(self):
+        return len(self.slot)
+
+    def __eq__(self, other):
+        if not isinstance(other, WindingLayout):
+            return NotImplemented
+        return (
+            self.num_phases == other.num_phases
+            and np.array_equal(self._layers_per_phase, other._layers_per_phase)
+            and np.array_equal(self.signed_slot, other.signed_slot)
+            and np.array_equal(self.layer, other.layer)
+            and np.array_equal(self.phase, other.phase)
+            and np.array_equal(self.turns, other.turns)
+        )
+
+    def __repr__(self):
+        return "WindingLayout(phases={}, layers={}, coil sides={})".format(
+            self.num_phases, self.num_layers, len(self)
+        )
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import sys
 import os
+import multiprocessing
 #from PyQt5 import uic
 # from PyQt5.QtWidgets import (
 #     QMainWindow,
@@ -25,18 +26,29 @@ else:
     __dir__ = os.path.dirname(os.path.abspath(__file__))
 
 
+# The combination sniffer uses worker processes, which import this
+# module again (spawn start method). The worker processes of frozen
+# executables run this module before freeze_support() is called, they
+# are started with the '--multiprocessing-fork' argument.
+_is_main_process = (
+    multiprocessing.current_process().name == "MainProcess"
+    and "--multiprocessing-fork" not in sys.argv
+)
+
 # Create a splash screen while loading the librarys because this
 # takes some time
-app = QApplication([])  # temp. app needed for splash
-splash_pix = QPixmap(os.path.join(__dir__, "ui", "bitmaps", "splash.png"))
-splash = QSplashScreen(splash_pix, QtCore.Qt.WindowStaysOnTopHint)
-splash.show()
+if _is_main_process:
+    app = QApplication([])  # temp. app needed for splash
+    splash_pix = QPixmap(os.path.join(__dir__, "ui", "bitmaps", "splash.png"))
+    splash = QSplashScreen(splash_pix, QtCore.Qt.WindowStaysOnTopHint)
+    splash.show()
 
 import time
 import argparse
 import subprocess
 import platform
 import tempfile
+import copy
 from swat_em import __version__
 from swat_em import dialog_genwdg
 from swat_em import dialog_about
@@ -45,7 +57,7 @@ from swat_em import dialog_winding_layout
 from swat_em import dialog_import_winding
 from swat_em import dialog_combination_sniffer
 from swat_em import dialog_settings
-from swat_em.config import config, save_config, get_config
+from swat_em.config import config, save_config, get_config, get_changed_keys
 from swat_em import datamodel, project
 
 # from swat_em import wdggenerator
@@ -537,14 +549,17 @@ class MainWindow(QMainWindow):
                 raise (Exception, "winding generator {} not implemented".format(ret))
 
     def dialog_settings(self):
-        global config
-        config
+        config_old = copy.deepcopy(config)
         DIALOG_Settings = dialog_settings.Settings(config)
         ret = DIALOG_Settings.run()
         if ret:
-            config = ret
+            if ret is not config:  # reset to default values
+                config.clear()
+                config.update(ret)
             save_config(config)
-            self.project.analyse_all_models()  # recalc all models
+            # only the results depending on the changed values are
+            # removed and recalculated for the displayed model
+            self.project.invalidate_config(*get_changed_keys(config_old, config))
             self.update_data_in_GUI()
 
     def update_data_in_GUI(self):
@@ -967,4 +982,5 @@ def main():
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
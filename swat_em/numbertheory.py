@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Provides number theory functions for windings (prime factorization,
+divisors, gcd, lcm and the number of slots per pole and phase)
+"""
+import fractions
+import functools
+import math
+
+
+@functools.lru_cache(maxsize=4096)
+def factorize(n):
+    """
+    Returns the prime factorization of an integer
+
+    Parameters
+    ----------
+    n :      integer
+             number to factorize (n >= 1)
+
+    Returns
+    -------
+    return : tuple
+             pairs of (prime, exponent) in ascending order,
+             e.g. 360 -> ((2, 3), (3, 2), (5, 1))
+    """
+    n = int(n)
+    factors = []
+    d = 2
+    while d * d <= n:
+        if n % d == 0:
+            e = 0
+            while n % d == 0:
+                n //= d
+                e += 1
+            factors.append((d, e))
+        d += 1 if d == 2 else 2
+    if n > 1:
+        factors.append((n, 1))
+    return tuple(factors)
+
+
+@functools.lru_cache(maxsize=4096)
+def _divisors(n):
+    n = int(n)
+    if n < 1:
+        return ()
+    divisors = [1]
+    for prime, e in factorize(n):
+        divisors = [d * prime**k for d in divisors for k in range(e + 1)]
+    return tuple(sorted(divisors))
+
+
+def divisors(n):
+    """
+    Returns all divisors of an integer
+
+    Parameters
+    ----------
+    n :      integer
+             number
+
+    Returns
+    -------
+    return : list
+             divisors in ascending order (empty list for n < 1)
+    """
+    return list(_divisors(n))
+
+
+def gcd(a, b):
+    """
+    Returns the greatest common divisor of two integers
+    """
+    return math.gcd(int(a), int(b))
+
+
+def lcm(a, b):
+    """
+    Returns the least common multiple of two integers
+    """
+    a, b = int(a), int(b)
+    if a == 0 or b == 0:
+        return 0
+    return abs(a // math.gcd(a, b) * b)
+
+
+def calc_q(Q, P, m, Qes=0):
+    """
+    Returns the number of slots per pole and phase as exact fraction
+
+    Parameters
+    ----------
+    Q :      integer
+             number of slots
+    P :      integer
+             number of poles
+    m :      integer
+             number of phases
+    Qes :    integer
+             number of empty slots
+
+    Returns
+    -------
+    return : Fraction
+             q = (Q - Qes) / (m * P)
+    """
+    return fractions.Fraction(Q - Qes) / fractions.Fraction(m * P)
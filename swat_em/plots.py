@@ -412,7 +412,11 @@ class _polar_layout_plot:
 
         self.fig.disableAutoRange()  # disable because of porformance
         # (a lot of elements are plottet)
-        head = self.data.get_wdg_overhang(optimize_overhang=optimize_overhang)
+        try:
+            head = self.data.get_wdg_overhang(optimize_overhang=optimize_overhang)
+        except ValueError:
+            # no complete connection possible: show the nearest coil sides
+            head = self.data.get_wdg_overhang()
 
         def get_pos(num, r=1):
             """
@@ -592,7 +596,11 @@ class _overhang_plot:
             fill = pg.FillBetweenItem(c1, c2, brush=brush)
             self.fig.addItem(fill)
 
-        head = self.data.get_wdg_overhang(optimize_overhang=optimize_overhang)
+        try:
+            head = self.data.get_wdg_overhang(optimize_overhang=optimize_overhang)
+        except ValueError:
+            # no complete connection possible: show the nearest coil sides
+            head = self.data.get_wdg_overhang()
 
         i = 1
         for phase in head:
@@ -900,12 +908,8 @@ class _windingfactor:
         self.fig.clear()
         _pg_clear_legend(self.leg)
 
-        if mechanical:
-            nu = np.array(self.data.results["nu_mech"])
-            kw = np.array(self.data.results["kw_mech"])
-        else:
-            nu = np.array(self.data.results["nu_el"])
-            kw = np.array(self.data.results["kw_el"])
+        wf = self.data.results["wf_mech" if mechanical else "wf_el"]
+        nu, kw = wf.nu, wf.kw
 
         if len(kw) == 0:  # no data to plot
             if self.table is not None:
@@ -1027,21 +1031,15 @@ class _mmk:
         self.show = show
         plot_MMK_greater_than = config["plot_MMF_harmonics"]
 
-        phi, MMK, theta = analyse.calc_MMK(
-            self.data.get_num_slots(),
-            self.data.get_num_phases(),
-            self.data.get_phases(),
-            self.data.get_turns(),
-            angle=phase,
-        )
-        phi = np.array(phi)
+        mmf = self.data.get_MMF(angle=phase)
+        phi, _ = mmf.sample(config["num_MMF_points"])
+        theta = mmf.theta
         threshold = config["threshold_MMF_harmonics"]
         #  nu, A, phase = self.data.get_MMF_harmonics(threshold = threshold)
 
-        HA = analyse.DFT(MMK[:-1])
-        A = np.abs(HA)
-        phase = np.angle(HA)
-        nu = np.arange(len(HA))
+        nu, A, phase = analyse.calc_MMF_harmonics(
+            mmf.Q, theta, (config["num_MMF_points"] - 1) // 2
+        )
 
         idx = A > np.max(A) * threshold
         nu = nu[idx]
@@ -1054,24 +1052,19 @@ class _mmk:
         _pg_clear_legend(self.leg1)
 
         pen = pg.mkPen(color=get_line_color(0), width=config["plt"]["lw"])
-        curve = pg.PlotCurveItem(phi, MMK, pen=pen)
+        curve = pg.PlotCurveItem(*mmf.steps(), pen=pen)
         self.fig1.addItem(curve)
 
         # Plotte Oberschwingungen
-        i = 0
-        for n, a, p in zip(nu, A, phase):
-            if 1 / max(A) * a > plot_MMK_greater_than:
-                pen = pg.mkPen(
-                    color=get_line_color(i + 1), width=config["plt"]["lw_thin"]
-                )
-                curve = pg.PlotCurveItem(
-                    phi,
-                    a * np.cos(n * phi / phi[-1] * 2 * np.pi + p),
-                    name="<div>&nu;={}</div>".format(n),
-                    pen=pen,
-                )
-                self.fig1.addItem(curve)
-                i += 1
+        curves = analyse.calc_MMF_harmonic_curves(
+            phi, nu, A, phase, plot_MMK_greater_than
+        )
+        for i, (n, y) in enumerate(curves):
+            pen = pg.mkPen(color=get_line_color(i + 1), width=config["plt"]["lw_thin"])
+            curve = pg.PlotCurveItem(
+                phi, y, name="<div>&nu;={}</div>".format(n), pen=pen
+            )
+            self.fig1.addItem(curve)
         self.fig1.autoRange()
         self.fig1.setLimits(xMin=min(phi), xMax=max(phi))
 
@@ -8,6 +8,7 @@ import numpy as np
 #import xlsxwriter
 import re
 from swat_em import analyse
+from swat_em import numbertheory
 from swat_em.config import config
 
 
@@ -227,8 +228,7 @@ class HtmlReport:
         # create table of winding factor
         # electrical
         d = []
-        nu = np.array(self.data.results["nu_el"])
-        kw = np.array(self.data.results["kw_el"])
+        nu, kw = self.data.results["wf_el"].nu, self.data.results["wf_el"].kw
         header = ["nu"] + self.data.get_phasenames()
         for i, line in enumerate(kw):
             d.append([str(nu[i])] + [str(round(k, 3)) for k in line])
@@ -236,8 +236,7 @@ class HtmlReport:
 
         # mechanical
         d = []
-        nu = np.array(self.data.results["nu_mech"])
-        kw = np.array(self.data.results["kw_mech"])
+        nu, kw = self.data.results["wf_mech"].nu, self.data.results["wf_mech"].kw
         header = ["nu"] + self.data.get_phasenames()
         for i, line in enumerate(kw):
             d.append([str(nu[i])] + [str(round(k, 3)) for k in line])
@@ -245,16 +244,9 @@ class HtmlReport:
 
         # create MMK
         d = []
-        phi, MMK, theta = analyse.calc_MMK(
-            self.data.get_num_slots(),
-            self.data.get_num_phases(),
-            self.data.get_phases(),
-            self.data.get_turns(),
-            angle=0.0,
+        nu, A, _ = self.data.get_MMF_harmonics(
+            threshold=config["threshold_MMF_harmonics"]
         )
-        nu = np.array(self.data.results["MMK"]["nu"])
-        HA = analyse.DFT(MMK[:-1])[: len(nu)]
-        A = np.abs(HA)
         header = ["nu", "Amp", "[%]"]
         for k in range(len(nu)):
             a = A[k]
@@ -293,7 +285,7 @@ class HtmlReport:
             line = line.replace(
                 "{{ plot_MMK }}", os.path.join(self.contentdir, "plot_MMK.png")
             )
-            line = line.replace("{{ table_MMK }}", _table_wf_mech)
+            line = line.replace("{{ table_MMK }}", _table_MMK)
 
             _report.append(line)
 
@@ -529,13 +521,25 @@ class TextReport:
                 )
         t = ascii_table2(head, np.array(data).T).split("\n")
         self._txt += t
+        length, _ = analyse.calc_overhang_length(ov)
+        try:
+            length_opt, _, _ = self.data.get_wdg_overhang_length(
+                optimize_overhang=True
+            )
+        except ValueError:
+            length_opt = "-"  # unequal number of positive/negative coil sides
+        self._txt.append(
+            "Sum of all coil spans: {} (minimum possible: {})".format(
+                length, length_opt
+            )
+        )
         self._txt.append("")
 
         bc, txt = self.data.get_basic_characteristics()
         self._txt.append("WINDING FACTOR")
         self._txt.append("==============")
         self._txt.append("Periodic base winding                  t: {}".format(bc["t"]))
-        a_ = [str(i) for i in analyse.Divisors(bc["a"])]
+        a_ = [str(i) for i in numbertheory.divisors(bc["a"])]
         self._txt.append(
             "Possible parallel winding connections  a: {}".format(", ".join(a_))
         )
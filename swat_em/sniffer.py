@@ -0,0 +1,592 @@
+# -*- coding: utf-8 -*-
+"""
+Provides the combination sniffer without GUI: all windings for ranges
+of slots and poles are generated and analysed. The combinations are
+split into chunks, which are processed by a pool of worker processes.
+The results are in the order of the combinations, independent of the
+number of processes. The winding layouts are stored in the compact
+array format of wdggenerator.genwdg_batch; a datamodel is created only
+on demand (see get_datamodel).
+
+For large sweeps the results can be written to a directory chunk by
+chunk (see sweep). An interrupted sweep is resumed from the completed
+chunks.
+
+Example
+-------
+>>> from swat_em import sniffer
+>>> res = sniffer.sweep(range(6, 61), range(2, 21, 2), m=3)
+>>> wdg = sniffer.get_datamodel(res, 0)
+"""
+import concurrent.futures
+import copy
+import fractions
+import json
+import math
+import os
+
+import numpy as np
+
+from swat_em import analyse
+from swat_em import wdggenerator
+from swat_em.config import config
+
+# keys of the results with one value per found winding
+RESULT_KEYS = [
+    "idx",
+    "Q",
+    "P",
+    "m",
+    "q",
+    "w",
+    "sigma_d",
+    "kw1",
+    "a",
+    "t",
+    "r1",
+    "lcmQP",
+    "layers",
+    "comb",
+]
+
+# arrays of the compact winding layouts (see wdggenerator.genwdg_batch)
+LAYOUT_KEYS = [
+    "offsets",
+    "slots",
+    "phase",
+    "layer",
+    "wstep",
+    "wstep_offsets",
+    "valid",
+    "Qes",
+    "error",
+    "info",
+]
+
+# version of the file format of the results directory
+FILE_VERSION = 1
+
+
+def get_combinations(Q, P, m, layers=(1, 2), empty_slots=0, prefilter=True):
+    """
+    Returns all combinations of a sweep. For double layer windings with
+    Q/P >= 2 every coil span w = 1 ... Q/P is a combination, the other
+    windings are generated with the automatic coil span (w = -1).
+
+    Parameters
+    ----------
+    Q :      integer or list
+             number(s) of slots
+    P :      integer or list
+             number(s) of poles
+    m :      integer
+             number of phases
+    layers : integer or list
+             number(s) of layers (1 and/or 2)
+    empty_slots : integer
+             number of empty slots (-1: automatic, see genwdg)
+    prefilter : Bool
+             If True, only the combinations which can result in a
+             symmetric winding are returned (see wdggenerator.is_feasible)
+
+    Returns
+    -------
+    return : dict
+             arrays "Q", "P", "w" and "layers" with one entry for each
+             combination, "m", "empty_slots" and "num_pruned" (number
+             of combinations removed by the prefilter)
+    """
+    Q, P, layers = [
+        a.ravel()
+        for a in np.meshgrid(
+            np.array(Q, dtype=int),
+            np.array(P, dtype=int),
+            np.array(layers, dtype=int),
+            indexing="ij",
+        )
+    ]
+    # every coil span is a combination
+    wsweep = (layers == 2) & (Q >= 2 * P)
+    num_w = np.where(wsweep, Q // np.maximum(P, 1), 1)
+    num = int(np.sum(num_w))
+    if prefilter:
+        feasible = wdggenerator.is_feasible(Q, P, m, layers, empty_slots)
+        Q, P, layers = Q[feasible], P[feasible], layers[feasible]
+        wsweep, num_w = wsweep[feasible], num_w[feasible]
+    start = np.cumsum(num_w) - num_w
+    w = np.arange(np.sum(num_w)) - np.repeat(start, num_w) + 1
+    return {
+        "Q": np.repeat(Q, num_w),
+        "P": np.repeat(P, num_w),
+        "w": np.where(np.repeat(wsweep, num_w), w, -1),
+        "layers": np.repeat(layers, num_w),
+        "m": m,
+        "empty_slots": empty_slots,
+        "num_pruned": num - int(np.sum(num_w)),
+    }
+
+
+def _new_results():
+    return {key: [] for key in RESULT_KEYS}
+
+
+def _ranges(start, stop):
+    """concatenated ranges start[k] ... stop[k]-1"""
+    n = stop - start
+    first = np.cumsum(n) - n
+    return np.arange(np.sum(n), dtype=int) - np.repeat(first - start, n)
+
+
+def _select_layouts(batch, rows):
+    """
+    Returns the compact winding layouts of the combinations 'rows' of a
+    result of genwdg_batch (rows without a winding are not allowed)
+    """
+    rows = np.asarray(rows, dtype=int)
+    start, stop = batch["offsets"][rows], batch["offsets"][rows + 1]
+    sides = _ranges(start, stop)
+    w0, w1 = batch["wstep_offsets"][rows], batch["wstep_offsets"][rows + 1]
+    return {
+        "m": batch["m"],
+        "offsets": np.concatenate([[0], np.cumsum(stop - start)]).astype(int),
+        "slots": batch["slots"][sides],
+        "phase": batch["phase"][sides],
+        "layer": batch["layer"][sides],
+        "wstep": batch["wstep"][_ranges(w0, w1)],
+        "wstep_offsets": np.concatenate([[0], np.cumsum(w1 - w0)]).astype(int),
+        "valid": batch["valid"][rows],
+        "Qes": batch["Qes"][rows],
+        "error": [batch["error"][k] for k in rows],
+        "info": [batch["info"][k] for k in rows],
+    }
+
+
+def _concat_layouts(layouts, m):
+    """Concatenates compact winding layouts (see _select_layouts)"""
+    res = {"m": m}
+    for key in ["slots", "phase", "layer", "wstep", "valid", "Qes"]:
+        res[key] = np.concatenate([l[key] for l in layouts] + [[]]).astype(
+            layouts[0][key].dtype if len(layouts) > 0 else int
+        )
+    for key in ["offsets", "wstep_offsets"]:
+        sizes = [np.diff(l[key]) for l in layouts]
+        res[key] = np.concatenate([[0], np.cumsum(np.concatenate(sizes + [[]]))])
+        res[key] = res[key].astype(int)
+    for key in ["error", "info"]:
+        res[key] = [txt for l in layouts for txt in l[key]]
+    return res
+
+
+def _set_config(cfg):
+    """
+    Takes over the config of the main process in a worker process. The
+    results cache is disabled: every combination is analysed once only.
+    """
+    cfg = copy.deepcopy(cfg)
+    config.clear()
+    config.update(cfg)
+    config["cache"]["enabled"] = False
+    config["cache"]["disk_enabled"] = False
+
+
+def _sniff_chunk(Q, P, m, w, layers, empty_slots, start=0, screening=True):
+    """
+    Generates and analyses the windings of one chunk of combinations.
+    Windings with a fundamental winding factor <= 0.01 and asymmetric
+    windings are skipped.
+
+    Returns
+    -------
+    return : dict
+             results of the found windings (see RESULT_KEYS, without
+             "idx"); "comb" is the index of the combination and
+             "layouts" are the compact winding layouts
+    """
+    from swat_em.datamodel import datamodel
+
+    num_modes = config["radial_force"]["num_modes"]
+    N_nu = (config["num_MMF_points"] - 1) // 2
+    res = _new_results()
+    rows = []
+    batch = wdggenerator.genwdg_batch(Q, P, m, w, layers, empty_slots)
+    for k in range(len(batch["Q"])):
+        Q_, P_ = int(batch["Q"][k]), int(batch["P"][k])
+        if screening:
+            layout = wdggenerator.get_batch_layout(batch, k)
+            if layout is None:
+                continue
+            Qes = int(batch["Qes"][k])
+            bc = analyse.screen_winding(Q_, P_, m, layout, Qes, num_modes, N_nu)
+        else:
+            item = wdggenerator.get_batch_item(batch, k)
+            if item is None:
+                continue
+            wdg = _new_datamodel(datamodel, Q_, P_, m, item)
+            kw1 = wdg.get_fundamental_windingfactor()
+            if kw1 is None:
+                continue
+            bc = wdg.results["basic_char"]
+            bc = dict(bc, kw1=bc["kw1"][0], r1=bc["r"][0] if len(bc["r"]) > 0 else 0)
+        if bc["kw1"] <= 0.01 or not bc["sym"]:
+            continue
+        for key in ["q", "sigma_d", "kw1", "a", "t", "r1", "lcmQP"]:
+            res[key].append(bc[key])
+        res["Q"].append(Q_)
+        res["P"].append(P_)
+        res["m"].append(m)
+        w0, w1 = batch["wstep_offsets"][k : k + 2]
+        wstep = batch["wstep"][w0:w1]
+        res["w"].append(int(wstep[0]) if len(wstep) == 1 else float(np.mean(wstep)))
+        res["layers"].append(int(batch["layers"][k]))
+        res["comb"].append(start + k)
+        rows.append(k)
+    del res["idx"]
+    res["layouts"] = _select_layouts(batch, rows)
+    return res
+
+
+def _new_datamodel(datamodel, Q, P, m, item):
+    wdg = datamodel()
+    wdg.set_machinedata(int(Q), int(P) // 2, int(m), item["Qes"])
+    wdg.set_phases(S=item["phases"], turns=1, w=item["wstep"])
+    wdg.set_valid(valid=item["valid"], error=item["error"], info=item["info"])
+    return wdg
+
+
+def get_datamodel(res, k):
+    """
+    Returns a datamodel object of the winding 'k' of the results of
+    sweep() or load_results(). The datamodel is created from the compact
+    winding layout.
+    """
+    from swat_em.datamodel import datamodel
+
+    item = wdggenerator.get_batch_item(res["layouts"], k)
+    return _new_datamodel(datamodel, res["Q"][k], res["P"][k], res["m"][k], item)
+
+
+def _get_chunks(num, chunksize):
+    return [(k, min(k + chunksize, num)) for k in range(0, num, chunksize)]
+
+
+# columns with integer values; the others are floats ("q": Fractions)
+_INT_KEYS = ["idx", "Q", "P", "m", "a", "t", "r1", "lcmQP", "layers", "comb"]
+
+
+def _get_sweep_params(Q, P, m, layers, empty_slots, prefilter, screening):
+    """parameters which define the results of a sweep (see sweep)"""
+    return {
+        "Q": np.ravel(np.array(Q, dtype=int)).tolist(),
+        "P": np.ravel(np.array(P, dtype=int)).tolist(),
+        "m": int(m),
+        "layers": np.ravel(np.array(layers, dtype=int)).tolist(),
+        "empty_slots": int(empty_slots),
+        "prefilter": bool(prefilter),
+        "screening": bool(screening),
+        "num_MMF_points": config["num_MMF_points"],
+        "radial_force": config["radial_force"],
+    }
+
+
+def _manifest_fname(path):
+    return os.path.join(path, "manifest.json")
+
+
+def _chunk_fname(path, k):
+    return os.path.join(path, "chunk_{:06d}.npz".format(k))
+
+
+def _read_manifest(path):
+    """Returns the manifest of a results directory (None if there is none)"""
+    fname = _manifest_fname(path)
+    if not os.path.isfile(fname):
+        return None
+    with open(fname) as f:
+        return json.load(f)
+
+
+def _write_manifest(path, manifest):
+    # write to a temporary file first: the manifest is never incomplete
+    fname = _manifest_fname(path)
+    with open(fname + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(fname + ".tmp", fname)
+
+
+def _clear_results(path):
+    """Removes the results files of a sweep (other files are kept)"""
+    for fname in os.listdir(path):
+        if fname.startswith("chunk_") or fname.startswith("manifest.json"):
+            os.remove(os.path.join(path, fname))
+
+
+def _write_chunk(path, k, res):
+    """Writes the results of the chunk 'k' (see _sniff_chunk)"""
+    arrays = {
+        key: np.array(res[key], dtype=int if key in _INT_KEYS else float)
+        for key in RESULT_KEYS
+        if key not in ("idx", "q")
+    }
+    arrays["q_numerator"] = np.array([q.numerator for q in res["q"]], dtype=int)
+    arrays["q_denominator"] = np.array([q.denominator for q in res["q"]], dtype=int)
+    for key in LAYOUT_KEYS:
+        value = res["layouts"][key]
+        if key in ("error", "info"):
+            value = np.array(value, dtype=str)
+        arrays["layout_" + key] = value
+    fname = _chunk_fname(path, k)
+    with open(fname + ".tmp", "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(fname + ".tmp", fname)
+
+
+def _read_chunk(path, k, m):
+    """Reads the results of the chunk 'k' (see _write_chunk)"""
+    with np.load(_chunk_fname(path, k)) as f:
+        res = {key: f[key] for key in f.files if not key.startswith("layout_")}
+        res["layouts"] = {key: f["layout_" + key] for key in LAYOUT_KEYS}
+    for key in ["error", "info"]:
+        res["layouts"][key] = res["layouts"][key].tolist()
+    res["layouts"]["m"] = m
+    return res
+
+
+def load_results(path):
+    """
+    Loads the results of a sweep which were written to the directory
+    'path' (see sweep). The results of an interrupted sweep contain the
+    completed chunks only.
+
+    Parameters
+    ----------
+    path :   string
+             results directory
+
+    Returns
+    -------
+    return : dict
+             same keys as the results of sweep(); the columns are numpy
+             arrays ("q": array of Fractions)
+    """
+    manifest = _read_manifest(path)
+    if manifest is None:
+        raise ValueError("no sweep results in '{}'".format(path))
+    m = manifest["params"]["m"]
+    completed = sorted(manifest["completed"])
+    chunks = [_read_chunk(path, k, m) for k in completed]
+
+    res = {}
+    for key in RESULT_KEYS:
+        if key not in ("idx", "q"):
+            res[key] = np.concatenate([c[key] for c in chunks] + [[]]).astype(
+                int if key in _INT_KEYS else float
+            )
+    q = [
+        np.concatenate([c[key] for c in chunks] + [[]]).astype(int).tolist()
+        for key in ["q_numerator", "q_denominator"]
+    ]
+    res["q"] = np.array([fractions.Fraction(n, d) for n, d in zip(*q)], dtype=object)
+    res["idx"] = np.arange(len(res["Q"]))
+    res["layouts"] = _concat_layouts([c["layouts"] for c in chunks], m)
+    res["num_combinations"] = manifest["num_combinations"]
+    res["num_pruned"] = manifest["num_pruned"]
+    res["cancelled"] = len(completed) < len(manifest["chunks"])
+    return res
+
+
+def sweep(
+    Q,
+    P,
+    m,
+    layers=(1, 2),
+    empty_slots=0,
+    processes=None,
+    chunksize=None,
+    callback=None,
+    cancel=None,
+    prefilter=True,
+    screening=True,
+    path=None,
+    overwrite=False,
+):
+    """
+    Generates and analyses all windings of the combinations of slots,
+    poles and layers (see get_combinations) and returns the
+    characteristics of the windings with a fundamental winding factor
+    > 0.01 and a symmetric layout.
+
+    If a results directory 'path' is given, the results of every chunk
+    are written to a file 'chunk_<k>.npz' as soon as the chunk is
+    finished and the completed chunks are listed in 'manifest.json'.
+    The results are not kept in memory. If the directory contains the
+    results of an interrupted sweep with the same parameters, only the
+    missing chunks are calculated.
+
+    Parameters
+    ----------
+    Q :         integer or list
+                number(s) of slots
+    P :         integer or list
+                number(s) of poles
+    m :         integer
+                number of phases
+    layers :    integer or list
+                number(s) of layers (1 and/or 2)
+    empty_slots : integer
+                number of empty slots (-1: automatic, see genwdg)
+    processes : integer
+                number of worker processes (None: number of CPUs,
+                1: no worker processes)
+    chunksize : integer
+                number of combinations of a work unit (None: automatic).
+                A resumed sweep uses the chunks of the manifest.
+    callback :  function
+                called as callback(done, total) with the number of
+                analysed combinations after every chunk
+    cancel :    threading.Event (or an object with a 'is_set' method)
+                The sweep is stopped if the event is set. Running
+                chunks are finished, the others are skipped.
+    prefilter : Bool
+                If True, the combinations which can't result in a
+                symmetric winding are skipped without generating the
+                winding layout (see get_combinations)
+    screening : Bool
+                If True, only the characteristics of the results are
+                calculated (see analyse.screen_winding), otherwise the
+                full analysis of the datamodel is used
+    path :      string
+                results directory (None: results in memory only)
+    overwrite : Bool
+                If True, results of a sweep with other parameters in
+                'path' are removed. Otherwise a ValueError is raised.
+
+    Returns
+    -------
+    return : dict
+             lists with one entry per winding (in the order of the
+             combinations): "idx", "Q", "P", "m", "q", "w" (mean coil
+             span), "sigma_d", "kw1", "a", "t", "r1", "lcmQP", "layers"
+             and "comb" (index of the combination); "layouts" (compact
+             winding layouts, see get_datamodel), "num_combinations"
+             (number of analysed combinations), "num_pruned" (number
+             of combinations skipped by the prefilter) and "cancelled"
+             (True if the sweep was cancelled; then only the results of
+             the finished chunks are included). With a results
+             directory the results are loaded by load_results().
+    """
+    comb = get_combinations(Q, P, m, layers, empty_slots, prefilter)
+    num = len(comb["Q"])
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = max(1, min(processes, num))
+    if chunksize is None:
+        # a few chunks per process for load balancing
+        chunksize = min(256, max(1, math.ceil(num / (4 * processes))))
+    chunks = _get_chunks(num, chunksize)
+
+    completed = set()
+    if path is not None:
+        params = _get_sweep_params(Q, P, m, layers, empty_slots, prefilter, screening)
+        params = json.loads(json.dumps(params))
+        manifest = _read_manifest(path)
+        if manifest is not None and (
+            manifest.get("version") != FILE_VERSION or manifest["params"] != params
+        ):
+            if not overwrite:
+                raise ValueError(
+                    "'{}' contains the results of another sweep".format(path)
+                )
+            _clear_results(path)
+            manifest = None
+        if manifest is None:
+            os.makedirs(path, exist_ok=True)
+            manifest = {
+                "version": FILE_VERSION,
+                "params": params,
+                "num_combinations": num,
+                "num_pruned": comb["num_pruned"],
+                "chunks": chunks,
+                "completed": [],
+            }
+            _write_manifest(path, manifest)
+        chunks = [tuple(chunk) for chunk in manifest["chunks"]]
+        completed = set(manifest["completed"])
+
+    def args(chunk):
+        s = slice(*chunk)
+        return (
+            comb["Q"][s],
+            comb["P"][s],
+            m,
+            comb["w"][s],
+            comb["layers"][s],
+            empty_slots,
+            chunk[0],
+            screening,
+        )
+
+    results = {}
+    done = sum(chunks[k][1] - chunks[k][0] for k in completed)
+    todo = [k for k in range(len(chunks)) if k not in completed]
+    cancelled = False
+
+    def finished(k, res):
+        nonlocal done
+        if path is None:
+            results[k] = res
+        else:
+            _write_chunk(path, k, res)
+            completed.add(k)
+            manifest["completed"] = sorted(completed)
+            _write_manifest(path, manifest)
+        done += chunks[k][1] - chunks[k][0]
+        if callback is not None:
+            callback(done, num)
+
+    if processes == 1:
+        cache_config = dict(config["cache"])
+        config["cache"]["enabled"] = False
+        config["cache"]["disk_enabled"] = False
+        try:
+            for k in todo:
+                if cancel is not None and cancel.is_set():
+                    cancelled = True
+                    break
+                finished(k, _sniff_chunk(*args(chunks[k])))
+        finally:
+            config["cache"].update(cache_config)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+            processes, initializer=_set_config, initargs=(config,)
+        ) as executor:
+            futures = {executor.submit(_sniff_chunk, *args(chunks[k])): k for k in todo}
+            pending = set(futures)
+            while pending:
+                if cancel is not None and cancel.is_set() and not cancelled:
+                    cancelled = True
+                    for future in pending:
+                        future.cancel()
+                ready, pending = concurrent.futures.wait(
+                    pending, timeout=0.1, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in ready:
+                    if not future.cancelled():
+                        finished(futures[future], future.result())
+
+    if path is not None:
+        res = load_results(path)
+        res["cancelled"] = cancelled
+        return res
+
+    res = _new_results()
+    layouts = []
+    for k in sorted(results):
+        for key in RESULT_KEYS[1:]:
+            res[key] += results[k][key]
+        layouts.append(results[k]["layouts"])
+    res["idx"] = list(range(len(res["Q"])))
+    res["layouts"] = _concat_layouts(layouts, m)
+    res["num_combinations"] = num
+    res["num_pruned"] = comb["num_pruned"]
+    res["cancelled"] = cancelled
+    return res
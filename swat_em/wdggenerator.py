@@ -5,9 +5,10 @@
 import fractions
 
 #  from collections import deque
-import math
 import numpy as np
 from swat_em import analyse
+from swat_em import numbertheory
+from swat_em.layout import WindingLayout
 
 
 def is_even(val):
@@ -64,11 +65,231 @@ def genwdg(Q, P, m, w, layers, empty_slots=0):
     return ret
 
 
+def is_feasible(Q, P, m, layers, empty_slots=0):
+    """
+    Returns True for the combinations of slots, poles and layers for
+    which genwdg can generate a symmetric winding (only number theory,
+    no winding layout is generated). The conditions are:
+
+    - without empty slots the star of slots needs Q/(m*t) to be an
+      integer (t = gcd(Q, p)), Q/(2*m) for single layer and Q/m for
+      double layer windings (see winding_from_star_of_slot)
+    - with empty slots (general equation) Q/m must be an integer
+      (see winding_from_general_equation)
+    - for an even number of phases the opposite phasors of the star of
+      slots belong to different phases, so the Q/t phasors must be
+      split in 2*m sectors: Q/(2*m*t) must be an integer
+
+    Parameters
+    ----------
+    Q :      integer or array_like
+             number of slots
+    P :      integer or array_like
+             number of poles
+    m :      integer
+             number of phases
+    layers : integer or array_like
+             number of coil sides per slot
+    empty_slots : integer
+             number of empty slots (see genwdg)
+
+    Returns
+    -------
+    return : ndarray
+             bool for every combination (the arguments are broadcasted)
+    """
+    Q, P, layers = [np.array(a, dtype=int) for a in np.broadcast_arrays(Q, P, layers)]
+    t = np.gcd(Q, P // 2)
+    star_ok = ((layers == 1) & (Q % (2 * m) == 0)) | ((layers == 2) & (Q % m == 0))
+    if empty_slots == 0:
+        feasible = star_ok & (Q % (m * t) == 0)
+    else:
+        feasible = (Q % m == 0) | (m == 1)
+    if is_even(m):
+        feasible &= Q % (2 * m * t) == 0
+    return feasible
+
+
+def genwdg_batch(Q, P, m, w, layers, empty_slots=0):
+    """
+    Generates the winding layouts for many combinations at once (same
+    results as genwdg for every combination). The star of slots of all
+    combinations is calculated vectorized; only the combinations which
+    need the general equation (empty slots) or the single layer fallback
+    for an even coil span are generated one by one.
+
+    Parameters
+    ----------
+    Q :      integer or array_like
+             number of slots
+    P :      integer or array_like
+             number of poles
+    m :      integer
+             number of phases (the same for all combinations)
+    w :      integer or array_like
+             coil span (1 for tooth coils, -1 for automatic)
+    layers : integer or array_like
+             number of coil sides per slot
+    empty_slots : integer or array_like
+             number of empty slots (see genwdg)
+
+    The arguments are broadcasted against each other, so
+    np.meshgrid can be used for all combinations of ranges.
+
+    Returns
+    -------
+    return : dict
+             columns with one entry per combination ("Q", "P",
+             "layers", "w": the input; "valid": bool, "Qes": number of
+             empty slots, "error", "info": lists of strings) and the
+             layouts as offset-indexed arrays: the coil sides of
+             combination k are slots[offsets[k]:offsets[k+1]] (signed
+             slot number) with the arrays "phase" and "layer"; the
+             coil span is wstep[wstep_offsets[k]:wstep_offsets[k+1]].
+             Use get_batch_item() to get the result of genwdg for a
+             combination.
+    """
+    Q, P, w, layers, empty_slots = [
+        np.array(a, dtype=int).ravel()
+        for a in np.broadcast_arrays(Q, P, w, layers, empty_slots)
+    ]
+    n = len(Q)
+
+    # the generator which is used by genwdg()
+    star_ok = ((layers == 1) & (Q % (2 * m) == 0)) | ((layers == 2) & (Q % m == 0))
+    use_star = (empty_slots == 0) | ((empty_slots == -1) & star_ok)
+
+    valid = np.zeros(n, dtype=bool)
+    Qes = np.zeros(n, dtype=int)
+    error = [""] * n
+    info = [""] * n
+    wsteps = [None] * n
+    sides = []  # (combination, slot, phase, layer) of the coil sides
+
+    idx = np.flatnonzero(use_star)
+    fallback = np.array([], dtype=int)
+    if len(idx) > 0:
+        star = _star_of_slot_batch(Q[idx], P[idx], m, w[idx], layers[idx])
+        # genwdg returns None for an invalid winding without empty slots
+        keep = star["valid"] | (empty_slots[idx] != 0)
+        c = star["sides"][0]
+        use = keep[c]
+        sides.append((idx[c[use]],) + tuple(a[use] for a in star["sides"][1:]))
+        for k in np.flatnonzero(keep):
+            valid[idx[k]] = star["valid"][k]
+            error[idx[k]] = star["error"][k]
+            wsteps[idx[k]] = star["wstep"][k]
+        fallback = idx[keep & star["fallback"]]
+
+    # one by one: general equation and single layer fallback
+    layouts = []
+    for i in np.flatnonzero(~use_star):
+        args = [int(a[i]) for a in (Q, P, w, layers, empty_slots)]
+        ret = genwdg(args[0], args[1], m, args[2], args[3], args[4])
+        valid[i] = ret["valid"]
+        Qes[i] = ret["Qes"]
+        error[i], info[i] = ret["error"], ret["info"]
+        wsteps[i] = ret["wstep"]
+        layouts.append((i, ret["phases"]))
+    for i in fallback:
+        S, wsteps[i] = overlapping_fractional_slot_slayer(int(Q[i]), int(P[i]), m)
+        if Q[i] % P[i] != 0:
+            wsteps[i] = [int(Q[i] // P[i]), int(Q[i] // P[i]) + 1]
+        layouts.append((i, S))
+    for i, S in layouts:
+        slot, phase, layer = [], [], []
+        for km, s in enumerate(S):
+            for kl, sl in enumerate(s):
+                slot.extend(sl)
+                phase.extend([km] * len(sl))
+                layer.extend([kl] * len(sl))
+        sides.append((np.full(len(slot), i, dtype=int), slot, phase, layer))
+
+    cols = [
+        np.concatenate([np.asarray(s[j], dtype=int) for s in sides] + [[]]).astype(int)
+        for j in range(4)
+    ]
+    order = np.argsort(cols[0], kind="stable")
+    cand, cols = cols[0], [c[order] for c in cols[1:]]
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(cand, minlength=n))])
+
+    wstep, wstep_count = [], []
+    for ws in wsteps:
+        ws = [] if ws is None else ws if hasattr(ws, "__iter__") else [ws]
+        wstep.extend(int(k) for k in ws)
+        wstep_count.append(len(ws))
+
+    return {
+        "Q": Q,
+        "P": P,
+        "m": m,
+        "layers": layers,
+        "w": w,
+        "valid": valid,
+        "Qes": Qes,
+        "error": error,
+        "info": info,
+        "offsets": offsets,
+        "slots": cols[0].astype(np.int32),
+        "phase": cols[1].astype(np.int16),
+        "layer": cols[2].astype(np.int8),
+        "wstep": np.array(wstep, dtype=int),
+        "wstep_offsets": np.concatenate([[0], np.cumsum(wstep_count)]).astype(int),
+    }
+
+
+def get_batch_item(batch, k):
+    """
+    Returns the winding of the combination 'k' of a result of
+    genwdg_batch in the format of genwdg (None if genwdg returns None)
+    """
+    w0, w1 = batch["wstep_offsets"][k], batch["wstep_offsets"][k + 1]
+    if w1 == w0:
+        return None
+    wstep = batch["wstep"][w0:w1].tolist()
+    start, stop = batch["offsets"][k], batch["offsets"][k + 1]
+    phases = [[[], []] for km in range(batch["m"])]
+    for s, km, kl in zip(
+        batch["slots"][start:stop].tolist(),
+        batch["phase"][start:stop].tolist(),
+        batch["layer"][start:stop].tolist(),
+    ):
+        phases[km][kl].append(s)
+    return {
+        "phases": phases,
+        "wstep": wstep[0] if len(wstep) == 1 else wstep,
+        "valid": bool(batch["valid"][k]),
+        "error": batch["error"][k],
+        "info": batch["info"][k],
+        "Qes": int(batch["Qes"][k]),
+    }
+
+
+def get_batch_layout(batch, k):
+    """
+    Returns the winding of the combination 'k' of a result of
+    genwdg_batch as WindingLayout (None if genwdg returns None) without
+    creating the nested lists of the phases
+    """
+    if batch["wstep_offsets"][k + 1] == batch["wstep_offsets"][k]:
+        return None
+    s = slice(batch["offsets"][k], batch["offsets"][k + 1])
+    slots = batch["slots"][s]
+    return WindingLayout(
+        np.abs(slots),
+        np.sign(slots),
+        batch["layer"][s],
+        batch["phase"][s],
+        num_phases=batch["m"],
+        num_layers=2,
+    )
+
+
 def overlapping_fractional_slot_slayer(Q, P, m):
     from collections import deque
 
     p = P / 2
-    q = fractions.Fraction(Q / (m * 2 * p)).limit_denominator(100)
+    q = numbertheory.calc_q(Q, P, m)
     g = 0  # number of full slots
     while q > 1:
         q -= 1
@@ -175,21 +396,18 @@ def winding_from_star_of_slot(Q, P, m, w=-1, layers=2):
     error = ""
     valid = True
 
-    t = math.gcd(Q, p)
+    t = numbertheory.gcd(Q, p)
     # Test if there are enough slots for the winding
     if layers == 1:
-        test1 = fractions.Fraction(Q / (2 * m)).limit_denominator(100)
-        if test1.denominator != 1:
+        if Q % (2 * m) != 0:
             valid = False
             error += "For single layer winding Q/(2*m) must be an integer\n"
     elif layers == 2:
-        test1 = fractions.Fraction(Q / m).limit_denominator(100)
-        if test1.denominator != 1:
+        if Q % m != 0:
             valid = False
             error += "For double layer winding Q/m must be an integer"
 
-    test2 = fractions.Fraction(Q / (m * t)).limit_denominator(100)
-    if test2.denominator != 1:
+    if Q % (m * t) != 0:
         valid = False
         error += "winding not feasible"
 
@@ -252,7 +470,7 @@ def winding_from_star_of_slot(Q, P, m, w=-1, layers=2):
                 phases[km] = a2
         else:
             # use fallback function for w = even!
-            q = fractions.Fraction(Q / (m * P)).limit_denominator(100)
+            q = numbertheory.calc_q(Q, P, m)
             if q.denominator == 1:
                 for km in range(m):
                     phases[km][1] = []
@@ -275,6 +493,110 @@ def winding_from_star_of_slot(Q, P, m, w=-1, layers=2):
     return ret
 
 
+def _star_of_slot_batch(Q, P, m, w, layers):
+    """
+    Vectorized version of winding_from_star_of_slot for the arrays
+    Q, P, w and layers. Combinations which need the single layer
+    fallback (overlapping_fractional_slot_slayer) are only marked.
+    """
+    w = np.where(w == -1, np.maximum(Q // P, 1), w)
+    p = P // 2
+    t = np.gcd(Q, p)
+    err_single = (layers == 1) & (Q % (2 * m) != 0)
+    err_double = (layers == 2) & (Q % m != 0)
+    err_feasible = Q % (m * t) != 0
+    valid = ~(err_single | err_double | err_feasible)
+    error = [
+        "For single layer winding Q/(2*m) must be an integer\n" * e1
+        + "For double layer winding Q/m must be an integer" * e2
+        + "winding not feasible" * e3
+        for e1, e2, e3 in zip(
+            err_single.tolist(), err_double.tolist(), err_feasible.tolist()
+        )
+    ]
+
+    # star of slots for every (Q, p) with the same floating point
+    # operations as winding_from_star_of_slot, so phasors near a
+    # sector border are assigned to the same phase
+    Qp, inv = np.unique(np.stack([Q, p], axis=1), axis=0, return_inverse=True)
+    k = np.arange(Q.max())
+    step = 2 * np.pi * Qp[:, 1, np.newaxis] / Qp[:, 0, np.newaxis]
+    a = step * k
+    a += np.pi / m / 4
+    a -= step / 100
+    a = a.ravel()
+    idx = np.flatnonzero(a > 2 * np.pi)
+    values = a[idx]
+    while len(idx) > 0:
+        values -= 2 * np.pi
+        done = values <= 2 * np.pi
+        a[idx[done]] = values[done]
+        idx, values = idx[~done], values[~done]
+    a = a.reshape(len(Qp), len(k))
+
+    # sectors of the phases
+    r1, r2 = [], []
+    for km in range(m):
+        r = np.pi / m
+        mp = 1 if is_even(m) else 2
+        s1 = [mp * km * r, mp * km * r + r]
+        s2 = [s1[0] + np.pi, s1[1] + np.pi]
+        for sec in (s1, s2):
+            for kk in range(len(sec)):
+                while sec[kk] > 2 * np.pi:
+                    sec[kk] -= 2 * np.pi
+        r1.append(s1)
+        r2.append(s2)
+    r1, r2 = np.array(r1), np.array(r2)
+    a = a[:, np.newaxis, :]
+    inside = (k < Qp[:, 0, np.newaxis])[:, np.newaxis, :]
+    pos = (a > r1[:, 0, np.newaxis]) & (a <= r1[:, 1, np.newaxis]) & inside
+    neg = (a > r2[:, 0, np.newaxis]) & (a <= r2[:, 1, np.newaxis]) & inside
+    inv = inv.ravel()
+    pos, neg = pos[inv], neg[inv]
+
+    # coil sides of the first layer in the order of the phasors
+    # (positive before negative, like winding_from_star_of_slot)
+    c, km, i, is_neg = np.nonzero(np.stack([pos, neg], axis=-1))
+    sign = 1 - 2 * is_neg
+    s0 = sign * (i + 1)
+    s1 = -sign * ((i + w[c]) % Q[c] + 1)  # second layer
+
+    # single layer: both coil sides of the odd slots in the first
+    # layer (odd coil span) or only the first layer (even coil span)
+    odd_w = w % 2 != 0
+    single = layers[c] == 1
+    fallback = (layers == 1) & ~odd_w & (Q % (P * m) != 0)
+    keep0 = ~(single & odd_w[c] & (i % 2 != 0)) & ~fallback[c]
+    keep1 = keep0 & ~(single & ~odd_w[c])
+
+    # order: combination, phase, layer, phasor
+    keep = np.stack([keep0, keep1], axis=1).ravel()
+    layer = np.stack([np.zeros(len(c), int), np.where(single, 0, 1)], axis=1)
+    layer = layer.ravel()[keep]
+    c2 = np.repeat(c, 2)[keep]
+    km2 = np.repeat(km, 2)[keep]
+    order = np.argsort((c2 * m + km2) * 2 + layer, kind="stable")
+    sides = (
+        c2[order],
+        np.stack([s0, s1], axis=1).ravel()[keep][order],
+        km2[order],
+        layer[order],
+    )
+
+    wstep = [
+        [int(q // pp), int(q // pp) + 1] if q % pp != 0 and ww != 1 else int(ww)
+        for q, pp, ww in zip(Q, P, w)
+    ]
+    return {
+        "valid": valid,
+        "error": error,
+        "wstep": wstep,
+        "fallback": fallback,
+        "sides": sides,
+    }
+
+
 def winding_from_general_equation(Q, P, m, w=-1, layers=2, n_es=0):
     """
     Based on:
@@ -304,7 +626,7 @@ def winding_from_general_equation(Q, P, m, w=-1, layers=2, n_es=0):
             n_wc = n_lay * (N - n_es) / (2 * m)
         else:
             n_wc = n_lay * (N - 0) / (2 * m)
-        t = math.gcd(N, p)
+        t = numbertheory.gcd(N, p)
 
         # symmetric winding?
         if m % 2 == 0:
@@ -324,7 +646,7 @@ def winding_from_general_equation(Q, P, m, w=-1, layers=2, n_es=0):
         if n_es != 0:
             info += "attention: dead coil winding"
         #  print('empty_slots:', n_es)
-        q = fractions.Fraction((N - n_es) / (2 * p * m)).limit_denominator(1000)
+        q = numbertheory.calc_q(N, 2 * p, m, n_es)
         a = int(q)
         z = q.numerator - a
 
@@ -404,7 +726,7 @@ def winding_from_general_equation(Q, P, m, w=-1, layers=2, n_es=0):
                     S[k][1].append(sign * (-1) * s)
 
         if n_lay == 1:
-            w = fractions.Fraction(N / (2 * p))
+            w = fractions.Fraction(N, 2 * p)
 
     if valid:
         v, x = analyse.check_number_of_coilsides(S)
@@ -91,7 +91,78 @@ def test3():
     assert np.round(kw1, 4) == np.round(data.results["kw_el"][idx][0], 4)  # phase U
 
 
+def test_piecewise_constant_MMF():
+    print("Test sampling of the piecewise constant MMF")
+    Q = 12
+    m = 3
+    ret = genwdg(Q, 10, m, 1, 2)
+    theta = swat_em.analyse.calc_slot_currents(Q, m, ret["phases"], angle=20.0)
+    mmf = swat_em.analyse.MMF(Q, theta)
+
+    # reference: sum of step functions
+    N = 361
+    phi = np.linspace(0, 2 * np.pi, N)
+    MMK = np.zeros(N)
+    for k in range(Q):
+        MMK += theta[k] * np.where(phi - 2 * np.pi / Q * k < 0.0, 0.0, 1.0)
+    MMK -= np.mean(MMK[:-1])
+
+    x, y = mmf.sample(N)
+    np.testing.assert_allclose(x, phi / np.max(phi) * Q)
+    # the MMF is mean value free; the sampled curve differs only by a constant
+    np.testing.assert_allclose(y - np.mean(y[:-1]), MMK, atol=1e-12)
+
+    x, y = mmf.steps()
+    assert len(x) == len(y) == 2 * Q
+    np.testing.assert_allclose(y[::2], mmf.levels)
+
+
+def test_analytic_MMF_harmonics():
+    print("Test the analytic harmonics of the MMF")
+    Q = 12
+    m = 3
+    ret = genwdg(Q, 10, m, 1, 2)
+    theta = swat_em.analyse.calc_slot_currents(Q, m, ret["phases"], angle=20.0)
+
+    # reference: fourier integral of the sum of step functions
+    nu, A, phase = swat_em.analyse.calc_MMF_harmonics(Q, theta, 50)
+    HA = A * np.exp(1j * phase)
+    for k in range(1, 50):
+        ref = 0.0
+        for i in range(Q):
+            phi = 2 * np.pi / Q * i
+            ref += theta[i] * (np.exp(-1j * k * phi) - 1) / (1j * np.pi * k)
+        np.testing.assert_allclose(HA[k], ref, atol=1e-12)
+    assert A[0] == 0.0
+    np.testing.assert_array_equal(nu, np.arange(50))
+
+    # a finely sampled MMF results in (nearly) the same harmonics
+    _, MMK = swat_em.analyse.MMF(Q, theta).sample(36001)
+    HA2 = swat_em.analyse.DFT(MMK[:-1])
+    np.testing.assert_allclose(np.abs(HA2[1:50]), A[1:], atol=1e-3)
+
+
+def test_MMF_plot_data():
+    # the data of the MMF plot (see plots._mmk.plot)
+    data = datamodel()
+    data.genwdg(Q=12, P=10, m=3, layers=2, w=1)
+    mmf = data.get_MMF(angle=0)
+    phi, MMK = mmf.sample(3601)
+    nu, A, phase = swat_em.analyse.calc_MMF_harmonics(mmf.Q, mmf.theta, 1800)
+    curves = swat_em.analyse.calc_MMF_harmonic_curves(phi, nu, A, phase, 0.15)
+    assert [n for n, y in curves] == [1, 5, 7, 17, 19, 29, 31]
+    assert all(len(y) == len(phi) for n, y in curves)
+
+    # the sum of all harmonics is the MMF curve
+    curves = swat_em.analyse.calc_MMF_harmonic_curves(phi, nu, A, phase, 0)
+    y = np.sum([y for n, y in curves], axis=0)
+    assert np.median(np.abs(y - MMK)) < 0.01 * np.max(np.abs(MMK))
+
+
 if __name__ == "__main__":
     test1()
     test2()
     test3()
+    test_piecewise_constant_MMF()
+    test_analytic_MMF_harmonics()
+    test_MMF_plot_data()
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+# Test for the cache of the analysis results
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import tempfile
+import numpy as np
+from swat_em.datamodel import datamodel
+from swat_em.config import config
+from swat_em import cache
+from swat_em.cache import AnalysisCache, results_cache, get_hash, get_size
+
+
+def test_lru_cache():
+    lru = AnalysisCache(max_size=3 * get_size(np.zeros(100)))
+    for k in range(3):
+        lru.put(k, np.zeros(100))
+    assert len(lru) == 3
+    assert lru.get(0) is not None  # 0 is now the most recently used
+    lru.put(3, np.zeros(100))
+    assert 1 not in lru
+    assert 0 in lru and 3 in lru
+    assert lru.get(1) is None
+    stats = lru.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["size"] <= stats["max_size"]
+
+    lru.put(4, np.zeros(1000))  # too large for the cache
+    assert 4 not in lru
+    lru.clear()
+    assert len(lru) == 0 and lru.size == 0
+
+
+def test_hash():
+    S = [[[1, -4], []], [[3, -6], []], [[5, -2], []]]
+    assert get_hash(S, {"Q": 6}) == get_hash(S, {"Q": np.int64(6)})
+    assert get_hash(S, {"Q": 6}) != get_hash(S, {"Q": 12})
+    assert get_hash(S, 1) != get_hash(S, [[[1, 1], []], [[1, 1], []], [[1, 1], []]])
+    assert get_hash(np.array([1, 2])) == get_hash([1, 2])
+
+
+def test_shared_results():
+    results_cache.clear()
+    wdg1 = datamodel()
+    wdg1.genwdg(Q=12, P=10, m=3, w=1, layers=2)
+    bc1, _ = wdg1.get_basic_characteristics()
+    misses = results_cache.misses
+    assert results_cache.hits == 0
+
+    # same winding in an other datamodel
+    wdg2 = datamodel()
+    wdg2.genwdg(Q=12, P=10, m=3, w=1, layers=2)
+    bc2, _ = wdg2.get_basic_characteristics()
+    assert bc2 == bc1
+    assert results_cache.hits == 1
+    assert results_cache.misses == misses
+
+    # the arrays are shared, the lists and dicts belong to one datamodel
+    assert wdg2.results["MMK"]["HA"] is wdg1.results["MMK"]["HA"]
+    assert bc2 is not bc1
+    kw1 = list(bc1["kw1"])
+    bc1["kw1"][0] = 5
+    assert wdg2.get_basic_characteristics()[0]["kw1"] == kw1
+    bc1["kw1"][0] = kw1[0]
+    nu_el = list(wdg2.results["nu_el"])
+    wdg1.results["nu_el"].append(99)
+    assert wdg2.results["nu_el"] == nu_el
+    wdg3 = datamodel()
+    wdg3.genwdg(Q=12, P=10, m=3, w=1, layers=2)
+    assert wdg3.results["nu_el"] == nu_el
+    wdg4 = wdg2.copy()
+    wdg4.results["nu_el"].append(99)
+    assert wdg2.results["nu_el"] == nu_el
+
+    # different number of turns
+    wdg2.set_turns(2)
+    wdg2.get_basic_characteristics()
+    assert results_cache.misses > misses
+
+    # the config is part of the key
+    N_nu_el = config["N_nu_el"]
+    try:
+        config["N_nu_el"] = 5
+        assert len(wdg1.get_windingfactor_el()[0]) == 5
+        config["N_nu_el"] = 7
+        assert len(wdg1.get_windingfactor_el()[0]) == 7
+    finally:
+        config["N_nu_el"] = N_nu_el
+
+    # results without the cache
+    try:
+        config["cache"]["enabled"] = False
+        hits = results_cache.hits
+        wdg3 = datamodel()
+        wdg3.genwdg(Q=12, P=10, m=3, w=1, layers=2)
+        bc3, _ = wdg3.get_basic_characteristics()
+        assert bc3 is not bc1
+        assert bc3 == bc1
+        assert results_cache.hits == hits
+    finally:
+        config["cache"]["enabled"] = True
+
+
+def test_disk_cache():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fname = os.path.join(tmpdir, "cache.sqlite")
+        try:
+            config["cache"]["disk_enabled"] = True
+            cache.set_disk_cache(fname)
+            disk_cache = cache.get_disk_cache()
+            results_cache.clear()
+            wdg1 = datamodel()
+            wdg1.genwdg(Q=12, P=10, m=3, w=1, layers=2)
+            bc1, _ = wdg1.get_basic_characteristics()
+            assert len(disk_cache) == 2  # basic_char and MMK
+            assert disk_cache.hits == 0
+
+            # new session: nothing in memory
+            results_cache.clear()
+            wdg2 = datamodel()
+            wdg2.genwdg(Q=12, P=10, m=3, w=1, layers=2)
+            bc2, _ = wdg2.get_basic_characteristics()
+            assert bc2 == bc1
+            assert disk_cache.hits == 1
+            assert "MMK" not in wdg2.results.keys()
+            wdg2.get_windingfactor_el()
+            assert len(disk_cache) == 3
+
+            # other version of the analysis code
+            cache.set_disk_cache(None)
+            disk_cache = cache.DiskCache(fname)
+            assert len(disk_cache) == 3
+            disk_cache.close()
+            cache.ANALYSIS_VERSION += 1
+            disk_cache = cache.DiskCache(fname)
+            assert len(disk_cache) == 0
+            disk_cache.close()
+
+            # size limit
+            disk_cache = cache.DiskCache(fname, max_size=2500)
+            for k in range(5):
+                disk_cache.put(k, np.zeros(100))
+            assert disk_cache.get_size() <= 2500
+            assert disk_cache.evictions > 0
+            assert 4 in disk_cache and 0 not in disk_cache
+            np.testing.assert_array_equal(disk_cache.get(4), np.zeros(100))
+            disk_cache.close()
+
+            # hits don't write to the database, but count for the LRU order
+            disk_cache = cache.DiskCache(fname, max_size=3000)
+            disk_cache.clear()
+            for k in range(3):
+                disk_cache.put(k, np.zeros(100))
+            changes = disk_cache._con.total_changes
+            disk_cache.get(0)
+            assert disk_cache._con.total_changes == changes
+            disk_cache.put(3, np.zeros(100))
+            assert 0 in disk_cache and 1 not in disk_cache
+            disk_cache.get(2)
+            disk_cache.close()
+            disk_cache = cache.DiskCache(fname, max_size=3000)
+            disk_cache.put(4, np.zeros(100))
+            assert 2 in disk_cache and 0 not in disk_cache
+            disk_cache.close()
+        finally:
+            cache.ANALYSIS_VERSION = 1
+            cache.set_disk_cache(None)
+            config["cache"]["disk_enabled"] = False
+
+
+if __name__ == "__main__":
+    test_lru_cache()
+    test_hash()
+    test_shared_results()
+    test_disk_cache()
@@ -16,3 +16,31 @@ import swat_em.config
 
 #  if __name__ == '__main__':
 #  test1()
+
+
+def test_load_config_new_keys():
+    # a config file of an older version gets the new (sub-)keys
+    import json
+    import tempfile
+
+    get_config_dir = swat_em.config.get_config_dir
+    with tempfile.TemporaryDirectory() as tmpdir:
+        swat_em.config.get_config_dir = lambda: tmpdir
+        try:
+            old = swat_em.config.get_init_config()
+            del old["undo"]
+            del old["cache"]["disk_enabled"]
+            old["radial_force"] = {"num_modes": 5}
+            with open(os.path.join(tmpdir, "config.json"), "w") as f:
+                json.dump(old, f)
+            config = swat_em.config.load_config()
+        finally:
+            swat_em.config.get_config_dir = get_config_dir
+    init = swat_em.config.get_init_config()
+    assert config["undo"] == init["undo"]
+    assert config["cache"] == init["cache"]
+    assert config["radial_force"] == dict(init["radial_force"], num_modes=5)
+
+
+if __name__ == "__main__":
+    test_load_config_new_keys()
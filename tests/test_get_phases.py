@@ -24,5 +24,27 @@ def test_get_layers():
     assert list(l[1, :]) == [1, -1, -2, 2, 3, -3, -1, 1, 2, -2, -3, 3]  # second layer
 
 
+def test_get_layers_cached():
+    data = datamodel()
+    data.genwdg(Q=12, P=10, m=3, w=1, layers=2)
+    assert data.get_periodicity_t() == 1
+    l = data.results["layers"]
+    assert "layers" in data.results.keys()
+    assert "layers_str" not in data.results.keys()  # only on request
+    l2, ls, lcol = data.get_layers()
+    assert l2 is l
+    assert not l.flags.writeable
+    assert list(ls[0, :4]) == ["+1", "+2", "-2", "-3"]
+    assert lcol[0, 0] == lcol[1, 1] != lcol[0, 1]
+
+    # new layout -> new matrix
+    data.set_phases([[[1, -4], []], [[3, -6], []], [[5, -2], []]])
+    data.set_num_slots(6)
+    l, ls, lcol = data.get_layers()
+    assert list(l[0]) == [1, -3, 2, -1, 3, -2]
+    assert ls.shape == lcol.shape == (1, 6)
+
+
 if __name__ == "__main__":
     test_get_layers()
+    test_get_layers_cached()
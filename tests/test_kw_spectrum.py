@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# Test for the FFT based winding factor spectrum
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from swat_em.wdggenerator import genwdg
+from swat_em import analyse
+from swat_em.config import config
+
+
+def star_reference(Q, S, turns, p, nu):
+    """winding factor by summing up the slot voltage vectors"""
+    S2 = analyse._flatten(S)
+    S2 = [np.array(s) for s in S2]
+    _, kw = analyse.calc_star(Q, S2, turns, p, nu)
+    return kw
+
+
+def test_spectrum_equals_star():
+    for Q, P, w, layers in [(12, 10, 1, 2), (18, 4, -1, 1), (36, 4, 7, 2), (27, 6, -1, 2)]:
+        S = genwdg(Q, P, 3, w, layers)["phases"]
+        spectrum = analyse.calc_winding_spectrum(Q, S)
+        nu = np.arange(1, 3 * Q)
+        for p in [P // 2, 1]:
+            _, kw = analyse.calc_kw_spectrum(Q, spectrum, p, nu)
+            for k in nu:
+                np.testing.assert_allclose(
+                    kw[k - 1], star_reference(Q, S, 1, p, k), atol=1e-12
+                )
+
+
+def test_individual_turns():
+    Q = 6
+    S = [[[1, -4], []], [[-2, 5], []], [[3, -6], []]]
+    turns = [[[2, 1], []], [[2, 1], []], [[2, 1], []]]
+    spectrum = analyse.calc_winding_spectrum(Q, S, turns)
+    _, kw = analyse.calc_kw_spectrum(Q, spectrum, 1, [1, 2, 3])
+    for k in [1, 2, 3]:
+        S2 = [np.array(s[0]) for s in S]
+        T2 = [np.array(t[0]) for t in turns]
+        _, ref = analyse.calc_star(Q, S2, T2, 1, k)
+        np.testing.assert_allclose(kw[k - 1], ref, atol=1e-12)
+
+
+def test_calc_kw_harmonic_selection():
+    Q, P = 12, 10
+    S = genwdg(Q, P, 3, 1, 2)["phases"]
+    nu, Ei, wf, phase = analyse.calc_kw(Q, S, 1, P // 2, 19, config)
+    assert len(nu) == 19
+    assert nu[:6] == [1, 3, 5, 7, 9, 11]
+    for k in range(len(nu)):
+        assert np.all(np.abs(wf[k]) > config["kw_min"])
+        np.testing.assert_allclose(
+            np.abs(wf[k]), star_reference(Q, S, 1, P // 2, nu[k]), atol=1e-12
+        )
+
+
+def test_star_batch():
+    Q = 9
+    # phases with different number of coil sides and individual turns
+    S = [[[1, -2, 3], [-4]], [[4, -5], [6, -7]], [[-8, 9], []]]
+    turns = [[[2, 1, 1], [3]], [[1, 1], [2, 2]], [[1, 4], []]]
+    layout = analyse.pad_layout(S, turns)
+    slots, T, mask = layout
+    assert slots.shape == T.shape == mask.shape == (3, 4)
+    np.testing.assert_array_equal(mask.sum(axis=1), [4, 4, 2])
+    np.testing.assert_array_equal(slots[2], [-8, 9, 0, 0])
+    np.testing.assert_array_equal(T[0], [2, 1, 1, 3])
+
+    nu = [1, 2, 5, 7]
+    Ei, kw = analyse.calc_star_batch(Q, layout, 2, nu)
+    assert Ei.shape == (4, 3, 4)
+    assert kw.shape == (4, 3)
+    Ei2 = analyse.unpad(Ei, layout)
+    S2 = [slots[km][mask[km]] for km in range(3)]
+    T2 = [T[km][mask[km]] for km in range(3)]
+    for k in range(len(nu)):
+        ref_Ei, ref_kw = analyse.calc_star(Q, S2, T2, 2, nu[k])
+        np.testing.assert_allclose(kw[k], ref_kw, atol=1e-12)
+        for km in range(3):
+            np.testing.assert_allclose(Ei2[k][km], ref_Ei[km], atol=1e-12)
+
+
+def test_windingfactors_record():
+    Q, P = 9, 8
+    S = [[[1, -2, 3], [-4]], [[4, -5], [6, -7]], [[-8, 9], []]]
+    wf = analyse.calc_windingfactors(Q, S, 1, P // 2, 7, config)
+    assert wf.Ei.shape == (len(wf), 3, 4)
+    assert wf.kw.shape == wf.phaseangle.shape == (len(wf), 3)
+    assert wf.kw.dtype == float and wf.Ei.dtype == complex
+
+    # same results as the list format
+    nu, Ei, kw, phase = analyse.calc_kw(Q, S, 1, P // 2, 7, config)
+    assert wf.nu.tolist() == nu
+    np.testing.assert_array_equal(wf.kw, kw)
+    np.testing.assert_array_equal(wf.phaseangle, phase)
+    for k in range(len(nu)):
+        for km in range(3):
+            np.testing.assert_array_equal(wf.get_Ei()[k][km], Ei[k][km])
+    assert wf == analyse.calc_windingfactors(Q, S, 1, P // 2, 7, config)
+    assert wf != analyse.calc_windingfactors(Q, S, 2, P // 2, 7, config)
+    assert wf != analyse.calc_windingfactors(Q, S, 1, P // 2, 5, config)
+
+
+if __name__ == "__main__":
+    test_spectrum_equals_star()
+    test_individual_turns()
+    test_calc_kw_harmonic_selection()
+    test_star_batch()
+    test_windingfactors_record()
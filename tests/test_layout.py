@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# Test for the array based winding layout
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from swat_em.datamodel import datamodel
+from swat_em.layout import WindingLayout
+from swat_em.config import config
+from swat_em import analyse
+
+
+def test_layout_conversion():
+    S = [[[1, -4, 7], [-2]], [[3, -6], [5, -8]], [[-9], []]]
+    turns = [[[2, 1, 1], [3]], [[1, 1], [2, 2]], [[4], []]]
+    layout = WindingLayout.from_phases(S, turns)
+    assert len(layout) == 9
+    assert layout.num_phases == 3
+    assert layout.num_layers == 2
+    assert layout.to_phases() == S
+    assert layout.to_turns() == turns
+    assert layout.slot.dtype == np.int32
+    np.testing.assert_array_equal(layout.sign[:4], [1, -1, 1, -1])
+    np.testing.assert_array_equal(layout.get_slots(1), [3, -6, 5, -8])
+    np.testing.assert_array_equal(layout.get_slots(1, 1), [5, -8])
+    np.testing.assert_array_equal(layout.get_turns(0, 0), [2, 1, 1])
+    assert len(layout.get_slots(2, 1)) == 0
+
+    # views, no copies
+    assert np.shares_memory(layout.get_slots(1), layout.signed_slot)
+    assert np.shares_memory(layout.get_turns(1, 1), layout.turns)
+
+    # scalar number of turns and the order of the arrays
+    layout2 = WindingLayout(
+        [4, 1, 2, 3], [1, 1, -1, -1], [0, 0, 1, 0], [1, 0, 0, 1], turns=5
+    )
+    assert layout2.to_phases() == [[[1], [-2]], [[4, -3], []]]
+    assert layout2.to_turns() == 5
+    assert layout2 == WindingLayout.from_phases(layout2.to_phases(), 5)
+    assert layout2 != layout
+
+
+def test_layout_datamodel():
+    for Q, P, w, layers in [(12, 10, 1, 2), (18, 4, -1, 1), (36, 4, 7, 2)]:
+        wdg = datamodel()
+        wdg.genwdg(Q=Q, P=P, m=3, w=w, layers=layers)
+        layout = wdg.get_layout()
+        assert layout.to_phases() == wdg.get_phases()
+        M = layout.slot_matrix(Q)
+        np.testing.assert_array_equal(M[: wdg.get_num_layers()], wdg.get_layers()[0])
+
+        # analysis functions with the layout instead of nested lists
+        S, turns = wdg.get_phases(), wdg.get_turns()
+        p = wdg.get_num_polepairs()
+        res1 = analyse.calc_kw(Q, S, turns, p, 10, config)
+        res2 = analyse.calc_kw(Q, layout, None, p, 10, config)
+        assert res1[0] == res2[0]
+        np.testing.assert_allclose(res1[2], res2[2])
+        np.testing.assert_allclose(
+            analyse.calc_slot_currents(Q, 3, S, turns),
+            analyse.calc_slot_currents(Q, 3, layout),
+        )
+        assert analyse.wdg_get_periodic(res1[1], S) == analyse.wdg_get_periodic(
+            res1[1], layout
+        )
+        assert analyse.get_basic_characteristics(
+            Q, P, 3, S, turns
+        ) == analyse.get_basic_characteristics(Q, P, 3, layout)
+        head1 = analyse.create_wdg_overhang(S, Q, layers).get_overhang()
+        head2 = analyse.create_wdg_overhang(layout, Q, layers).get_overhang()
+        assert str(head1) == str(head2)
+
+        # set the winding by a layout
+        wdg2 = datamodel()
+        wdg2.set_machinedata(Q=Q, p=p, m=3)
+        wdg2.set_phases(layout, w=wdg.get_coilspan())
+        wdg2.analyse_wdg()
+        assert wdg2.get_phases() == wdg.get_phases()
+        assert wdg2.get_turns() == wdg.get_turns()
+        assert wdg2.get_fundamental_windingfactor() == wdg.get_fundamental_windingfactor()
+
+
+if __name__ == "__main__":
+    test_layout_conversion()
+    test_layout_datamodel()
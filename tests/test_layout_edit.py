@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# Test for changing single coil sides of the winding layout
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from swat_em.datamodel import datamodel
+
+
+def raises_value_error(func, *args, **kwargs):
+    try:
+        func(*args, **kwargs)
+    except ValueError:
+        return True
+    return False
+
+
+def test_apply_delta():
+    rng = np.random.default_rng(1)
+    for Q, P, layers, w in [(12, 10, 2, 1), (36, 4, 2, 7), (18, 4, 1, -1)]:
+        wdg = datamodel()
+        wdg.genwdg(Q=Q, P=P, m=3, layers=layers, w=w)
+        wdg.get_windingfactor_el()
+        wdg.get_MMF_harmonics()
+        for k in range(20):
+            l, _, _ = wdg.get_layers()
+            layer = int(rng.integers(0, l.shape[0]))
+            slot = int(rng.integers(1, Q + 1))
+            old = int(l[layer, slot - 1])
+            new = int(rng.integers(-3, 4))
+            turns = None if k % 3 else float(rng.integers(1, 5))
+            if old == 0 and isinstance(wdg.get_turns(), list):
+                turns = 2.0
+            wdg.apply_delta(slot, layer, old, new, turns=turns)
+            assert wdg.get_layers()[0][layer, slot - 1] == new
+            # updated, not recalculated
+            assert "spectrum" in wdg.results.keys()
+            assert "MMK" in wdg.results.keys()
+            assert wdg.check_results() == []
+
+
+def test_apply_delta_errors():
+    wdg = datamodel()
+    wdg.genwdg(Q=12, P=10, m=3, layers=2, w=1)
+    l, _, _ = wdg.get_layers()
+    # wrong sign of the old coil side
+    assert raises_value_error(wdg.apply_delta, 1, 0, -l[0, 0], 2)
+    # slot is allocated
+    assert raises_value_error(wdg.apply_delta, 1, 0, 0, 2)
+    # only 3 phases
+    assert raises_value_error(wdg.apply_delta, 1, 0, l[0, 0], 4)
+
+    wdg.apply_delta(1, 0, l[0, 0], 0)
+    wdg.apply_delta(1, 0, 0, l[0, 0], turns=3)
+    assert wdg.get_turns()[abs(l[0, 0]) - 1][0][0] == 3
+    wdg.apply_delta(1, 0, l[0, 0], 0)
+    # individual turns needed
+    assert raises_value_error(wdg.apply_delta, 1, 0, 0, l[0, 0])
+
+
+if __name__ == "__main__":
+    test_apply_delta()
+    test_apply_delta_errors()
@@ -8,6 +8,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 from swat_em.wdggenerator import genwdg
 from swat_em.datamodel import datamodel
+from swat_em import analyse
 
 
 def test_num_basic_winding():
@@ -54,5 +55,17 @@ def test_num_basic_winding():
     #  assert bc['t'] == t
 
 
+def test_num_basic_winding_large():
+    # periodic with 24 slots; exchange two coil sides to break the periodicity
+    data = datamodel()
+    data.genwdg(Q=480, P=40, m=3, layers=2, w=5)
+    assert data.calc_num_basic_windings_t() == 20
+    S = data.get_phases()
+    S[0][1][-1], S[1][1][-1] = S[1][1][-1], S[0][1][-1]
+    data.set_phases(S)
+    assert data.calc_num_basic_windings_t() == 1
+
+
 if __name__ == "__main__":
     test_num_basic_winding()
+    test_num_basic_winding_large()
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# Test for the number theory functions
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import fractions
+from swat_em import numbertheory
+
+
+def test_factorize():
+    assert numbertheory.factorize(1) == ()
+    assert numbertheory.factorize(97) == ((97, 1),)
+    assert numbertheory.factorize(360) == ((2, 3), (3, 2), (5, 1))
+    for n in range(1, 500):
+        val = 1
+        for prime, e in numbertheory.factorize(n):
+            val *= prime**e
+        assert val == n
+
+
+def test_divisors():
+    for n in list(range(0, 500)) + [1024, 2310]:
+        assert numbertheory.divisors(n) == [i for i in range(1, n + 1) if n % i == 0]
+    # the cached result must not be changed by the caller
+    d = numbertheory.divisors(12)
+    d.append(100)
+    assert numbertheory.divisors(12) == [1, 2, 3, 4, 6, 12]
+
+
+def test_gcd_lcm():
+    assert numbertheory.gcd(12, 5.0) == 1
+    assert numbertheory.gcd(48, 4) == 4
+    assert numbertheory.lcm(12, 10) == 60
+    assert numbertheory.lcm(0, 10) == 0
+
+
+def test_calc_q():
+    assert numbertheory.calc_q(12, 10, 3) == fractions.Fraction(2, 5)
+    assert numbertheory.calc_q(36, 4, 3, Qes=0) == 3
+    assert numbertheory.calc_q(26, 4, 3, Qes=2) == 2
+    # no float round-trip: the denominator is not limited
+    assert numbertheory.calc_q(101, 34, 3) == fractions.Fraction(101, 102)
+    assert numbertheory.calc_q(12, 10.0, 3) == fractions.Fraction(2, 5)
+
+
+if __name__ == "__main__":
+    test_factorize()
+    test_divisors()
+    test_gcd_lcm()
+    test_calc_q()
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# Test for the connection of the coil sides (winding overhang)
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import itertools
+import numpy as np
+from swat_em.datamodel import datamodel
+from swat_em import analyse
+
+
+def connection_reference(ovh, Sp, Sn, layer, w):
+    """greedy connection by sorting the distances to all coil sides"""
+    con = []
+    Sn = list(Sn)
+    for start in Sp:
+        dist = [ovh.diff_and_direct(start, end) for end in Sn]
+        order = np.argsort([d[0] for d in dist], kind="stable")
+        idx = order[0]
+        if w is not None:
+            steps = [i for i in order if dist[i][0] in w]
+            if steps:
+                idx = steps[0]
+            if ovh.num_layers == 1 and w != [1]:
+                steps = [i for i in steps if dist[i][1] > 0]
+                if steps:
+                    idx = steps[0]
+        end = Sn.pop(idx)
+        diff, direct = ovh.diff_and_direct(start, end)
+        con.append([(start, end), diff, direct, layer])
+    return con
+
+
+def overhang_reference(S, Q, num_layers, w):
+    ovh = analyse.create_wdg_overhang(S, Q, num_layers)
+    head = []
+    for km in range(len(S)):
+        if num_layers == 1:
+            Sp, Sn = ovh.get_pos_neg_coil_sides(np.array(S[km][0]))
+            head.append(connection_reference(ovh, Sp, Sn, (0, 0), w))
+        else:
+            S1, S2 = np.array(S[km][0]), np.array(S[km][1])
+            Sp, Sn = ovh.get_pos_neg_coil_sides(S1, S2)
+            head.append(connection_reference(ovh, Sp, Sn, (0, 1), w))
+            Sp, Sn = ovh.get_pos_neg_coil_sides(S2, S1)
+            head[-1] += connection_reference(ovh, Sp, Sn, (1, 0), w)
+    return head
+
+
+def test_overhang():
+    for Q, P, w, layers in [
+        (12, 10, 1, 2),
+        (12, 2, -1, 1),
+        (18, 4, -1, 1),
+        (27, 2, -1, 2),
+        (48, 4, -1, 2),
+        (36, 4, 7, 2),
+        (54, 6, -1, 1),
+    ]:
+        wdg = datamodel()
+        wdg.genwdg(Q=Q, P=P, m=3, w=w, layers=layers)
+        S = wdg.get_phases()
+        wstep = wdg.get_coilspan()
+        for coilspan in [None, wstep]:
+            ovh = analyse.create_wdg_overhang(S, Q, layers)
+            head = ovh.get_overhang(w=coilspan)
+            if coilspan is not None and not hasattr(coilspan, "__iter__"):
+                coilspan = [coilspan]
+            ref = overhang_reference(S, Q, layers, coilspan)
+            assert str(head) == str(ref)
+
+
+def test_optimal_overhang():
+    # compare with all possible connections
+    rng = np.random.default_rng(0)
+    for k in range(100):
+        Q = int(rng.integers(4, 14))
+        n = int(rng.integers(1, 6))
+        Sp = rng.choice(np.arange(1, Q + 1), n)
+        Sn = rng.choice(np.arange(1, Q + 1), n)
+        S = [[list(Sp) + list(-Sn)]]
+        ovh = analyse.create_wdg_overhang(S, Q, 1)
+        best = min(
+            sum(ovh.diff_and_direct(Sp[i], Sn[p[i]])[0] for i in range(n))
+            for p in itertools.permutations(range(n))
+        )
+        head = ovh.get_optimal_overhang()
+        assert sorted(con[0][1] for con in head[0]) == sorted(Sn)
+        assert analyse.calc_overhang_length(head)[0] == best
+
+    # never longer than the connection with the given coil span
+    for Q, P, w, layers in [(27, 2, -1, 2), (48, 4, -1, 1), (12, 10, 1, 2)]:
+        wdg = datamodel()
+        wdg.genwdg(Q=Q, P=P, m=3, w=w, layers=layers)
+        length, length_phase, _ = wdg.get_wdg_overhang_length()
+        length_opt, _, _ = wdg.get_wdg_overhang_length(optimize_overhang=True)
+        assert length == sum(length_phase)
+        assert length_opt <= length
+    assert length_opt == 12  # tooth coil winding
+
+
+def test_optimal_overhang_unbalanced():
+    # a coil side without partner: no complete connection
+    ovh = analyse.create_wdg_overhang([[[1, 2, -5]]], 12, 1)
+    try:
+        ovh.get_optimal_overhang()
+        assert False
+    except ValueError:
+        pass
+
+    wdg = datamodel()
+    wdg.genwdg(Q=12, P=2, m=3, w=-1, layers=1)
+    S = wdg.get_phases()
+    S[0][0] = S[0][0][:-1]
+    wdg.set_phases(S)
+    try:
+        wdg.get_wdg_overhang_length(optimize_overhang=True)
+        assert False
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    test_overhang()
+    test_optimal_overhang()
+    test_optimal_overhang_unbalanced()
@@ -36,5 +36,48 @@ def test_parallel_circuit():
         assert a_desired[k] == bc["a"]
 
 
+def periodic_reference(Ei, S):
+    """test every rotation of the negative coil sides separately"""
+    periodic = []
+    for km in range(len(S)):
+        ei = Ei[0][km]
+        S2 = [item for sublist in S[km] for item in sublist]
+        ei_pos = [ei[i] for i, s in enumerate(S2) if s > 0]
+        ei_neg = [ei[i] for i, s in enumerate(S2) if s <= 0]
+        if len(ei_pos) != len(ei_neg):
+            periodic.append(1)
+            continue
+        a_max = 0
+        for k in range(len(ei_pos)):
+            angles = np.round(np.angle(np.array(ei_pos) + np.roll(ei_neg, k)), 4)
+            _, counts = np.unique(angles, return_counts=True)
+            a_max = max(a_max, np.min(counts))
+        periodic.append(a_max)
+    return periodic
+
+
+def test_wdg_get_periodic():
+    print("test periodicity of the winding with all rotations of coil sides")
+    for Q, P, m, wstep, layers in [
+        (12, 10, 3, 1, 2),
+        (48, 8, 3, -1, 2),
+        (27, 6, 3, -1, 2),
+        (60, 8, 5, -1, 1),
+        (24, 22, 3, 1, 1),
+    ]:
+        data = datamodel()
+        data.genwdg(Q=Q, P=P, m=m, w=wstep, layers=layers)
+        Ei = data.results["Ei_el"]
+        S = data.get_phases()
+        assert swat_em.analyse.wdg_get_periodic(Ei, S) == periodic_reference(Ei, S)
+
+    # phases with a different number of coil sides
+    S = [[[1, -2, 3], []], [[4, -5], []], [[-6], []]]
+    S2 = [np.array(s) for s in swat_em.analyse._flatten(S)]
+    Ei, _ = swat_em.analyse.calc_star(6, S2, 1, 1, 1)
+    assert swat_em.analyse.wdg_get_periodic([Ei], S) == [1, 1, 1]
+
+
 if __name__ == "__main__":
     test_parallel_circuit()
+    test_wdg_get_periodic()
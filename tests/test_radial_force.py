@@ -6,8 +6,10 @@ import sys
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+import numpy as np
 from swat_em.wdggenerator import genwdg
 from swat_em.datamodel import datamodel
+from swat_em import analyse
 
 
 def test_radial_force_modes1():
@@ -46,8 +48,40 @@ def test_radial_force_modes4():
     assert modes == [2, 4, 6, 8]
 
 
+def test_radial_force_spectrum():
+    # compare with the spectrum of the sampled squared MMF
+    for Q, P, w in [(12, 10, 1), (9, 8, 1), (18, 4, -1)]:
+        data = datamodel()
+        data.genwdg(Q=Q, P=P, m=3, layers=2, w=w)
+        mmf = data.get_MMF()
+        HA = mmf.harmonics(2000)
+        r, A = analyse.calc_radial_force_spectrum(
+            HA, threshold=0, mean_square=np.mean(mmf.levels**2)
+        )
+        assert len(r) == len(A) == 1001
+        _, MMK = mmf.sample(100 * Q + 1)
+        ref = np.abs(analyse.DFT(MMK[:-1] ** 2))
+        np.testing.assert_allclose(A[:40], ref[:40], atol=5e-3 * A[0])
+
+
+def test_radial_force_amplitudes():
+    data = datamodel()
+    data.genwdg(Q=12, P=10, m=3, layers=2, w=1)
+    modes, amplitudes = data.get_radial_force(num_modes=4)
+    assert modes == data.get_radial_force_modes(num_modes=4) == [2, 4, 6, 8]
+    assert len(amplitudes) == len(modes)
+    assert all(0 < a <= 1 for a in amplitudes)
+
+    # constant squared MMF: no radial force modes
+    HA = analyse.MMF(4, [1, -1, 1, -1]).harmonics(1800)
+    modes, amplitudes = analyse.calc_radial_force_modes_from_harmonics(HA, 1)
+    assert modes == []
+
+
 if __name__ == "__main__":
     test_radial_force_modes1()
     test_radial_force_modes2()
     test_radial_force_modes3()
     test_radial_force_modes4()
+    test_radial_force_spectrum()
+    test_radial_force_amplitudes()
@@ -6,7 +6,9 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import numpy as np
-from swat_em.datamodel import datamodel
+import copy
+from swat_em.datamodel import datamodel, project
+from swat_em.config import config, get_changed_keys
 
 
 def test_is_symmetric():
@@ -53,6 +55,134 @@ def test_lcmQP():
     assert wdg.get_lcmQP() == 12
 
 
+def test_lazy_results():
+    wdg = datamodel()
+    wdg.genwdg(Q=12, P=2, m=3, w=5, layers=2)
+    wdg.get_fundamental_windingfactor()
+    nu, kw = wdg.get_windingfactor_el()
+    assert "wf_el" in wdg.results.keys()
+    assert "MMK" not in wdg.results.keys()
+    assert "wf_mech" not in wdg.results.keys()
+    assert wdg.get_parallel_connections() == [1, 2]
+    assert "MMK" not in wdg.results.keys()
+
+    # only the results depending on the turns are removed
+    q = wdg.get_q()
+    wdg.set_turns(2)
+    assert "wf_el" not in wdg.results.keys()
+    assert wdg.results["q"] is q
+    np.testing.assert_allclose(wdg.get_windingfactor_el()[1], kw)
+
+    wdg.get_basic_characteristics()
+    assert "MMK" in wdg.results.keys()
+    wdg.set_machinedata(p=2)
+    assert "MMK" in wdg.results.keys()  # doesn't depend on p
+    assert "basic_char" not in wdg.results.keys()
+    assert wdg.get_q() == 1
+    wdg.set_machinedata(p=1)
+
+    # recalculation if the config changes
+    N_nu_el = config["N_nu_el"]
+    try:
+        config["N_nu_el"] = 3
+        assert len(wdg.get_windingfactor_el()[0]) == 3
+        mmf = wdg.get_MMF()
+        config["N_nu_el"] = 5
+        assert len(wdg.get_windingfactor_el()[0]) == 5
+        assert wdg.get_MMF() is mmf
+    finally:
+        config["N_nu_el"] = N_nu_el
+
+
+def test_copy():
+    wdg = datamodel()
+    wdg.genwdg(Q=12, P=2, m=3, w=5, layers=2)
+    nu, kw = wdg.get_windingfactor_el()
+    wdg2 = wdg.copy()
+    assert wdg2.results["wf_el"] is wdg.results["wf_el"]
+    assert not wdg.results["MMK"]["HA"].flags.writeable
+    assert not wdg2.get_layers()[0].flags.writeable
+
+    # copy on write
+    wdg2.set_turns(2)
+    assert "wf_el" in wdg.results.keys()
+    assert "wf_el" not in wdg2.results.keys()
+    assert wdg.get_turns() == 1
+    HA = wdg.results["MMK"]["HA"]
+    np.testing.assert_allclose(wdg2.results["MMK"]["HA"], 2 * HA)
+    wdg2.set_phases([[[1, -4], []], [[3, -6], []], [[5, -2], []]])
+    assert wdg.get_phases() != wdg2.get_phases()
+
+    wdg3 = wdg.copy(deep=True)
+    assert wdg3.get_phases() == wdg.get_phases()
+    assert wdg3 == wdg
+
+
+def test_config_changes():
+    old = copy.deepcopy(config)
+    new = copy.deepcopy(config)
+    new["plt"]["lw"] += 1
+    new["radial_force"]["num_modes"] += 1
+    assert get_changed_keys(old, new) == ["plt.lw", "radial_force.num_modes"]
+
+    proj = project()
+    for Q in [12, 24]:
+        wdg = datamodel()
+        wdg.genwdg(Q=Q, P=2, m=3, w=5, layers=2)
+        wdg.get_basic_characteristics()
+        wdg.get_windingfactor_el()
+        wdg.get_layers()
+        proj.add_model(wdg)
+    wdg = proj.get_model_by_index(0)
+    keys = set(wdg.results.keys())
+
+    # only colors and line widths -> no results affected
+    proj.invalidate_config("plt.lw", "plt.res")
+    assert set(wdg.results.keys()) == keys
+    proj.invalidate_config("plt")
+    assert "layers_str" not in wdg.results.keys()
+    assert "layers" in wdg.results.keys()
+
+    proj.invalidate_config("radial_force.num_modes")
+    assert "basic_char" not in wdg.results.keys()
+    assert "MMK" in wdg.results.keys() and "wf_el" in wdg.results.keys()
+
+    proj.invalidate_config("N_nu_el")
+    assert "wf_el" not in wdg.results.keys()
+    assert "MMK" in wdg.results.keys()
+    # recalculated on demand, other models untouched
+    num_modes = config["radial_force"]["num_modes"]
+    try:
+        config["radial_force"]["num_modes"] = 2
+        assert len(wdg.get_basic_characteristics()[0]["r"]) == 2
+    finally:
+        config["radial_force"]["num_modes"] = num_modes
+    assert "wf_el" not in proj.get_model_by_index(1).results.keys()
+
+
+def test_compare_results():
+    import tempfile
+
+    wdg = datamodel()
+    wdg.genwdg(Q=12, P=2, m=3, layers=1)
+    assert set(wdg.results.available()) >= {"q", "basic_char", "MMK", "wf_el"}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fname = os.path.join(tmpdir, "myfile.wdg")
+        wdg.save_to_file(fname)
+        wdg2 = datamodel()
+        wdg2.load_from_file(fname)
+
+    # results which are calculated in one of the models only
+    assert wdg.results == wdg2.results
+    wdg.get_q()
+    wdg.get_basic_characteristics()
+    assert wdg.results == wdg2.results
+    assert not wdg.results != wdg2.results
+
+    wdg2.genwdg(Q=12, P=4, m=3, layers=1)
+    assert wdg.results != wdg2.results
+
+
 if __name__ == "__main__":
     test_is_symmetric()
     test_fundamental_winding_factor()
@@ -61,3 +191,7 @@ if __name__ == "__main__":
     test_periodicity()
     test_parallel_connections()
     test_lcmQP()
+    test_lazy_results()
+    test_copy()
+    test_config_changes()
+    test_compare_results()
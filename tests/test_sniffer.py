@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+# Test for the combination sniffer without GUI
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import tempfile
+import threading
+import numpy as np
+from swat_em import sniffer
+from swat_em import wdggenerator
+from swat_em.datamodel import datamodel
+
+
+def test_sweep():
+    progress = []
+    res = sniffer.sweep(
+        range(6, 25),
+        range(2, 13, 2),
+        m=3,
+        processes=1,
+        chunksize=7,
+        callback=lambda done, total: progress.append((done, total)),
+    )
+    comb = sniffer.get_combinations(range(6, 25), range(2, 13, 2), 3)
+    num = res["num_combinations"]
+    assert num == len(comb["Q"])
+    assert progress[-1] == (num, num)
+    assert not res["cancelled"]
+    assert res["idx"] == list(range(len(res["Q"])))
+    assert res["comb"] == sorted(res["comb"])
+
+    for k in [0, 10, len(res["Q"]) - 1]:
+        wdg = datamodel()
+        w = int(comb["w"][res["comb"][k]])
+        wdg.genwdg(res["Q"][k], res["P"][k], 3, res["layers"][k], w=w)
+        bc, _ = wdg.get_basic_characteristics()
+        assert bc["kw1"][0] == res["kw1"][k]
+        assert bc["sigma_d"] == res["sigma_d"][k]
+        assert sniffer.get_datamodel(res, k).get_phases() == wdg.get_phases()
+
+    # same results (and order) with worker processes
+    res2 = sniffer.sweep(range(6, 25), range(2, 13, 2), m=3, processes=2, chunksize=5)
+    for key in sniffer.RESULT_KEYS:
+        assert res2[key] == res[key]
+
+
+def test_prefilter():
+    assert list(wdggenerator.is_feasible([12, 12, 18, 9], [10, 6, 4, 6], 3, 2)) == [
+        True,
+        False,  # Q/(m*t) = 12/(3*3)
+        True,
+        True,
+    ]
+    assert not wdggenerator.is_feasible(9, 6, 3, 1)  # Q/(2*m)
+    assert not wdggenerator.is_feasible(12, 2, 4, 2)  # Q/(2*m*t) for even m
+
+    for m in [3, 4]:
+        comb = sniffer.get_combinations(range(1, 31), range(2, 13, 2), m)
+        comb_all = sniffer.get_combinations(
+            range(1, 31), range(2, 13, 2), m, prefilter=False
+        )
+        assert comb_all["num_pruned"] == 0
+        assert len(comb["Q"]) + comb["num_pruned"] == len(comb_all["Q"])
+        assert comb["num_pruned"] > len(comb["Q"])
+
+        # the prefilter doesn't remove any winding
+        res = sniffer.sweep(range(1, 31), range(2, 13, 2), m, processes=1)
+        res_all = sniffer.sweep(
+            range(1, 31), range(2, 13, 2), m, processes=1, prefilter=False
+        )
+        assert res["num_pruned"] == comb["num_pruned"]
+        for key in ["Q", "P", "layers", "w", "kw1", "sigma_d"]:
+            assert res[key] == res_all[key]
+
+
+def test_sweep_cancel():
+    cancel = threading.Event()
+
+    def callback(done, total):
+        cancel.set()
+
+    res = sniffer.sweep(
+        range(6, 25), 4, m=3, processes=1, chunksize=4, callback=callback, cancel=cancel
+    )
+    assert res["cancelled"]
+    assert len(res["Q"]) > 0
+    assert max(res["comb"]) < 4
+
+
+def test_screening():
+    for Q, P, m, layers, w in [
+        (12, 10, 3, 2, 1),
+        (48, 8, 3, 2, 5),
+        (21, 10, 1, 2, 1),
+        (24, 22, 4, 1, -1),
+        (45, 30, 3, 2, 1),
+    ]:
+        wdg = datamodel()
+        wdg.genwdg(Q, P, m, layers, w=w)
+        screening = wdg.screen()
+        assert wdg.check_screening(screening) == []
+        bc, _ = wdg.get_basic_characteristics()
+        for key in ["q", "a", "t", "lcmQP"]:
+            assert screening[key] == bc[key]
+        assert abs(screening["kw1"] - bc["kw1"][0]) < 1e-12
+
+    # screening and full analysis give the same sweep
+    res = sniffer.sweep(range(6, 37, 3), range(2, 13, 2), m=3, processes=1)
+    res_full = sniffer.sweep(
+        range(6, 37, 3), range(2, 13, 2), m=3, processes=1, screening=False
+    )
+    for key in ["Q", "P", "layers", "w", "q", "a", "t", "lcmQP", "r1"]:
+        assert res[key] == res_full[key]
+    for key in ["kw1", "sigma_d"]:
+        assert max(abs(x - y) for x, y in zip(res[key], res_full[key])) < 1e-9
+
+
+def test_sweep_resume():
+    args = (range(6, 37), range(2, 13, 2), 3)
+    ref = sniffer.sweep(*args, processes=1, chunksize=7)
+    with tempfile.TemporaryDirectory() as path:
+        # interrupted after 3 chunks
+        cancel = threading.Event()
+        progress = []
+
+        def callback(done, total):
+            progress.append(done)
+            if len(progress) == 3:
+                cancel.set()
+
+        res = sniffer.sweep(
+            *args, processes=1, chunksize=7, callback=callback, cancel=cancel, path=path
+        )
+        assert res["cancelled"]
+        assert sniffer.load_results(path)["cancelled"]
+        assert len(res["Q"]) < len(ref["Q"])
+
+        # resumed with the chunks of the first run
+        res = sniffer.sweep(
+            *args,
+            processes=2,
+            callback=lambda done, total: progress.append(done),
+            path=path,
+        )
+        assert progress[3] == 28
+        assert not res["cancelled"]
+        for key in sniffer.RESULT_KEYS:
+            assert list(res[key]) == ref[key]
+        for key in sniffer.LAYOUT_KEYS:
+            assert list(res["layouts"][key]) == list(ref["layouts"][key])
+        for k in [0, len(ref["Q"]) - 1]:
+            wdg = sniffer.get_datamodel(res, k)
+            assert wdg.get_phases() == sniffer.get_datamodel(ref, k).get_phases()
+            assert wdg.get_num_slots() == ref["Q"][k]
+
+        # results of another sweep
+        try:
+            sniffer.sweep(range(6, 19), 4, 3, path=path)
+            assert False
+        except ValueError:
+            pass
+        res = sniffer.sweep(range(6, 19), 4, 3, processes=1, path=path, overwrite=True)
+        assert list(res["Q"]) == sniffer.sweep(range(6, 19), 4, 3, processes=1)["Q"]
+
+
+if __name__ == "__main__":
+    test_sweep()
+    test_prefilter()
+    test_sweep_cancel()
+    test_screening()
+    test_sweep_resume()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# Test for the undo/redo function of the project
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from swat_em.datamodel import datamodel, project
+from swat_em.config import config
+
+
+def new_project(num_models):
+    proj = project()
+    for k in range(num_models):
+        wdg = datamodel()
+        wdg.genwdg(Q=12 * (k + 1), P=2 * (k + 1), m=3, w=5, layers=2)
+        proj.add_model(wdg)
+    return proj
+
+
+def test_undo_redo():
+    proj = new_project(3)
+    wdg0 = proj.get_model_by_index(0)
+    wdg1 = proj.get_model_by_index(1)
+    kw0 = wdg0.get_fundamental_windingfactor()
+    wdg0.get_windingfactor_el()
+
+    proj.save_undo_state()
+    wdg1.set_turns(5)
+    proj.save_undo_state()
+    proj.clone_by_index(2)
+    assert proj.get_num_models() == 4
+    assert proj.get_num_undo_state() == 2
+
+    # the states only differ in the changed models
+    s1, s2 = proj.undo_state[0][0], proj.undo_state[1][0]
+    assert s1[0] is s2[0] and s1[2] is s2[2]
+    assert s1[1] is not s2[1]
+
+    proj.save_redo_state()
+    proj.undo()
+    assert proj.get_num_models() == 3
+    # unchanged models are kept with their results
+    assert proj.get_model_by_index(0) is wdg0
+    assert "wf_el" in proj.get_model_by_index(0).results.keys()
+    assert proj.get_model_by_index(1).get_turns() == 5
+
+    proj.save_redo_state()
+    proj.undo()
+    wdg1_old = proj.get_model_by_index(1)
+    assert wdg1_old.get_turns() == 1
+    assert wdg1_old.get_phases() == wdg1.get_phases()
+    assert proj.get_model_by_index(0).get_fundamental_windingfactor() == kw0
+
+    proj.save_undo_state()
+    proj.redo()
+    proj.save_undo_state()
+    proj.redo()
+    assert proj.get_num_models() == 4
+    assert proj.get_titles()[3] == proj.get_titles()[2] + "_copy"
+    assert proj.get_model_by_index(1).get_turns() == 5
+
+
+def test_undo_memory():
+    proj = new_project(5)
+    proj.save_undo_state()
+    size = proj.get_undo_memory()
+    assert size > 0
+    for k in range(10):
+        proj.get_model_by_index(0).set_turns(k + 2)
+        proj.save_undo_state()
+    proj.get_model_by_index(0).set_turns(12)
+    # only one model changed per state
+    assert proj.get_undo_memory() < 5 * size
+
+    max_memory = config["undo"]["max_memory_MB"]
+    try:
+        config["undo"]["max_memory_MB"] = 2.5 * size / 1024**2
+        proj.save_undo_state()
+        proj.get_model_by_index(0).set_turns(1)
+        assert proj.get_undo_memory() <= 2.5 * size
+        assert 1 < proj.get_num_undo_state() < 12
+        # the oldest states are removed, the newest are kept
+        proj.undo()
+        assert proj.get_model_by_index(0).get_turns() == 12
+        proj.undo()
+        assert proj.get_model_by_index(0).get_turns() == 11
+    finally:
+        config["undo"]["max_memory_MB"] = max_memory
+
+
+if __name__ == "__main__":
+    test_undo_redo()
+    test_undo_memory()
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# Test for the batch winding generator
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from swat_em import wdggenerator
+
+
+def test_genwdg_batch():
+    for m in [2, 3, 5]:
+        Q, P, layers, w, es = np.meshgrid(
+            np.arange(m, 49, m), [2, 4, 8, 10, 14], [1, 2], [-1, 1, 2], [0, -1]
+        )
+        batch = wdggenerator.genwdg_batch(Q, P, m, w, layers, es)
+        assert len(batch["valid"]) == Q.size
+        assert len(batch["offsets"]) == Q.size + 1
+        assert batch["slots"].dtype == np.int32
+        for k, args in enumerate(zip(Q.flat, P.flat, w.flat, layers.flat, es.flat)):
+            Q_, P_, w_, l_, es_ = [int(a) for a in args]
+            ret = wdggenerator.genwdg(Q_, P_, m, w_, l_, es_)
+            assert wdggenerator.get_batch_item(batch, k) == ret
+            if ret is None:
+                assert not batch["valid"][k]
+            else:
+                S = ret["phases"]
+                num = sum(len(l) for s in S for l in s)
+                assert batch["offsets"][k + 1] - batch["offsets"][k] == num
+
+
+def test_genwdg_batch_columns():
+    batch = wdggenerator.genwdg_batch([12, 12, 18, 20], 10, 3, 1, 2)
+    np.testing.assert_array_equal(batch["valid"], [True, True, True, False])
+    np.testing.assert_array_equal(batch["offsets"], [0, 24, 48, 84, 84])
+    np.testing.assert_array_equal(batch["slots"][:8], [1, 6, -7, -12, -2, -7, 8, 1])
+    np.testing.assert_array_equal(batch["phase"][:9], [0] * 8 + [1])
+    np.testing.assert_array_equal(batch["layer"][:9], [0] * 4 + [1] * 4 + [0])
+    np.testing.assert_array_equal(batch["wstep"], [1, 1, 1])
+    assert wdggenerator.get_batch_item(batch, 3) is None
+
+
+if __name__ == "__main__":
+    test_genwdg_batch()
+    test_genwdg_batch_columns()